@@ -1,12 +1,22 @@
 #!/usr/bin/env python3
 import os
 import re
+import sys
 import json
 from wsgiref.simple_server import make_server
 from urllib.parse import parse_qs
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
+sys.path.append(os.path.join(ROOT, 'src'))
+try:
+    from agi_poc import log_stream, metrics, run_index, run_paths
+except Exception:  # pragma: no cover - falls back to directory scans
+    metrics = None
+    run_index = None
+    run_paths = None
+    log_stream = None
+
 
 def _runs_base_dir():
     alt_runs = os.path.join(ROOT, 'runs')
@@ -58,7 +68,7 @@ def _parse_validation(vpath: str):
 
 
 def summarize_run(run_id: str) -> dict:
-    base = os.path.join(_runs_base_dir(), run_id)
+    base = _run_dir(_runs_base_dir(), run_id)
     log_path = os.path.join(base, 'langstack.txt')
     vpath = os.path.join(base, 'validation.json')
     demo_path = os.path.join(base, 'demo', 'index.html')
@@ -99,24 +109,41 @@ def summarize_run(run_id: str) -> dict:
             if any(b in tail for b in ['traceback', 'error', 'exception']):
                 ok = False
     cost = _scan_cost_from_log(log_path) if os.path.exists(log_path) else 0.0
+    docs = metrics.load_run(base) if metrics is not None else []
+    usage = metrics.totals(a for d in docs for a in d.get('attempts') or []) if docs else {}
     return {
         'run_id': run_id,
         'phase': phase,
         'validation': validation,
         'ok': bool(ok) if isinstance(ok, bool) else False,
         'cost_usd': round(cost, 4),
+        'attempts': usage.get('attempts', 0),
+        'cpu_s': usage.get('cpu_s', 0.0),
+        'wall_s': usage.get('wall_s', 0.0),
+        'max_rss_kb': usage.get('max_rss_kb'),
         'spec_exists': os.path.exists(spec_path),
         'log_exists': os.path.exists(log_path),
         'demo_exists': os.path.exists(demo_path),
     }
 
 
-def compute_metrics(limit: int = 20) -> dict:
-    base = _runs_base_dir()
-    if not os.path.isdir(base):
-        return {'active_run_id': '', 'phase': '', 'failure_rate': 0.0, 'total_cost_usd': 0.0, 'runs': []}
+def _run_dir(base: str, run_id: str) -> str:
+    """Run dir of run_id: date-sharded under runs/ (run_paths), flat elsewhere."""
+    if run_paths is not None and base == os.path.join(ROOT, 'runs'):
+        return run_paths.run_dir(run_id, ROOT)
+    return os.path.join(base, run_id)
+
+
+def _recent_run_ids(base: str, limit: int) -> list:
+    if run_index is not None and base == os.path.join(ROOT, 'runs'):
+        if run_index.available(ROOT):
+            # index rows plus the newest shards: not every writer records runs
+            return run_index.recent_run_ids(limit, ROOT)
+        return run_paths.recent_run_ids(limit, ROOT)
     entries = []
     for name in os.listdir(base):
+        if name.startswith('.'):
+            continue
         p = os.path.join(base, name)
         try:
             st = os.stat(p)
@@ -125,8 +152,21 @@ def compute_metrics(limit: int = 20) -> dict:
         except Exception:
             pass
     entries.sort(reverse=True)
-    run_ids = [name for _, name in entries[:limit]]
+    return [name for _, name in entries[:limit]]
+
+
+def compute_metrics(limit: int = 20) -> dict:
+    base = _runs_base_dir()
+    if not os.path.isdir(base):
+        return {'active_run_id': '', 'phase': '', 'failure_rate': 0.0, 'total_cost_usd': 0.0, 'total_cpu_s': 0.0,
+                'by_agent': {}, 'by_intent': {}, 'runs': []}
+    run_ids = _recent_run_ids(base, limit)
     summaries = [summarize_run(rid) for rid in run_ids]
+    # per agent / per intent resource cost from runs/<run>/metrics.json
+    if metrics is not None:
+        usage = metrics.aggregate(d for rid in run_ids for d in metrics.load_run(_run_dir(base, rid)))
+    else:
+        usage = {'by_agent': {}, 'by_intent': {}}
     decided = [s for s in summaries if isinstance(s.get('ok'), bool)]
     fails = sum(1 for s in decided if not s['ok'])
     denom = len(decided) or 1
@@ -138,10 +178,23 @@ def compute_metrics(limit: int = 20) -> dict:
         'phase': active['phase'] if active else '',
         'failure_rate': round(failure_rate, 4),
         'total_cost_usd': round(total_cost, 4),
+        'total_cpu_s': round(sum(float(s.get('cpu_s') or 0.0) for s in summaries), 4),
+        'by_agent': usage['by_agent'],
+        'by_intent': usage['by_intent'],
         'runs': summaries,
     }
 
 
+def _usage_table(title: str, groups: dict) -> str:
+    rows = ['<tr><th>{}</th><th>Attempts</th><th>CPU s</th><th>Wall s</th><th>Peak RSS MB</th><th>Timeouts</th></tr>'.format(title)]
+    for name, t in sorted(groups.items(), key=lambda kv: -float(kv[1].get('cpu_s') or 0.0)):
+        rss = t.get('max_rss_kb')
+        rows.append('<tr><td><code>{}</code></td><td>{}</td><td>{:.2f}</td><td>{:.2f}</td><td>{}</td><td>{}</td></tr>'.format(
+            name, t.get('attempts', 0), float(t.get('cpu_s') or 0), float(t.get('wall_s') or 0),
+            '{:.1f}'.format(rss / 1024.0) if rss is not None else '-', t.get('timeouts', 0)))
+    return '<div class="row"><div class="label">Cost by {}</div><table>{}</table></div>'.format(title.lower(), ''.join(rows))
+
+
 from string import Template
 
 
@@ -204,12 +257,16 @@ def page_index(environ=None):
     h.append('<div class="row">Phase: <span class="ok">{}</span></div>'.format(stats.get('phase','-') or '-'))
     h.append('<div class="row">Failure Rate: <strong>{:.1f}%</strong></div>'.format((stats.get('failure_rate') or 0)*100))
     h.append('<div class="row">Total Cost (recent): ${:.4f}</div>'.format(stats.get('total_cost_usd') or 0.0))
+    h.append('<div class="row">Total CPU (recent): {:.2f}s</div>'.format(stats.get('total_cpu_s') or 0.0))
     # Table
-    rows = ['<tr><th>Run ID</th><th>Phase</th><th>OK</th><th>Cost</th></tr>']
+    rows = ['<tr><th>Run ID</th><th>Phase</th><th>OK</th><th>Cost</th><th>CPU s</th><th>Wall s</th></tr>']
     for s in stats.get('runs', []):
-        rows.append('<tr><td><code>{}</code></td><td>{}</td><td>{}</td><td>${:.4f}</td></tr>'.format(
-            s.get('run_id',''), s.get('phase',''), 'ok' if s.get('ok') else 'ng', float(s.get('cost_usd') or 0)))
+        rows.append('<tr><td><code>{}</code></td><td>{}</td><td>{}</td><td>${:.4f}</td><td>{:.2f}</td><td>{:.2f}</td></tr>'.format(
+            s.get('run_id',''), s.get('phase',''), 'ok' if s.get('ok') else 'ng', float(s.get('cost_usd') or 0),
+            float(s.get('cpu_s') or 0), float(s.get('wall_s') or 0)))
     h.append('<div class="row"><div class="label">Recent Runs</div><table>{}</table></div>'.format(''.join(rows)))
+    h.append(_usage_table('Agent', stats.get('by_agent') or {}))
+    h.append(_usage_table('Intent', stats.get('by_intent') or {}))
     h.append('</div>')
     return render_html('\n'.join(h))
 
@@ -226,6 +283,17 @@ def app(environ, start_response):
     if method == 'GET' and path == '/stats':
         start_response('200 OK', [('Content-Type', 'application/json')])
         return [json.dumps(compute_metrics(limit=20)).encode('utf-8')]
+    if method == 'GET' and path == '/tail' and log_stream is not None:
+        # /tail?run_id=..&log=logs.txt&offset=N -> bytes appended since offset (poll with the returned offset)
+        q = parse_qs(environ.get('QUERY_STRING') or '')
+        rid = (q.get('run_id') or [''])[0]
+        try:
+            off = int((q.get('offset') or [''])[0])
+        except ValueError:
+            off = None
+        res = log_stream.tail_run(rid, (q.get('log') or [None])[0], off, ROOT) if rid else {}
+        start_response('200 OK', [('Content-Type', 'application/json')])
+        return [json.dumps(res).encode('utf-8')]
     start_response('404 Not Found', [('Content-Type', 'text/plain; charset=utf-8')])
     return [b'Not Found']
 
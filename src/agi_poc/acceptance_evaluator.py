@@ -2,10 +2,10 @@ from __future__ import annotations
 
 import json
 import os
-import re
 from typing import Any, Dict, List, Tuple
 
-from yaml_min import load as yaml_load
+from yaml_min import load_cached as yaml_load
+from . import markdown_index, object_store, run_paths
 from .util import project_root
 
 
@@ -13,11 +13,6 @@ def _root() -> str:
     return project_root(os.path.dirname(__file__))
 
 
-def _read(path: str) -> str:
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
-
-
 def _resolve_output_path(intent_yaml_path: str | None, run_id: str) -> str:
     # Prefer reading from intent YAML outputs[0].path; fallback to runs/{run_id}/SPEC.md
     root = _root()
@@ -28,156 +23,90 @@ def _resolve_output_path(intent_yaml_path: str | None, run_id: str) -> str:
             if outs and isinstance(outs[0], dict):
                 rel = outs[0].get("path")
                 if isinstance(rel, str) and rel:
-                    return os.path.join(root, rel.replace("{run_id}", run_id))
+                    return os.path.join(root, run_paths.render_path(rel, run_id))
         except Exception:
             pass
-    return os.path.join(root, "runs", run_id, "SPEC.md")
-
-
-def _md_has_section(md: str, title: str) -> bool:
-    return (f"## {title}" in md) or (f"### {title}" in md)
-
-
-def _extract_section(md: str, header: str) -> str:
-    idx = md.find(header)
-    if idx == -1:
-        return ""
-    return md[idx:]
-
-
-def _count_uc_sections(md: str) -> int:
-    # Count headings like "### UC-..." as unit of usecases
-    return len(re.findall(r"^###\s+UC-", md, flags=re.MULTILINE))
-
-
-def evaluate_spec_against_criteria(md: str) -> Tuple[bool, List[Dict[str, Any]]]:
+    return os.path.join(run_paths.run_dir(run_id, root), "SPEC.md")
+
+
+def _data_model_check(md: markdown_index.MarkdownIndex) -> Tuple[bool, int]:
+    """(passed, entities detected) for the データモデル section."""
+    dm = md.section("データモデル")
+    if dm is None:
+        return True, 0
+    # Entities as "### <Entity>" sub-headings (list/attribute headings aside),
+    # else the rows of the entity list table ("| エンティティ | ...")
+    entity_secs = [s for s in dm.subsections(3) if "一覧" not in s.title and "属性" not in s.title]
+    if entity_secs:
+        entities = len(entity_secs)
+        blocks = entity_secs
+    else:
+        rows = sum(len(t.rows) for t in dm.all_tables() if t.header and t.header[0] == "エンティティ")
+        entities = rows if rows >= 3 else 0
+        blocks = [dm]
+    # Attribute tables: a block passes with >= 3 rows under "| 属性 |" headers
+    attr_ok = sum(1 for b in blocks if sum(len(t.rows) for t in b.all_tables() if t.has_columns("属性")) >= 3)
+    if not entities:
+        return False, 0
+    return entities >= 3 and attr_ok >= min(3, entities), entities
+
+
+def evaluate_spec_against_criteria(md_text: str) -> Tuple[bool, List[Dict[str, Any]]]:
     """Evaluate SPEC.md content against hard rules aligned to intents/create_spec_document.yml.
 
     Returns: (all_passed, details)
     """
+    return evaluate_index(markdown_index.parse(md_text))
+
+
+def evaluate_index(md: markdown_index.MarkdownIndex) -> Tuple[bool, List[Dict[str, Any]]]:
+    """evaluate_spec_against_criteria on an already built section index."""
     results: List[Dict[str, Any]] = []
 
     # 1) Section presence
-    required_sections = [
-        "目的",
-        "非目標",
-        "機能一覧",
-        "ユースケース",
-        "画面要件",
-        "API 仕様",
-        "データモデル",
-        "受入条件",
-    ]
-    sec_ok = all(_md_has_section(md, s) for s in required_sections)
+    required_sections = list(markdown_index.SPEC_SECTIONS)
     results.append({
         "id": "sections",
         "desc": "必須セクションの存在",
         "required": required_sections,
-        "passed": bool(sec_ok),
+        "passed": not md.missing_sections(),
     })
 
     # 2) API table columns
-    api_ok = True
-    api_sec = _extract_section(md, "## API 仕様")
-    if api_sec:
-        api_ok = ("| Method |" in api_sec) and ("| Path |" in api_sec)
+    api = md.section("API 仕様")
     results.append({
         "id": "api_table",
         "desc": "API仕様表にMethod/Path列",
-        "passed": bool(api_ok),
+        "passed": api is None or api.has_table("Method", "Path"),
     })
 
     # 3) Data model: >=3 entities and each has >=3 attributes
-    dm_ok = True
-    dm_sec = _extract_section(md, "## データモデル")
-    entity_names: List[str] = []
-    entity_blocks: List[str] = []
-    if dm_sec:
-        # Assume entities as sub-headings or first column values in top table
-        # Try sub-headings first: "### <Entity>"
-        for m in re.finditer(r"^###\s+(.+)$", dm_sec, flags=re.MULTILINE):
-            name = m.group(1).strip()
-            # Ignore list/attribute section headers
-            if "一覧" in name or "属性" in name:
-                continue
-            entity_names.append(name)
-        if entity_names:
-            # Split by these headings to evaluate attribute tables under each
-            parts = re.split(r"^###\s+.+$", dm_sec, flags=re.MULTILINE)
-            # The first part is before the first heading; drop it
-            entity_blocks = parts[1:]
-        else:
-            # Fallback: treat the whole section as one block; we'll infer entities from the entity list table
-            entity_blocks = [dm_sec]
-
-        # Entity count inference: from headings or table rows that look like entity entries
-        if not entity_names:
-            # Count only rows belonging to the entity list table (header contains 'エンティティ')
-            lines = dm_sec.splitlines()
-            start_idx = -1
-            for i, ln in enumerate(lines):
-                if re.search(r"^\s*\|\s*エンティティ\s*\|", ln):
-                    start_idx = i
-                    break
-            count_rows = 0
-            if start_idx != -1:
-                for ln in lines[start_idx + 1:]:
-                    if not ln.strip():
-                        break
-                    if not ln.lstrip().startswith("|"):
-                        break
-                    if ("エンティティ" in ln) or ("---" in ln):
-                        continue
-                    count_rows += 1
-            if count_rows >= 3:
-                entity_names = [f"Entity{i+1}" for i in range(count_rows)]
-
-        # Attribute table check: for each block, require >=3 data rows under a table with header containing "| 属性 |"
-        attr_ok_count = 0
-        for blk in entity_blocks:
-            if "| 属性 |" in blk:
-                rows = [
-                    ln for ln in blk.splitlines()
-                    if ln.strip().startswith("| ") and ("| 属性 |" not in ln) and ("---" not in ln)
-                ]
-                if len(rows) >= 3:
-                    attr_ok_count += 1
-        if not entity_names:
-            dm_ok = False
-        else:
-            # If we detected N entities, require at least min(3, N) attribute tables passing
-            required_attr = min(3, len(entity_names))
-            dm_ok = (len(entity_names) >= 3) and (attr_ok_count >= required_attr)
-
+    dm_ok, entities = _data_model_check(md)
     results.append({
         "id": "data_model",
         "desc": "データモデル: 3エンティティ以上かつ各に属性>=3",
-        "entities_detected": len(entity_names),
+        "entities_detected": entities,
         "passed": bool(dm_ok),
     })
 
     # 4) Use cases >=3 and contain key flows
-    uc_ok = True
-    uc_cnt = _count_uc_sections(md)
-    flow_ok = ("基本フロー" in md) and ("代替フロー" in md) and ("例外" in md)
-    uc_ok = (uc_cnt >= 3) and flow_ok
+    uc_cnt = len(md.uc_blocks())
+    flow_ok = md.contains("基本フロー", "代替フロー", "例外")
     results.append({
         "id": "use_cases",
         "desc": "ユースケース>=3 かつ 基本/代替/例外",
         "count": uc_cnt,
-        "passed": bool(uc_ok),
+        "passed": bool(uc_cnt >= 3 and flow_ok),
     })
 
     # 5) Acceptance criteria bullets >=3
-    ac_ok = True
-    ac_sec = _extract_section(md, "## 受入条件")
-    bullets = [ln for ln in ac_sec.splitlines() if ln.strip().startswith("-")]
-    ac_ok = len(bullets) >= 3
+    ac = md.section("受入条件")
+    bullets = ac.all_bullets() if ac is not None else []
     results.append({
         "id": "acceptance",
         "desc": "受入条件の箇条>=3",
         "count": len(bullets),
-        "passed": bool(ac_ok),
+        "passed": len(bullets) >= 3,
     })
 
     all_passed = all(item.get("passed") for item in results)
@@ -188,7 +117,6 @@ def evaluate(intent_yaml_path: str | None, run_id: str) -> Tuple[bool, Dict[str,
     root = _root()
     spec_path = _resolve_output_path(intent_yaml_path, run_id)
     exists = os.path.exists(spec_path)
-    md = _read(spec_path) if exists else ""
 
     details: Dict[str, Any] = {
         "intent_yaml": intent_yaml_path,
@@ -201,7 +129,7 @@ def evaluate(intent_yaml_path: str | None, run_id: str) -> Tuple[bool, Dict[str,
     if not exists:
         return False, details
 
-    passed, checks = evaluate_spec_against_criteria(md)
+    passed, checks = evaluate_index(markdown_index.load_cached(spec_path))
     details["checks"] = checks
     details["passed"] = passed
     return passed, details
@@ -209,13 +137,12 @@ def evaluate(intent_yaml_path: str | None, run_id: str) -> Tuple[bool, Dict[str,
 
 def write_reports(run_id: str, report: Dict[str, Any]) -> Tuple[str, str]:
     root = _root()
-    run_dir = os.path.join(root, "runs", run_id)
+    run_dir = run_paths.run_dir(run_id, root)
     os.makedirs(run_dir, exist_ok=True)
     jpath = os.path.join(run_dir, "acceptance_report.json")
     mpath = os.path.join(run_dir, "acceptance_report.md")
 
-    with open(jpath, "w", encoding="utf-8") as jf:
-        json.dump(report, jf, ensure_ascii=False, indent=2)
+    object_store.write_json(jpath, report, root)
 
     # Markdown summary
     lines: List[str] = []
@@ -229,7 +156,6 @@ def write_reports(run_id: str, report: Dict[str, Any]) -> Tuple[str, str]:
         desc = chk.get("desc")
         extra = {k: v for k, v in chk.items() if k not in ("id", "desc", "passed")}
         lines.append(f"- [{status}] {desc} {json.dumps(extra, ensure_ascii=False)}")
-    with open(mpath, "w", encoding="utf-8") as mf:
-        mf.write("\n".join(lines) + "\n")
+    object_store.write_text(mpath, "\n".join(lines) + "\n", root)
 
     return jpath, mpath
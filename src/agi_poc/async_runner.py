@@ -0,0 +1,223 @@
+"""Asyncio execution engine for agent runs.
+
+`run_agent_async` / `execute_with_retry_async` mirror runner.run_agent /
+runner.execute_with_retry (same command construction, same logs.txt format
+and run dir layout) but let one event loop drive many runs at once:
+
+- CLI agents run via `asyncio.create_subprocess_exec` in their own session
+  (process group); timeouts and task cancellation terminate the whole group
+  (SIGTERM, then SIGKILL after the grace period, see proc_group).
+  Their output is streamed into logs.txt as it arrives (log_stream), and
+  their rusage is measured as a RUSAGE_CHILDREN delta (metrics).
+- `entry.type: python` agents run in a thread via runner's in-process path.
+- A global semaphore bounds concurrent attempts, and a per-agent semaphore
+  caps each agent_id (`limits.max_concurrency` in agent.yml overrides the
+  default cap).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import signal
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+from . import log_stream, metrics, proc_group, result_cache, run_paths, salvage
+from .deadline import Deadline, backoff_s
+from .inproc import run_python_entry
+from .runner import (
+    _agent_id,
+    _build_cmd_from_agent,
+    _cache_lookup,
+    _project_root,
+    _render_args,
+    keep_partial,
+    write_log,
+)
+
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_PER_AGENT = 4
+
+_config: Dict[str, int] = {"max_concurrency": DEFAULT_MAX_CONCURRENCY, "per_agent": DEFAULT_PER_AGENT}
+# Semaphores are bound to the loop that first uses them: loop -> state
+_loop_state: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+
+def configure(max_concurrency: Optional[int] = None, per_agent: Optional[int] = None) -> None:
+    """Set concurrency limits; applies to event loops that start using the runner afterwards."""
+    if max_concurrency is not None:
+        _config["max_concurrency"] = max(1, int(max_concurrency))
+    if per_agent is not None:
+        _config["per_agent"] = max(1, int(per_agent))
+
+
+def _state() -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    st = _loop_state.get(loop)
+    if st is None:
+        st = _loop_state[loop] = {"global": asyncio.Semaphore(_config["max_concurrency"]), "agents": {}}
+    return st
+
+
+def _agent_cap(agent_spec: Dict[str, Any] | None) -> int:
+    limits = (agent_spec or {}).get("limits") if isinstance(agent_spec, dict) else None
+    cap = limits.get("max_concurrency") if isinstance(limits, dict) else None
+    try:
+        return max(1, int(cap)) if cap is not None else _config["per_agent"]
+    except (TypeError, ValueError):
+        return _config["per_agent"]
+
+
+def _agent_semaphore(agent_spec: Dict[str, Any] | None) -> asyncio.Semaphore:
+    aid = str((agent_spec or {}).get("agent_id") or "default") if isinstance(agent_spec, dict) else "default"
+    agents = _state()["agents"]
+    sem = agents.get(aid)
+    if sem is None:
+        sem = agents[aid] = asyncio.Semaphore(_agent_cap(agent_spec))
+    return sem
+
+
+async def _terminate_group(proc: asyncio.subprocess.Process) -> None:
+    """SIGTERM the agent's process group, SIGKILL what is left after the grace period."""
+    proc_group.signal_group(proc.pid, signal.SIGTERM)
+    with contextlib.suppress(asyncio.TimeoutError):
+        await asyncio.wait_for(proc.wait(), proc_group.grace_s())
+    proc_group.signal_group(proc.pid, signal.SIGKILL)
+    await proc.wait()
+
+
+async def _pump(reader: asyncio.StreamReader, stream: str, log: log_stream.AttemptLog) -> None:
+    while True:
+        chunk = await reader.read(log_stream.CHUNK)
+        if not chunk:
+            return
+        log.feed(stream, chunk)
+
+
+async def _settle(pumping: "asyncio.Future[Any]") -> None:
+    # Retrieve the pumps' outcome so a cancelled gather is never left unawaited
+    pumping.cancel()
+    await asyncio.gather(pumping, return_exceptions=True)
+
+
+async def _run_cli(
+    cmd: list[str],
+    root: str,
+    timeout_s: Optional[float],
+    log: log_stream.AttemptLog,
+    env: Optional[Dict[str, str]] = None,
+) -> Tuple[int, str, str, bool]:
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=root,
+        env=env,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=proc_group.NEW_SESSION,
+    )
+    meter = metrics.ChildrenMeter()
+    pumping = asyncio.gather(_pump(proc.stdout, "stdout", log), _pump(proc.stderr, "stderr", log), proc.wait())
+    try:
+        await asyncio.wait_for(pumping, timeout_s if timeout_s and timeout_s > 0 else None)
+    except asyncio.TimeoutError:
+        await _terminate_group(proc)
+        await _settle(pumping)
+        log.usage = meter.stop()
+        out, err = log.output()
+        return 124, out, err, True
+    except BaseException:
+        # cancelled (e.g. a sibling won a cascade): take the process group down with us
+        with contextlib.suppress(Exception):
+            await asyncio.shield(_terminate_group(proc))
+        with contextlib.suppress(Exception):
+            await _settle(pumping)
+        meter.stop()
+        raise
+    log.usage = meter.stop()
+    out, err = log.output()
+    return proc.returncode, out, err, False
+
+
+async def run_agent_async(
+    intent_yaml_path: str,
+    user_request: str,
+    run_id: str,
+    timeout_s: Optional[float] = None,
+    agent_spec: Dict[str, Any] | None = None,
+    log: Optional[log_stream.AttemptLog] = None,
+) -> Tuple[int, str, str, bool]:
+    """Async runner.run_agent: returns (rc, stdout tail, stderr tail, timed_out)."""
+    root = _project_root()
+    async with _state()["global"], _agent_semaphore(agent_spec):
+        extra_env = salvage.agent_vars(run_paths.run_dir(run_id, root))
+        entry = (agent_spec or {}).get("entry") if isinstance(agent_spec, dict) else None
+        if isinstance(entry, dict) and entry.get("type") == "python":
+            rendered = _render_args(entry.get("args"), intent_yaml_path, user_request, run_id)
+            usage: Dict[str, Any] = {}
+            res = await asyncio.to_thread(
+                run_python_entry, str(entry.get("target") or ""), rendered, root, timeout_s, usage, extra_env
+            )
+            if log is not None and usage:
+                log.usage = usage
+            return res
+        cmd = _build_cmd_from_agent(agent_spec, intent_yaml_path, user_request, run_id)
+        env = dict(os.environ, **extra_env) if extra_env else None
+        return await _run_cli(cmd, root, timeout_s, log or log_stream.AttemptLog(None, 0), env)
+
+
+async def execute_with_retry_async(
+    intent_yaml_path: str,
+    user_request: str,
+    run_id: str,
+    run_dir: str,
+    timeout_s: Optional[int] = None,
+    retries: int = 1,
+    agent_spec: Dict[str, Any] | None = None,
+    use_cache: Optional[bool] = None,
+    deadline: Optional[Deadline] = None,
+) -> int:
+    """Async execute_with_retry: same attempts, deadline handling, logs.txt
+    records, partial-output salvage and result cache. Returns final rc."""
+    key, hit = _cache_lookup(intent_yaml_path, user_request, run_id, run_dir, agent_spec, use_cache)
+    if hit:
+        return 0
+    before = result_cache.snapshot_outputs(run_dir)
+    deadline = deadline or Deadline()
+    attempt = 0
+    last_rc = 124
+    while attempt <= max(0, retries):
+        if deadline.expired():
+            write_log(run_dir, f"deadline exhausted before attempt={attempt + 1} {deadline.describe()}")
+            break
+        attempt += 1
+        budget = deadline.attempt_timeout(timeout_s)
+        info = f"timeout_s={budget:.2f} {deadline.describe()}" if budget is not None else deadline.describe()
+        started = time.monotonic()
+        with log_stream.AttemptLog(run_dir, attempt, info=info) as alog:
+            rc, out, err, to = await run_agent_async(intent_yaml_path, user_request, run_id, budget, agent_spec, alog)
+            alog.end(rc, to, out, err)
+        metrics.record_attempt(run_dir, run_id, attempt, _agent_id(agent_spec), rc, to, time.monotonic() - started, alog.usage)
+        last_rc = rc
+        if to:
+            keep_partial(intent_yaml_path, run_id, run_dir, attempt, before)
+        if rc == 0:
+            if salvage.clear(run_dir):
+                write_log(run_dir, f"partial outputs completed by attempt={attempt}")
+            if key and alog.truncated():
+                write_log(run_dir, "result not cached: output exceeded the in-memory log tail")
+            elif key:
+                result_cache.store(key, run_dir, run_id, before, out, err, _project_root())
+            break
+        if attempt > retries:
+            break
+        delay = backoff_s(attempt)
+        if not deadline.allows(delay):
+            write_log(run_dir, f"no retry: backoff {delay:.2f}s would exceed the deadline {deadline.describe()}")
+            break
+        write_log(run_dir, f"retry in {delay:.2f}s {deadline.describe()}")
+        await asyncio.sleep(delay)
+    return last_rc
@@ -0,0 +1,343 @@
+"""Concurrent candidate execution: parallel cascade and hedged runs.
+
+`run_parallel_cascade` launches the top-N candidate agents at once, each into
+its own candidate run (run_id "{run_id}/candidates/{agent_id}", i.e.
+runs/{run_id}/candidates/{agent_id}/ with its own logs.txt and specs). Each
+finished candidate is checked with runner.evaluate_success; the first one that
+passes is promoted into runs/{run_id}/ and the others are cancelled (their
+process groups killed by async_runner). Wall time is that of the fastest good
+agent instead of the sum of the failing ones.
+
+`run_hedged` starts only the best candidate. If it has not finished by a
+percentile of its historical wall time (run_history), the next candidate is
+started as a backup; a failed candidate also starts the next one right away.
+The first result that passes evaluation wins and the other is killed, which
+trims tail latency for a little extra compute.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from . import object_store, run_paths
+from .async_runner import execute_with_retry_async
+from .deadline import Deadline
+from .run_history import agent_stats, load_stats, record_attempt
+from .runner import _project_root, evaluate_success, persist_specs, write_log
+
+
+DEFAULT_PARALLEL = 3
+
+DEFAULT_HEDGE_PERCENTILE = 95
+HEDGE_PERCENTILES = (50, 90, 95, 99)
+# Agents with fewer recorded runs hedge at this fraction of the timeout
+MIN_HEDGE_RUNS = 3
+FALLBACK_HEDGE_FRACTION = 0.5
+FALLBACK_HEDGE_S = 30.0
+
+# Per-run bookkeeping that stays with the candidate instead of being promoted
+_RUN_META = {"logs.txt", "intent.yml", "agent.yml", "metrics.json", "partial.json"}
+
+
+def candidate_run_id(run_id: str, agent_id: str) -> str:
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", agent_id or "agent")
+    return f"{run_id}/candidates/{safe}"
+
+
+def promote(run_id: str, cand_run_id: str) -> List[str]:
+    """Move a candidate's outputs into runs/{run_id}/. Returns promoted names.
+
+    JSON artifacts that point at the candidate path are rewritten to the
+    canonical one (e.g. artifacts/deploy_info.json of demo agents).
+    """
+    root = _project_root()
+    run_dir = run_paths.run_dir(run_id, root)
+    cand_dir = run_paths.run_dir(cand_run_id, root)
+    moved: List[str] = []
+    for name in sorted(os.listdir(cand_dir)):
+        if name in _RUN_META:
+            continue
+        dst = os.path.join(run_dir, name)
+        if os.path.isdir(dst) and not os.path.islink(dst):
+            shutil.rmtree(dst)
+        os.replace(os.path.join(cand_dir, name), dst)
+        moved.append(name)
+    art_dir = os.path.join(run_dir, "artifacts")
+    if "artifacts" in moved and os.path.isdir(art_dir):
+        old, new = run_paths.run_rel(cand_run_id) + "/", run_paths.run_rel(run_id) + "/"
+        for name in os.listdir(art_dir):
+            p = os.path.join(art_dir, name)
+            if not name.endswith(".json") or not os.path.isfile(p):
+                continue
+            try:
+                with open(p, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            rebased = _rebase_paths(data, old, new)
+            if rebased != data:
+                # p may link a shared object (runs/.objects): replace it, never write in place
+                object_store.write_json(p, rebased, root)
+    return moved
+
+
+def _rebase_paths(obj: Any, old: str, new: str) -> Any:
+    """Copy of a JSON value with `old` replaced by `new` in every string value."""
+    if isinstance(obj, str):
+        return obj.replace(old, new)
+    if isinstance(obj, dict):
+        return {k: _rebase_paths(v, old, new) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_rebase_paths(v, old, new) for v in obj]
+    return obj
+
+
+async def _run_candidate(
+    intent_spec: Dict[str, Any],
+    intent_yaml_path: str,
+    user_request: str,
+    run_id: str,
+    agent_spec: Dict[str, Any],
+    timeout_s: Optional[int],
+    retries: int,
+    use_cache: Optional[bool] = None,
+    deadline: Optional[Deadline] = None,
+) -> Dict[str, Any]:
+    aid = str(agent_spec.get("agent_id") or "")
+    cand_id = candidate_run_id(run_id, aid)
+    cand_dir = run_paths.run_dir(cand_id)
+    os.makedirs(cand_dir, exist_ok=True)
+    persist_specs(cand_dir, intent_spec, agent_spec)
+    started = time.monotonic()
+    rc = await execute_with_retry_async(
+        intent_yaml_path, user_request, cand_id, cand_dir, timeout_s, retries, agent_spec, use_cache, deadline
+    )
+    ok_eval = False
+    if rc == 0:
+        ok_eval = evaluate_success(intent_spec, cand_id)
+        write_log(cand_dir, f"evaluator_success={ok_eval}")
+    wall = time.monotonic() - started
+    record_attempt(
+        str(intent_spec.get("intent_id") or ""), aid, rc, wall, ok_eval, timed_out=rc == 124, run_id=cand_id
+    )
+    return {"agent_id": aid, "agent_spec": agent_spec, "run_id": cand_id, "rc": rc, "ok": ok_eval, "wall_s": wall}
+
+
+def _unique(agent_specs: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    specs: List[Dict[str, Any]] = []
+    seen: set = set()
+    for spec in agent_specs:
+        aid = (spec or {}).get("agent_id")
+        if aid and aid not in seen:
+            seen.add(aid)
+            specs.append(spec)
+    return specs
+
+
+def _collect(t: "asyncio.Future[Dict[str, Any]]", spec: Dict[str, Any], run_id: str, run_dir: str) -> Dict[str, Any]:
+    # Result of a finished candidate task, logged to the canonical logs.txt
+    if t.exception() is not None:
+        aid = str(spec.get("agent_id") or "")
+        res = {
+            "agent_id": aid,
+            "agent_spec": spec,
+            "run_id": candidate_run_id(run_id, aid),
+            "rc": 1,
+            "ok": False,
+            "wall_s": 0.0,
+        }
+        write_log(run_dir, f"candidate={aid} error={t.exception()!r}")
+    else:
+        res = t.result()
+    write_log(
+        run_dir,
+        f"candidate={res['agent_id']} rc={res['rc']} evaluator_success={res['ok']} wall_s={res['wall_s']:.3f}",
+    )
+    return res
+
+
+async def _cancel(pending: set, tasks: Dict[Any, Dict[str, Any]], run_dir: str) -> None:
+    for t in pending:
+        t.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    for t in pending:
+        write_log(run_dir, f"candidate={tasks[t].get('agent_id')} cancelled")
+
+
+def _finish(
+    intent_spec: Dict[str, Any],
+    run_id: str,
+    run_dir: str,
+    winner: Optional[Dict[str, Any]],
+    results: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    if winner is not None:
+        moved = promote(run_id, winner["run_id"])
+        persist_specs(run_dir, intent_spec, winner["agent_spec"])
+        write_log(run_dir, f"promoted={winner['agent_id']} files={','.join(moved)}\nevaluator_success=True")
+        return {"rc": 0, "winner": winner["agent_spec"], "results": results}
+    rcs = [r["rc"] for r in results]
+    rc = next((c for c in reversed(rcs) if c != 0), 6 if rcs else 1)
+    return {"rc": rc, "winner": None, "results": results}
+
+
+async def run_parallel_cascade_async(
+    intent_spec: Dict[str, Any],
+    intent_yaml_path: str,
+    user_request: str,
+    run_id: str,
+    run_dir: str,
+    agent_specs: Sequence[Dict[str, Any]],
+    timeout_s: Optional[int] = None,
+    retries: int = 1,
+    parallel: int = DEFAULT_PARALLEL,
+    use_cache: Optional[bool] = None,
+    deadline: Optional[Deadline] = None,
+) -> Dict[str, Any]:
+    """Run the first `parallel` candidates concurrently; first passing one wins.
+
+    All candidates share the run `deadline`. Returns {"rc", "winner" (agent
+    spec or None), "results"}. rc is 0 when a candidate passed, 6 when some
+    exited 0 but none passed evaluation, else the last non-zero exit code.
+    """
+    specs = _unique(agent_specs)[: max(1, int(parallel))]
+    deadline = deadline or Deadline()
+    write_log(run_dir, f"launch candidates={','.join(str(s.get('agent_id')) for s in specs)} {deadline.describe()}")
+
+    def launch(spec: Dict[str, Any]) -> "asyncio.Future[Dict[str, Any]]":
+        return asyncio.ensure_future(
+            _run_candidate(
+                intent_spec, intent_yaml_path, user_request, run_id, spec, timeout_s, retries, use_cache, deadline
+            )
+        )
+
+    tasks = {launch(spec): spec for spec in specs}
+    results: List[Dict[str, Any]] = []
+    winner: Optional[Dict[str, Any]] = None
+    pending = set(tasks)
+    try:
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                res = _collect(t, tasks[t], run_id, run_dir)
+                results.append(res)
+                if winner is None and res["ok"]:
+                    winner = res
+    finally:
+        await _cancel(pending, tasks, run_dir)
+    return _finish(intent_spec, run_id, run_dir, winner, results)
+
+
+def run_parallel_cascade(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+    """Blocking wrapper around run_parallel_cascade_async."""
+    return asyncio.run(run_parallel_cascade_async(*args, **kwargs))
+
+
+def hedge_delay(
+    intent_id: str,
+    agent_id: str,
+    percentile: int = DEFAULT_HEDGE_PERCENTILE,
+    timeout_s: Optional[int] = None,
+    root: Optional[str] = None,
+) -> float:
+    """Seconds to wait on `agent_id` before starting a backup.
+
+    The agent's historical p{percentile} wall time; with too little history,
+    a fraction of the timeout (or FALLBACK_HEDGE_S without one).
+    """
+    if percentile not in HEDGE_PERCENTILES:
+        raise ValueError(f"hedge percentile must be one of {HEDGE_PERCENTILES}, got {percentile!r}")
+    s = agent_stats(load_stats(root), intent_id, agent_id)
+    if s and s["runs"] >= MIN_HEDGE_RUNS and s.get(f"p{percentile}_s"):
+        return float(s[f"p{percentile}_s"])
+    if timeout_s and timeout_s > 0:
+        return timeout_s * FALLBACK_HEDGE_FRACTION
+    return FALLBACK_HEDGE_S
+
+
+async def run_hedged_async(
+    intent_spec: Dict[str, Any],
+    intent_yaml_path: str,
+    user_request: str,
+    run_id: str,
+    run_dir: str,
+    agent_specs: Sequence[Dict[str, Any]],
+    timeout_s: Optional[int] = None,
+    retries: int = 1,
+    percentile: int = DEFAULT_HEDGE_PERCENTILE,
+    max_hedges: int = 1,
+    use_cache: Optional[bool] = None,
+    deadline: Optional[Deadline] = None,
+) -> Dict[str, Any]:
+    """Run the best candidate, hedging with the next one when it runs long.
+
+    At most 1 + max_hedges candidates are started, none after the run
+    `deadline` is spent. Returns the same shape as run_parallel_cascade_async.
+    """
+    specs = _unique(agent_specs)[: 1 + max(0, int(max_hedges))]
+    deadline = deadline or Deadline()
+    intent_id = str(intent_spec.get("intent_id") or "")
+    queue = list(specs)
+    tasks: Dict[Any, Dict[str, Any]] = {}
+    pending: set = set()
+    results: List[Dict[str, Any]] = []
+    winner: Optional[Dict[str, Any]] = None
+    loop = asyncio.get_running_loop()
+    hedge_at: Optional[float] = None
+
+    def launch(reason: str) -> None:
+        nonlocal hedge_at
+        if deadline.expired():
+            write_log(run_dir, f"no launch: deadline exhausted reason={reason} {deadline.describe()}")
+            queue.clear()
+            hedge_at = None
+            return
+        spec = queue.pop(0)
+        t = asyncio.ensure_future(
+            _run_candidate(
+                intent_spec, intent_yaml_path, user_request, run_id, spec, timeout_s, retries, use_cache, deadline
+            )
+        )
+        tasks[t] = spec
+        pending.add(t)
+        aid = str(spec.get("agent_id") or "")
+        delay = hedge_delay(intent_id, aid, percentile, timeout_s)
+        hedge_at = loop.time() + delay if queue else None
+        write_log(run_dir, f"launch candidate={aid} reason={reason} hedge_after_s={delay:.3f} {deadline.describe()}")
+
+    try:
+        if queue:
+            launch("primary")
+        while pending and winner is None:
+            wait_s = max(0.0, hedge_at - loop.time()) if hedge_at is not None else None
+            done, pending_now = await asyncio.wait(pending, timeout=wait_s, return_when=asyncio.FIRST_COMPLETED)
+            pending.clear()
+            pending.update(pending_now)
+            for t in done:
+                res = _collect(t, tasks[t], run_id, run_dir)
+                results.append(res)
+                if winner is None and res["ok"]:
+                    winner = res
+            if winner is not None or not queue:
+                continue
+            if not done:
+                launch(f"p{percentile}_exceeded")
+            elif not pending:
+                launch("failed")
+    finally:
+        await _cancel(pending, tasks, run_dir)
+    if not results and deadline.expired():
+        return {"rc": 124, "winner": None, "results": results}
+    return _finish(intent_spec, run_id, run_dir, winner, results)
+
+
+def run_hedged(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+    """Blocking wrapper around run_hedged_async."""
+    return asyncio.run(run_hedged_async(*args, **kwargs))
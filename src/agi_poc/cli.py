@@ -4,6 +4,7 @@ from __future__ import annotations
 import argparse
 import os
 import sys
+import time
 
 from .intent import detect_intent
 from .registry import yaml_registry, agent_registry
@@ -14,6 +15,7 @@ from .schemas import (
     normalize_agent_yaml,
 )
 from .approval import needs_approval, ask_approval
+from . import run_index, run_paths
 from .runner import prepare_run_dir, persist_specs, run_agent, summarize_plan
 
 
@@ -24,18 +26,161 @@ def _project_root() -> str:
     return project_root(os.path.dirname(__file__))
 
 
+def _registry_main(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    if args.registry_cmd == "compile":
+        from .registry import snapshot
+        from .registry.live_registry import default_registry
+
+        added = default_registry(_project_root()).sync_index()
+        if added:
+            print(f"Agent index: registered {added} directory-only agent(s)")
+        path, counts = snapshot.compile_snapshot(_project_root())
+        print(f"Snapshot: {os.path.relpath(path, _project_root())} (agents={counts['agents']} intents={counts['intents']})")
+        return 0
+    parser.print_help()
+    return 1
+
+
+def _agents_main(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    if args.agents_cmd == "selftest":
+        from .registry import selftest
+        from .registry.live_registry import default_registry
+
+        agents = default_registry(_project_root()).agents()
+        if args.agent:
+            wanted = set(args.agent)
+            agents = [(p, spec) for p, spec in agents if spec.get("agent_id") in wanted]
+        results = selftest.run_selftests(agents, jobs=args.jobs, timeout_s=args.timeout, force=args.force)
+        failed = 0
+        for aid in sorted(results):
+            res = results[aid]
+            wall = sum(r.get("wall_s", 0.0) for r in res.get("results") or [])
+            status = "ok" if res.get("ok") else "FAIL"
+            note = " (cached)" if res.get("cached") else ""
+            print(f"{status:4} {aid} {wall:.1f}s{note}")
+            if not res.get("ok"):
+                failed += 1
+                for r in res.get("results") or []:
+                    if r.get("rc") != 0:
+                        print(f"     $ {r.get('command')} -> rc={r.get('rc')} timeout={r.get('timeout')}")
+        print(f"Self-tests: {len(results) - failed} ok, {failed} failed")
+        return 1 if failed else 0
+    parser.print_help()
+    return 1
+
+
+def _runs_main(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    if args.runs_cmd == "gc":
+        from . import object_store
+
+        res = object_store.gc(_project_root())
+        print(f"Objects: removed={res['removed']} kept={res['kept']} freed={res['bytes']} bytes")
+        return 0
+    if args.runs_cmd == "reindex":
+        n = run_index.reindex(_project_root())
+        print(f"Backfilled {n} runs into {os.path.relpath(run_index.index_path(_project_root()), _project_root())}")
+        return 0
+    parser.print_help()
+    return 1
+
+
+def _route_main(args: argparse.Namespace) -> int:
+    from .routing import route_file
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as out:
+            counts = route_file(args.batch, out, strategy=args.strategy, scoring=args.scoring, generate=args.generate)
+    else:
+        counts = route_file(args.batch, sys.stdout, strategy=args.strategy, scoring=args.scoring, generate=args.generate)
+    summary = " ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+    print(f"Routed {sum(counts.values())} requests ({summary or 'none'})", file=sys.stderr)
+    return 0
+
+
 def main(argv: list[str] | None = None) -> int:
     ap = argparse.ArgumentParser(prog="agi-poc", description="AGI PoC CLI")
     sub = ap.add_subparsers(dest="cmd")
     runp = sub.add_parser("run", help="Run with a user request")
     runp.add_argument("request", help="User request text")
     runp.add_argument("--dry-run", action="store_true")
-    runp.add_argument("--timeout", type=int, default=60)
+    runp.add_argument("--timeout", type=int, default=60, help="Per-attempt timeout in seconds")
+    runp.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help=(
+            "Wall-clock budget in seconds for the whole run (all attempts, retries and candidates); "
+            "default: candidates x (retries+1) x --timeout plus retry backoff, 0 = none"
+        ),
+    )
     runp.add_argument("--budget", type=int, default=2000)
     runp.add_argument("--yes", action="store_true", help="Skip approval gate")
-    runp.add_argument("--strategy", choices=["simple", "ranked", "cascade"], default="simple", help="Agent routing strategy")
+    runp.add_argument(
+        "--strategy",
+        choices=["simple", "ranked", "cascade", "parallel-cascade", "hedged"],
+        default="simple",
+        help="Agent routing strategy",
+    )
+    runp.add_argument(
+        "--parallel",
+        type=int,
+        default=3,
+        help="parallel-cascade: number of top candidates launched at once",
+    )
+    runp.add_argument(
+        "--hedge-percentile",
+        type=int,
+        choices=[50, 90, 95, 99],
+        default=95,
+        help="hedged: start the next candidate once the best one exceeds this percentile of its past wall time",
+    )
+    runp.add_argument(
+        "--scoring",
+        choices=["capability", "history"],
+        default="capability",
+        help="Candidate ordering for ranked/cascade/parallel-cascade/hedged (history: expected time-to-success from past runs)",
+    )
+    cachep = runp.add_mutually_exclusive_group()
+    cachep.add_argument(
+        "--cache",
+        dest="cache",
+        action="store_true",
+        default=None,
+        help="Reuse a cached result for an identical intent/agent/request (default: AGI_POC_RESULT_CACHE)",
+    )
+    cachep.add_argument("--no-cache", dest="cache", action="store_false", help="Always execute the agent")
+    regp = sub.add_parser("registry", help="Registry maintenance")
+    regsub = regp.add_subparsers(dest="registry_cmd")
+    regsub.add_parser("compile", help="Index directory-only agents, then precompile registry/snapshot.json")
+    routep = sub.add_parser("route", help="Route requests in bulk without executing (JSONL plan)")
+    routep.add_argument("--batch", required=True, help="JSONL file of requests ('-' for stdin)")
+    routep.add_argument("--out", help="Write the JSONL plan here instead of stdout")
+    routep.add_argument(
+        "--strategy", choices=["simple", "ranked", "cascade", "parallel-cascade", "hedged"], default="simple"
+    )
+    routep.add_argument("--scoring", choices=["capability", "history"], default="capability")
+    routep.add_argument("--generate", action="store_true", help="Generate missing intent/agent YAMLs like 'run' does")
+    runsp = sub.add_parser("runs", help="runs/ maintenance")
+    runssub = runsp.add_subparsers(dest="runs_cmd")
+    runssub.add_parser("gc", help="Delete runs/.objects entries no run links to any more")
+    runssub.add_parser("reindex", help="Rebuild the runs/.index.sqlite run index from the run dirs")
+    agp = sub.add_parser("agents", help="Agent maintenance")
+    agsub = agp.add_subparsers(dest="agents_cmd")
+    stp = agsub.add_parser("selftest", help="Run self_test.smoke for all agents concurrently")
+    stp.add_argument("--jobs", type=int, default=None, help="Max concurrent agents (default: CPU count)")
+    stp.add_argument("--timeout", type=int, default=60, help="Per-command timeout in seconds")
+    stp.add_argument("--agent", action="append", help="Only test this agent_id (repeatable)")
+    stp.add_argument("--force", action="store_true", help="Re-run even if a result is cached for the current spec")
 
     args = ap.parse_args(argv)
+    if args.cmd == "registry":
+        return _registry_main(args, regp)
+    if args.cmd == "route":
+        return _route_main(args)
+    if args.cmd == "agents":
+        return _agents_main(args, agp)
+    if args.cmd == "runs":
+        return _runs_main(args, runsp)
     if args.cmd != "run":
         ap.print_help()
         return 1
@@ -53,7 +198,7 @@ def main(argv: list[str] | None = None) -> int:
 
     # 3) Agent registry: candidates and selection
     reqs = intent_spec.get("agent_requirements") or []
-    candidates = agent_registry.list_candidates([*reqs, f"__intent_id__:{intent_id}"])
+    candidates = agent_registry.list_candidates([*reqs, f"__intent_id__:{intent_id}"], scoring=args.scoring)
     agent_path = None
     agent_spec = None
     if args.strategy == "simple":
@@ -84,6 +229,7 @@ def main(argv: list[str] | None = None) -> int:
     # 5) Runner
     run_id, run_dir = prepare_run_dir()
     persist_specs(run_dir, intent_spec, agent_spec)
+    run_index.update(run_id, intent=intent_id, agent=agent_spec.get("agent_id"), phase="planned")
 
     if args.dry_run:
         print(summarize_plan(intent_spec, agent_spec))
@@ -98,27 +244,62 @@ def main(argv: list[str] | None = None) -> int:
         eff_timeout = args.timeout
 
     # BudgetはPoC段階では記録のみ
-    with open(os.path.join(run_dir, "budget.txt"), "w", encoding="utf-8") as f:
-        f.write(str(args.budget))
+    from . import object_store
+
+    object_store.write_text(os.path.join(run_dir, "budget.txt"), str(args.budget))
 
     # Execute according to strategy
+    from .deadline import Deadline, default_budget
     from .runner import execute_with_retry, evaluate_success, write_log
+    from .run_history import record_attempt
+
+    run_started = time.monotonic()
+    retries = 1
+    if args.deadline is None:
+        # Finite, but large enough for every attempt, retry and candidate the
+        # strategy may run: a budget equal to --timeout let one timed-out
+        # attempt spend it and silently disabled retries and fall-through
+        n_cands = 1 if args.strategy in ("simple", "ranked") else max(1, len(candidates))
+        deadline = Deadline(default_budget(eff_timeout, retries, n_cands))
+    else:
+        deadline = Deadline(args.deadline)
+    budget = f"{deadline.budget_s:.1f}" if deadline.budget_s is not None else "unlimited"
+    write_log(run_dir, f"run deadline_s={budget} attempt_timeout_s={eff_timeout} retries={retries}")
 
     def attempt(agent_path_local: str | None, agent_spec_local: dict) -> int:
         # persist the chosen agent for traceability
         persist_specs(run_dir, intent_spec, agent_spec_local)
+        run_index.update(run_id, agent=agent_spec_local.get("agent_id"), phase="executing")
+        write_log(run_dir, f"step=execute agent={agent_spec_local.get('agent_id')} {deadline.describe()}")
+        started = time.monotonic()
         rc_local = execute_with_retry(
             intent_yaml_path=intent_path,
             user_request=args.request,
             run_id=run_id,
             run_dir=run_dir,
             timeout_s=eff_timeout,
-            retries=1,
+            retries=retries,
             agent_spec=agent_spec_local,
+            use_cache=args.cache,
+            deadline=deadline,
         )
+        ok_eval = False
         if rc_local == 0:
             ok_eval = evaluate_success(intent_spec, run_id)
             write_log(run_dir, f"evaluator_success={ok_eval}")
+        record_attempt(
+            intent_id,
+            str(agent_spec_local.get("agent_id") or ""),
+            rc_local,
+            time.monotonic() - started,
+            ok_eval,
+            timed_out=rc_local == 124,
+            run_id=run_id,
+        )
+        run_index.update(
+            run_id, phase="executed", ok=rc_local == 0 and ok_eval, duration_s=time.monotonic() - run_started
+        )
+        if rc_local == 0:
             return 0 if ok_eval else 6
         return rc_local
 
@@ -133,6 +314,39 @@ def main(argv: list[str] | None = None) -> int:
         if rc != 0:
             print("Agent execution failed (ranked)", file=sys.stderr)
             return rc
+    elif args.strategy in ("parallel-cascade", "hedged"):
+        from .cascade_runner import run_hedged, run_parallel_cascade
+
+        ordered = [normalize_agent_yaml(spec) for _pth, spec, _sc in candidates] or [agent_spec]
+        common = (intent_spec, intent_path, args.request, run_id, run_dir, ordered)
+        if args.strategy == "hedged":
+            res = run_hedged(
+                *common,
+                timeout_s=eff_timeout,
+                retries=retries,
+                percentile=args.hedge_percentile,
+                use_cache=args.cache,
+                deadline=deadline,
+            )
+        else:
+            res = run_parallel_cascade(
+                *common,
+                timeout_s=eff_timeout,
+                retries=retries,
+                parallel=args.parallel,
+                use_cache=args.cache,
+                deadline=deadline,
+            )
+        run_index.update(
+            run_id,
+            agent=(res["winner"] or {}).get("agent_id"),
+            phase="executed",
+            ok=res["rc"] == 0,
+            duration_s=time.monotonic() - run_started,
+        )
+        if res["rc"] != 0:
+            print(f"Agent execution failed ({args.strategy})", file=sys.stderr)
+            return res["rc"]
     else:  # cascade
         tried = 0
         last_rc = 1
@@ -145,6 +359,11 @@ def main(argv: list[str] | None = None) -> int:
         else:
             ordered.append(agent_spec)
         for spec in ordered:
+            if deadline.expired():
+                write_log(run_dir, f"deadline exhausted: skipping {len(ordered) - tried} remaining candidate(s)")
+                if tried == 0:
+                    last_rc = 124
+                break
             tried += 1
             last_rc = attempt(None, spec)
             if last_rc == 0:
@@ -154,6 +373,7 @@ def main(argv: list[str] | None = None) -> int:
             return last_rc
 
     print(f"Run ID: {run_id}")
+    print(f"Run dir: {run_paths.run_rel(run_id)}")
     return 0
 
 
@@ -0,0 +1,74 @@
+"""Run-level wall-clock deadline.
+
+One `Deadline` is created per run (cli.main, langstack_runner.run_manifest)
+and handed down to execute_with_retry / the cascade runners. Every attempt
+gets min(per-attempt timeout, remaining budget), retries back off with
+jitter, and once the budget is spent no further attempt or candidate is
+started, so `--deadline` bounds the whole run however many agents and
+retries it goes through.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from typing import Optional
+
+
+BACKOFF_BASE_S = 0.5
+BACKOFF_CAP_S = 8.0
+# Less than this left counts as spent: not worth starting an agent for
+MIN_ATTEMPT_S = 0.1
+
+
+def default_budget(timeout_s: float, retries: int, candidates: int = 1) -> float:
+    """Run budget when none is given: every candidate may use all of its
+    attempts at the full per-attempt timeout, plus the capped backoff
+    between them."""
+    per_candidate = (max(0, retries) + 1) * float(timeout_s) + max(0, retries) * BACKOFF_CAP_S
+    return max(1, candidates) * per_candidate
+
+
+class Deadline:
+    """Wall-clock budget of a run; budget_s=None (or <= 0) means unlimited."""
+
+    def __init__(self, budget_s: Optional[float] = None) -> None:
+        self.budget_s = float(budget_s) if budget_s and budget_s > 0 else None
+        self.started = time.monotonic()
+        self.expires_at = self.started + self.budget_s if self.budget_s is not None else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), None when unlimited."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        rem = self.remaining()
+        return rem is not None and rem < MIN_ATTEMPT_S
+
+    def attempt_timeout(self, timeout_s: Optional[float]) -> Optional[float]:
+        """Timeout for the next attempt: min(timeout_s, remaining)."""
+        rem = self.remaining()
+        if rem is None:
+            return timeout_s if timeout_s and timeout_s > 0 else None
+        if timeout_s and timeout_s > 0:
+            return min(float(timeout_s), rem)
+        return rem
+
+    def allows(self, delay_s: float) -> bool:
+        """True if waiting `delay_s` still leaves time for an attempt."""
+        rem = self.remaining()
+        return rem is None or rem - delay_s >= MIN_ATTEMPT_S
+
+    def describe(self) -> str:
+        rem = self.remaining()
+        if rem is None:
+            return "deadline_remaining_s=unlimited"
+        return f"deadline_remaining_s={rem:.2f}"
+
+
+def backoff_s(attempt: int, base: float = BACKOFF_BASE_S, cap: float = BACKOFF_CAP_S) -> float:
+    """Delay before retry number `attempt` (1-based): exponential with equal jitter."""
+    step = min(cap, base * (2 ** max(0, attempt - 1)))
+    return step / 2 + random.uniform(0, step / 2)
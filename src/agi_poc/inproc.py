@@ -0,0 +1,178 @@
+"""In-process execution for `entry.type: python` agents.
+
+An agent entry like
+
+    entry:
+      type: python
+      target: "bin/agent_cli:main"     # or "package.module:function"
+      args: ["--yaml", "{yaml}", ...]
+
+is called as `function(rendered_args)` in a worker thread instead of a
+subprocess. stdout/stderr written by the target are captured per thread
+(sys.stdout/sys.stderr are replaced once by proxies that route writes to
+the calling thread's buffer), and a `SystemExit` or return value becomes the
+return code. On timeout the call is abandoned (threads cannot be killed) and
+reported as rc=124, so targets should be side-effect-light renderers that do
+not depend on the process cwd or sys.argv. Per-call environment variables
+(e.g. AGI_POC_PARTIAL) are not put into os.environ, which the threads share;
+targets read them with `getenv()`.
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.machinery
+import importlib.util
+import io
+import os
+import sys
+import threading
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import metrics
+
+
+_scripts: Dict[str, Tuple[int, Any]] = {}
+_scripts_lock = threading.Lock()
+
+
+def load_script(path: str, cache: Optional[Dict[str, Tuple[int, Any]]] = None) -> Any:
+    """Load a bin/ script as a module (not __main__), reloaded when its mtime changes."""
+    cache = _scripts if cache is None else cache
+    mtime = os.stat(path).st_mtime_ns
+    hit = cache.get(path)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    name = "_agi_script_" + os.path.basename(path).replace(".", "_").replace("-", "_")
+    loader = importlib.machinery.SourceFileLoader(name, path)
+    spec = importlib.util.spec_from_loader(name, loader)
+    mod = importlib.util.module_from_spec(spec)
+    loader.exec_module(mod)
+    cache[path] = (mtime, mod)
+    return mod
+
+
+def resolve_target(target: str, root: str) -> Callable[..., Any]:
+    """'pkg.mod:func' -> imported function; 'bin/agent_cli:main' -> function from that file."""
+    mod_name, sep, func_name = (target or "").rpartition(":")
+    if not sep or not mod_name or not func_name:
+        raise ValueError(f"python entry target must be 'module:function', got {target!r}")
+    if "/" in mod_name or os.sep in mod_name or mod_name.endswith(".py"):
+        path = mod_name if os.path.isabs(mod_name) else os.path.join(root, mod_name)
+        with _scripts_lock:
+            mod = load_script(path)
+    else:
+        mod = importlib.import_module(mod_name)
+    fn = getattr(mod, func_name, None)
+    if not callable(fn):
+        raise ValueError(f"{target!r} is not callable")
+    return fn
+
+
+class _ThreadLocalStream(io.TextIOBase):
+    # Routes writes to the current thread's capture buffer, else the original stream
+    def __init__(self, fallback, local: threading.local, attr: str):
+        self._fallback = fallback
+        self._local = local
+        self._attr = attr
+
+    def _target(self):
+        return getattr(self._local, self._attr, None) or self._fallback
+
+    def write(self, s: str) -> int:
+        return self._target().write(s)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return self._target().isatty()
+
+    def fileno(self) -> int:
+        return self._fallback.fileno()
+
+    @property
+    def encoding(self):  # type: ignore[override]
+        return getattr(self._fallback, "encoding", "utf-8")
+
+
+_local = threading.local()
+_install_lock = threading.Lock()
+_installed = False
+
+
+def getenv(name: str, default: Optional[str] = None) -> Optional[str]:
+    """os.environ lookup that sees the `env` of the in-process call running in this thread."""
+    env = getattr(_local, "env", None)
+    if env and name in env:
+        return env[name]
+    return os.environ.get(name, default)
+
+
+def _install_capture() -> None:
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        sys.stdout = _ThreadLocalStream(sys.stdout, _local, "out")
+        sys.stderr = _ThreadLocalStream(sys.stderr, _local, "err")
+        _installed = True
+
+
+def _exit_code(code: Any, err: io.StringIO) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, bool):
+        return 0 if code else 1
+    if isinstance(code, int):
+        return code
+    err.write(f"{code}\n")
+    return 1
+
+
+def run_python_entry(
+    target: str,
+    argv: List[str],
+    root: str,
+    timeout_s: Optional[float] = None,
+    usage: Optional[Dict[str, Any]] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> Tuple[int, str, str, bool]:
+    """Call `target(argv)` in a thread. Returns (rc, stdout, stderr, timed_out).
+
+    `usage`, if given, receives the thread's rusage record (metrics.delta)
+    once the call finishes. `env` holds extra variables for this call only
+    (see getenv()).
+    """
+    _install_capture()
+    out, err = io.StringIO(), io.StringIO()
+    result: Dict[str, int] = {}
+
+    def call() -> None:
+        _local.out, _local.err = out, err
+        _local.env = dict(env or {})
+        before = metrics.thread_rusage()
+        try:
+            try:
+                fn = resolve_target(target, root)
+                result["rc"] = _exit_code(fn(list(argv)), err)
+            except SystemExit as e:
+                result["rc"] = _exit_code(e.code, err)
+            except BaseException:
+                traceback.print_exc(file=err)
+                result["rc"] = 1
+        finally:
+            _local.out = _local.err = _local.env = None
+            if usage is not None and before is not None:
+                usage.update(metrics.delta(before, metrics.thread_rusage(), "thread"))
+
+    t = threading.Thread(target=call, name=f"agent:{target}", daemon=True)
+    t.start()
+    t.join(timeout_s if timeout_s and timeout_s > 0 else None)
+    if t.is_alive():
+        return 124, out.getvalue(), err.getvalue(), True
+    return result.get("rc", 1), out.getvalue(), err.getvalue(), False
@@ -1,18 +1,34 @@
 from __future__ import annotations
 
+from typing import List, Sequence
+
+from .intent_matcher import default_matcher
+from .intent_ngram import default_index
+
 
 def detect_intent(user_text: str) -> str:
     """Very simple intent detection.
 
+    - Demo cues (デモ, モック, ui, ...) return "create_demo_app".
     - If text hints at spec creation, return "create_spec_document" to match existing intent.
-    - Else return a generic intent id.
+    - Else the intent whose declared `keywords` match most.
+    - Else the n-gram TF-IDF index's best intent if it is confident enough,
+      or a generic intent id.
+
+    Cues and keywords are matched in one pass by the compiled intent matcher.
     """
-    text = (user_text or "").lower()
-    # Demo-oriented cues
-    demo_cues = ["デモ", "プロトタイプ", "モック", "mock", "prototype", "ui", "画面", "試作"]
-    if any(c in user_text for c in demo_cues):
-        return "create_demo_app"
-    cues = ["仕様", "spec", "要件", "要約のための仕様", "設計"]
-    if any(c in user_text for c in cues) or "create spec" in text:
-        return "create_spec_document"
-    return "generic_task"
+    return detect_intents([user_text])[0]
+
+
+def detect_intents(texts: Sequence[str]) -> List[str]:
+    """Batch detect_intent: matcher and n-gram index are built once and the
+    n-gram fallback scores all unmatched texts in one call."""
+    matcher = default_matcher()
+    out = [matcher.detect(t or "") for t in texts]
+    pending = [i for i, iid in enumerate(out) if iid == "generic_task"]
+    if pending:
+        best = default_index().best_many([texts[i] or "" for i in pending])
+        for i, (iid, _score) in zip(pending, best):
+            if iid:
+                out[i] = iid
+    return out
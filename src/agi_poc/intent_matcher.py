@@ -0,0 +1,199 @@
+"""Compiled multi-pattern intent matcher.
+
+All intent cues are compiled into Aho-Corasick automata so a request is
+scanned once (plus once lowercased for case-insensitive patterns) and every
+hit is known afterwards:
+
+- the built-in cue lists used by `detect_intent` and bin/agi,
+- `keywords:` declared in intents/*.yml (case-insensitive),
+- the description/steps/intent_id tokens bin/agi scores intents with.
+
+`default_matcher()` builds the matcher from the live registry and caches it
+per registry version, so it is rebuilt only when an intent file changes.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .util import project_root
+
+
+# Built-in cue groups (case-sensitive on the raw text unless noted)
+DEMO_CUES = ["デモ", "プロトタイプ", "モック", "mock", "prototype", "ui", "画面", "試作"]
+SPEC_CUES = ["仕様", "spec", "要件", "要約のための仕様", "設計"]
+SPEC_CUES_FOLDED = ["create spec"]  # matched against the lowercased text
+AGI_DEMO_PREF_CUES = ["デモ", "モック", "prototype", "プロトタイプ", "UI", "画面", "仕様", "spec"]
+
+
+def _project_root() -> str:
+    return project_root(os.path.dirname(__file__))
+
+
+class Automaton:
+    """Aho-Corasick automaton over a fixed pattern list.
+
+    `scan(text)` returns the indices of all patterns occurring in `text`.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for idx, pat in enumerate(patterns):
+            node = 0
+            for ch in pat:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(idx)
+        # BFS for failure links; merge outputs along them
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text: str) -> Set[int]:
+        hits: Set[int] = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                hits.update(out[node])
+        return hits
+
+
+class _PatternSet:
+    # Deduplicated patterns for one automaton plus pattern -> groups mapping
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.groups: List[List[str]] = []
+
+    def add(self, pattern: str, group: str) -> None:
+        if not pattern:
+            return
+        idx = self.ids.get(pattern)
+        if idx is None:
+            idx = len(self.groups)
+            self.ids[pattern] = idx
+            self.groups.append([])
+        if group not in self.groups[idx]:
+            self.groups[idx].append(group)
+
+    def compile(self) -> Optional[Automaton]:
+        return Automaton(list(self.ids)) if self.ids else None
+
+
+def _intent_tokens(spec: Dict[str, Any]) -> Set[str]:
+    # Same tokenization as the original bin/agi score_intent
+    text = (spec.get("description") or "") + " " + " ".join(spec.get("steps") or [])
+    text += " " + (spec.get("intent_id") or "")
+    return set(t for t in (w.strip() for w in text.replace("\n", " ").split(" ")) if t)
+
+
+def _keywords(spec: Dict[str, Any]) -> List[str]:
+    kws = spec.get("keywords") or []
+    if isinstance(kws, str):
+        kws = [kws]
+    return [k.lower() for k in kws if isinstance(k, str) and k.strip()] if isinstance(kws, list) else []
+
+
+class IntentMatcher:
+    def __init__(self, intents: Iterable[Tuple[str, Dict[str, Any]]]):
+        """`intents` is [(path, spec)] in the order ties should resolve."""
+        self.intents: List[Tuple[str, Dict[str, Any]]] = list(intents)
+        raw, folded = _PatternSet(), _PatternSet()
+        for c in DEMO_CUES:
+            raw.add(c, "cue:demo")
+        for c in SPEC_CUES:
+            raw.add(c, "cue:spec")
+        for c in SPEC_CUES_FOLDED:
+            folded.add(c, "cue:spec")
+        for c in AGI_DEMO_PREF_CUES:
+            raw.add(c, "cue:agi_demo_pref")
+        self._token_counts: List[int] = []
+        self._intent_ids: List[str] = []
+        for i, (_path, spec) in enumerate(self.intents):
+            tokens = _intent_tokens(spec)
+            self._token_counts.append(len(tokens))
+            for t in tokens:
+                raw.add(t, f"tok:{i}")
+            self._intent_ids.append(str(spec.get("intent_id") or ""))
+            for k in _keywords(spec):
+                folded.add(k, f"kw:{i}")
+        self._raw, self._folded = raw, folded
+        self._raw_ac = raw.compile()
+        self._folded_ac = folded.compile()
+
+    def scan(self, text: str) -> Dict[str, Set[str]]:
+        """{group: matched patterns} for one request text."""
+        text = text or ""
+        out: Dict[str, Set[str]] = {}
+        for pset, ac, subject in ((self._raw, self._raw_ac, text), (self._folded, self._folded_ac, text.lower())):
+            if ac is None:
+                continue
+            for idx in ac.scan(subject):
+                pat = ac.patterns[idx]
+                for group in pset.groups[idx]:
+                    out.setdefault(group, set()).add(pat)
+        return out
+
+    def has_cue(self, text: str, group: str) -> bool:
+        return bool(self.scan(text).get(f"cue:{group}"))
+
+    def detect(self, text: str, hits: Optional[Dict[str, Set[str]]] = None) -> str:
+        """detect_intent semantics: demo cues, then spec cues, then declared keywords."""
+        hits = self.scan(text) if hits is None else hits
+        if hits.get("cue:demo"):
+            return "create_demo_app"
+        if hits.get("cue:spec"):
+            return "create_spec_document"
+        best, best_n = None, 0
+        for i, iid in enumerate(self._intent_ids):
+            n = len(hits.get(f"kw:{i}") or ())
+            if n > best_n and iid:
+                best, best_n = iid, n
+        return best or "generic_task"
+
+    def score_intents(self, text: str, hits: Optional[Dict[str, Set[str]]] = None) -> List[Tuple[str, Dict[str, Any], float]]:
+        """[(path, spec, score)] with bin/agi's token score: hits / distinct tokens."""
+        hits = self.scan(text) if hits is None else hits
+        out = []
+        for i, (path, spec) in enumerate(self.intents):
+            n = self._token_counts[i]
+            score = len(hits.get(f"tok:{i}") or ()) / n if n else 0.0
+            out.append((path, spec, score))
+        return out
+
+
+def _intent_order(item: Tuple[str, Dict[str, Any]]) -> Tuple[bool, str]:
+    # *.yml sorted, then *.yaml sorted (bin/agi's find_intents order)
+    name = os.path.basename(item[0])
+    return (not name.endswith(".yml"), name)
+
+
+def default_matcher(root: Optional[str] = None) -> IntentMatcher:
+    """Matcher over intents/*, rebuilt only when the registry version changes."""
+    from .registry.live_registry import default_registry
+
+    reg = default_registry(root or _project_root())
+    intents = reg.intents()
+    return reg.cached(("intent_matcher",), lambda: IntentMatcher(sorted(intents, key=_intent_order)))
@@ -0,0 +1,187 @@
+"""Character n-gram TF-IDF index over intents (offline, no model download).
+
+Japanese requests have no word boundaries, so intents are represented by
+character 2/3-grams of their description, steps, success_criteria, keywords
+and intent_id, weighted with sublinear TF and smoothed IDF and L2-normalized.
+A request is vectorized the same way and scored against all intents at once:
+with NumPy as one (batch x vocab) @ (vocab x intents) product, otherwise via
+per-n-gram posting lists in pure Python.
+
+Query n-grams unknown to the index still count towards the query norm (at
+the maximum IDF), so a request sharing only a couple of n-grams with an
+intent gets a low score instead of a spuriously confident one.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+from .util import project_root
+
+
+NGRAM_SIZES = (2, 3)
+# Cosine scores are small for short requests; below this the index abstains
+CONFIDENCE_THRESHOLD = 0.08
+BATCH_ROWS = 1024
+
+_WS = re.compile(r"\s+")
+
+
+def _project_root() -> str:
+    return project_root(os.path.dirname(__file__))
+
+
+def normalize(text: str) -> str:
+    # NFKC folds full/half-width variants; underscores split intent ids
+    text = unicodedata.normalize("NFKC", text or "").lower().replace("_", " ")
+    return _WS.sub(" ", text).strip()
+
+
+def ngrams(text: str, sizes: Sequence[int] = NGRAM_SIZES) -> Counter:
+    t = normalize(text)
+    out: Counter = Counter()
+    for n in sizes:
+        out.update(t[i : i + n] for i in range(len(t) - n + 1))
+    return out
+
+
+def _strings(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [v for v in value if isinstance(v, str)]
+    return []
+
+
+def intent_document(spec: Dict[str, Any]) -> str:
+    parts: List[str] = []
+    for field in ("description", "steps", "success_criteria", "keywords", "intent_id"):
+        parts.extend(_strings(spec.get(field)))
+    return "\n".join(parts)
+
+
+class NgramIntentIndex:
+    def __init__(self, intents: Iterable[Tuple[str, Dict[str, Any]]]):
+        """`intents` is [(path, spec)]; intents without an intent_id are skipped."""
+        docs: List[Counter] = []
+        self.intent_ids: List[str] = []
+        for _path, spec in intents:
+            iid = spec.get("intent_id") if isinstance(spec, dict) else None
+            if not isinstance(iid, str) or not iid or iid in self.intent_ids:
+                continue
+            self.intent_ids.append(iid)
+            docs.append(ngrams(intent_document(spec)))
+
+        n_docs = len(docs)
+        df: Counter = Counter()
+        for d in docs:
+            df.update(d.keys())
+        self.vocab: Dict[str, int] = {g: i for i, g in enumerate(sorted(df))}
+        self.idf: List[float] = [0.0] * len(self.vocab)
+        for g, col in self.vocab.items():
+            self.idf[col] = math.log((1 + n_docs) / (1 + df[g])) + 1.0
+        self.max_idf = math.log(1 + n_docs) + 1.0
+
+        # posting lists: col -> [(intent_pos, weight)]
+        self.postings: List[List[Tuple[int, float]]] = [[] for _ in self.vocab]
+        for pos, d in enumerate(docs):
+            weights = {self.vocab[g]: (1.0 + math.log(tf)) * self.idf[self.vocab[g]] for g, tf in d.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for col, w in weights.items():
+                self.postings[col].append((pos, w / norm))
+
+        self._matrix = None
+        if np is not None and self.vocab and self.intent_ids:
+            m = np.zeros((len(self.vocab), len(self.intent_ids)), dtype=np.float32)
+            for col, plist in enumerate(self.postings):
+                for pos, w in plist:
+                    m[col, pos] = w
+            self._matrix = m
+
+    def _query(self, text: str) -> Tuple[List[int], List[float]]:
+        # (known columns, L2-normalized weights); unknown grams only add to the norm
+        cols: List[int] = []
+        vals: List[float] = []
+        sq = 0.0
+        vocab, idf, max_idf, log = self.vocab, self.idf, self.max_idf, math.log
+        for g, tf in ngrams(text).items():
+            col = vocab.get(g)
+            w = (1.0 + log(tf)) if tf > 1 else 1.0
+            if col is None:
+                w *= max_idf
+            else:
+                w *= idf[col]
+                cols.append(col)
+                vals.append(w)
+            sq += w * w
+        norm = math.sqrt(sq) or 1.0
+        return cols, [v / norm for v in vals]
+
+    def score_many(self, texts: Sequence[str]) -> List[List[float]]:
+        """Cosine similarity of each text against every intent (rows follow `texts`)."""
+        n_int = len(self.intent_ids)
+        if not texts:
+            return []
+        if not n_int:
+            return [[] for _ in texts]
+        memo: Dict[str, Tuple[List[int], List[float]]] = {}
+        queries = []
+        for t in texts:
+            q = memo.get(t)
+            if q is None:
+                q = memo[t] = self._query(t)
+            queries.append(q)
+        out: List[List[float]] = []
+        if self._matrix is not None:
+            # Dense query blocks keep memory bounded for large batches/vocabularies
+            for start in range(0, len(queries), BATCH_ROWS):
+                block = queries[start : start + BATCH_ROWS]
+                q = np.zeros((len(block), len(self.vocab)), dtype=np.float32)
+                rows = [i for i, (cols, _v) in enumerate(block) for _ in cols]
+                if rows:
+                    q[np.asarray(rows), np.asarray([c for cols, _v in block for c in cols])] = np.asarray(
+                        [v for _c, vals in block for v in vals], dtype=np.float32
+                    )
+                out.extend((q @ self._matrix).tolist())
+            return out
+        for cols, vals in queries:
+            scores = [0.0] * n_int
+            for col, v in zip(cols, vals):
+                for pos, w in self.postings[col]:
+                    scores[pos] += v * w
+            out.append(scores)
+        return out
+
+    def best_many(self, texts: Sequence[str], threshold: float = CONFIDENCE_THRESHOLD) -> List[Tuple[Optional[str], float]]:
+        """[(intent_id or None, score)]: None when the best score is below `threshold`."""
+        out: List[Tuple[Optional[str], float]] = []
+        for scores in self.score_many(texts):
+            if not scores:
+                out.append((None, 0.0))
+                continue
+            pos = max(range(len(scores)), key=scores.__getitem__)
+            sc = float(scores[pos])
+            out.append((self.intent_ids[pos] if sc >= threshold else None, sc))
+        return out
+
+    def best(self, text: str, threshold: float = CONFIDENCE_THRESHOLD) -> Tuple[Optional[str], float]:
+        return self.best_many([text], threshold)[0]
+
+
+def default_index(root: Optional[str] = None) -> NgramIntentIndex:
+    """Index over intents/*, rebuilt only when the registry version changes."""
+    from .registry.live_registry import default_registry
+
+    reg = default_registry(root or _project_root())
+    intents = reg.intents()
+    return reg.cached(("intent_ngram",), lambda: NgramIntentIndex(intents))
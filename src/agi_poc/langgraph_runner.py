@@ -17,9 +17,10 @@ Notes:
 
 import argparse
 import os
-from datetime import datetime
+import time
 from typing import Any, Dict, Literal, TypedDict
 
+from . import markdown_index, object_store, run_index, run_paths
 from .util import project_root
 from .intent import detect_intent
 from .registry import yaml_registry, agent_registry
@@ -44,7 +45,7 @@ def _project_root() -> str:
 def _write_run_log(run_id: str, lines: list[str]) -> None:
     """Append workflow log lines to runs/{run_id}/langstack.txt."""
     root = _project_root()
-    path = os.path.join(root, "runs", run_id, "langstack.txt")
+    path = os.path.join(run_paths.run_dir(run_id, root), "langstack.txt")
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "a", encoding="utf-8") as f:
         for ln in lines:
@@ -57,22 +58,18 @@ def _write_run_log(run_id: str, lines: list[str]) -> None:
 
 def _artifact_dir(run_id: str) -> str:
     root = _project_root()
-    path = os.path.join(root, "runs", run_id, "artifacts")
+    path = os.path.join(run_paths.run_dir(run_id, root), "artifacts")
     os.makedirs(path, exist_ok=True)
     return path
 
 
 def _write_text(path: str, content: str) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content or "")
+    # runs/ outputs are stored once in runs/.objects and hardlinked here
+    object_store.write_text(path, content or "")
 
 
 def _write_json(path: str, obj: dict) -> None:
-    import json
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    object_store.write_json(path, obj)
 
 
 class MVPSystemState(TypedDict, total=False):
@@ -191,7 +188,7 @@ def planning_orchestrator_node(state: MVPSystemState) -> MVPSystemState:
 
 def execution_orchestrator_node(state: MVPSystemState) -> MVPSystemState:
     simulate = state.get("_simulate") is True
-    run_id = state.get("run_id") or datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_id = state.get("run_id") or run_paths.new_run_id()
     state["run_id"] = run_id
 
     if simulate:
@@ -247,33 +244,23 @@ def execution_orchestrator_node(state: MVPSystemState) -> MVPSystemState:
         )
 
         # Prepare run directory
-        run_root = os.path.join(_project_root(), "runs", run_id)
+        run_root = run_paths.run_dir(run_id)
         os.makedirs(run_root, exist_ok=True)
 
         # Helpers
         def _quick_validate_spec_markdown(text: str) -> bool:
+            # Same section index as runner.evaluate_success, lighter rules
             try:
                 if not isinstance(text, str) or len(text) < 200:
                     return False
-                required_sections = [
-                    "目的",
-                    "非目標",
-                    "機能一覧",
-                    "ユースケース",
-                    "画面要件",
-                    "API 仕様",
-                    "データモデル",
-                    "受入条件",
-                ]
-                for s in required_sections:
-                    if (f"## {s}" not in text) and (f"### {s}" not in text):
-                        return False
-                if "## API 仕様" in text and ("| Method |" not in text or "| Path |" not in text):
+                md = markdown_index.parse(text)
+                if md.missing_sections():
                     return False
-                # Rough minimum for use cases
-                if text.count("### UC-") < 3:
+                api = md.section("API 仕様")
+                if api is not None and not api.has_table("Method", "Path"):
                     return False
-                return True
+                # Rough minimum for use cases
+                return len(md.uc_blocks()) >= 3
             except Exception:
                 return False
 
@@ -288,8 +275,7 @@ def execution_orchestrator_node(state: MVPSystemState) -> MVPSystemState:
                 name = getattr(ag, "role", "agent")
                 # Save candidate
                 cand_path = os.path.join(run_root, f"SPEC_{name}.md")
-                with open(cand_path, "w", encoding="utf-8") as f:
-                    f.write(result)
+                _write_text(cand_path, result)
                 ok = _quick_validate_spec_markdown(result)
                 candidates.append((name, result, ok))
                 state["langstack_log"].append(f"[Execution] CrewAI {name} ok={ok}")
@@ -302,8 +288,7 @@ def execution_orchestrator_node(state: MVPSystemState) -> MVPSystemState:
                 result = str(crew.kickoff())
                 name = getattr(ag, "role", "agent")
                 cand_path = os.path.join(run_root, f"SPEC_{name}.md")
-                with open(cand_path, "w", encoding="utf-8") as f:
-                    f.write(result)
+                _write_text(cand_path, result)
                 ok = _quick_validate_spec_markdown(result)
                 candidates.append((name, result, ok))
                 state["langstack_log"].append(f"[Execution] CrewAI {name} ok={ok}")
@@ -324,13 +309,11 @@ def execution_orchestrator_node(state: MVPSystemState) -> MVPSystemState:
         if outputs:
             first = outputs[0]
             if isinstance(first, dict) and first.get("path"):
-                out_rel = first["path"].replace("{run_id}", run_id)
+                out_rel = run_paths.render_path(first["path"], run_id)
         if not out_rel:
-            out_rel = os.path.join("runs", run_id, "SPEC.md")
+            out_rel = run_paths.run_rel(run_id) + "/SPEC.md"
         out_abs = os.path.join(_project_root(), out_rel)
-        os.makedirs(os.path.dirname(out_abs), exist_ok=True)
-        with open(out_abs, "w", encoding="utf-8") as f:
-            f.write(chosen[1] if chosen else "")
+        _write_text(out_abs, chosen[1] if chosen else "")
 
         state["spec_content"] = chosen[1] if chosen else ""
         # Produce downstream artifacts per role (sequential, simple handoff)
@@ -410,7 +393,7 @@ def execution_orchestrator_node(state: MVPSystemState) -> MVPSystemState:
         )
         # Best-effort artifact synthesis without LLM
         try:
-            spec_path = os.path.join(_project_root(), "runs", _run_id, "SPEC.md")
+            spec_path = os.path.join(run_paths.run_dir(_run_id), "SPEC.md")
             spec_text = ""
             if os.path.exists(spec_path):
                 with open(spec_path, "r", encoding="utf-8") as f:
@@ -530,12 +513,8 @@ def validation_orchestrator_node(state: MVPSystemState) -> MVPSystemState:
     )
     # Persist validation details alongside logs for UI consumption
     try:
-        import json
         rid = state.get("run_id") or run_id
-        path = os.path.join(_project_root(), "runs", rid, "validation.json")
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(state["validation_details"], f, ensure_ascii=False, indent=2)
+        _write_json(os.path.join(run_paths.run_dir(rid), "validation.json"), state["validation_details"])
     except Exception:
         pass
     # increment retry_count for routing guards
@@ -555,7 +534,7 @@ def review_node(state: MVPSystemState) -> MVPSystemState:
         state["langstack_log"].append("[Review] auto-approved (validation ok)")
         # Persist review note
         try:
-            _write_text(os.path.join(_project_root(), "runs", run_id, "review_comments.md"), state["reviewer_comments"])  # type: ignore[arg-type]
+            _write_text(os.path.join(run_paths.run_dir(run_id), "review_comments.md"), state["reviewer_comments"])  # type: ignore[arg-type]
         except Exception:
             pass
         return state
@@ -598,7 +577,7 @@ def review_node(state: MVPSystemState) -> MVPSystemState:
                 verbose=True,
             )
             # Read short context snippets
-            spec_path = os.path.join(_project_root(), "runs", run_id, "SPEC.md")
+            spec_path = os.path.join(run_paths.run_dir(run_id), "SPEC.md")
             spec_snip = ""
             if os.path.exists(spec_path):
                 with open(spec_path, "r", encoding="utf-8") as f:
@@ -621,7 +600,7 @@ def review_node(state: MVPSystemState) -> MVPSystemState:
     state["langstack_log"].append("[Review] changes requested with comments")
     # Persist review note
     try:
-        _write_text(os.path.join(_project_root(), "runs", run_id, "review_comments.md"), final_comment)
+        _write_text(os.path.join(run_paths.run_dir(run_id), "review_comments.md"), final_comment)
     except Exception:
         pass
     return state
@@ -716,19 +695,40 @@ def route_after_review(state: MVPSystemState) -> Literal["deploy", "execution"]:
 # =========================
 # Build and run
 # =========================
+def _indexed(node):
+    """Record the node's phase transition in the run index (runs/.index.sqlite)."""
+
+    def wrapper(state: MVPSystemState) -> MVPSystemState:
+        out = node(state)
+        st = out if isinstance(out, dict) else state
+        agents = st.get("selected_agents") or []
+        verdict = st.get("validation_result")
+        fields: Dict[str, Any] = {"phase": st.get("current_phase"), "intent": st.get("intent_id")}
+        if agents and isinstance(agents[0], dict):
+            fields["agent"] = agents[0].get("agent_id")
+        if verdict in ("approved", "changes_requested"):
+            fields["validation"] = verdict
+            fields["ok"] = verdict == "approved"
+        run_index.update(str(st.get("run_id") or ""), **fields)
+        return out
+
+    wrapper.__name__ = getattr(node, "__name__", "node")
+    return wrapper
+
+
 def build_mvp_workflow():
     StateGraph, END, _SqliteSaver = _safe_import_langgraph()
 
     workflow = StateGraph(MVPSystemState)
     # Nodes
-    workflow.add_node("intent", intent_orchestrator_node)
-    workflow.add_node("clarify", user_clarify_node)
-    workflow.add_node("yaml_autogen", yaml_autogen_node)
-    workflow.add_node("planning", planning_orchestrator_node)
-    workflow.add_node("execution", execution_orchestrator_node)
-    workflow.add_node("validation", validation_orchestrator_node)
-    workflow.add_node("review", review_node)
-    workflow.add_node("deploy", deploy_demo_node)
+    workflow.add_node("intent", _indexed(intent_orchestrator_node))
+    workflow.add_node("clarify", _indexed(user_clarify_node))
+    workflow.add_node("yaml_autogen", _indexed(yaml_autogen_node))
+    workflow.add_node("planning", _indexed(planning_orchestrator_node))
+    workflow.add_node("execution", _indexed(execution_orchestrator_node))
+    workflow.add_node("validation", _indexed(validation_orchestrator_node))
+    workflow.add_node("review", _indexed(review_node))
+    workflow.add_node("deploy", _indexed(deploy_demo_node))
 
     # Entry
     workflow.set_entry_point("intent")
@@ -762,18 +762,20 @@ def run_mvp_generation(
     workflow = build_mvp_workflow()
 
     # Optional checkpointer
+    rid = run_id or run_paths.new_run_id()
     checkpointer = None
     thread_cfg: Dict[str, Any] = {}
     if use_checkpoint and SqliteSaver is not None:
-        rid = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
-        db_path = os.path.join(_project_root(), "runs", rid, "checkpoint.db")
+        db_path = os.path.join(run_paths.run_dir(rid), "checkpoint.db")
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         checkpointer = SqliteSaver.from_conn_string(db_path)
         thread_cfg = {"configurable": {"thread_id": rid}}
 
     app = workflow.compile(checkpointer=checkpointer) if checkpointer else workflow.compile()
 
-    rid = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+    started = time.monotonic()
+    if not resume:
+        run_index.record(rid, created_at=time.time(), phase="start")
 
     if use_checkpoint and resume:
         # Resume from checkpoint; require a thread id
@@ -803,6 +805,7 @@ def run_mvp_generation(
         _write_run_log(rid_final, result.get("langstack_log") or [])
     except Exception:
         pass
+    run_index.update(str(result.get("run_id") or rid), duration_s=time.monotonic() - started)
     return result
 
 
@@ -828,7 +831,7 @@ def cli_main(argv: list[str] | None = None) -> int:
     print(f"Phase: {res.get('current_phase')}")
     print(f"Validation: {res.get('validation_result')}")
     print(f"Run ID: {res.get('run_id')}")
-    print(f"Log: runs/{res.get('run_id')}/langstack.txt")
+    print(f"Log: {run_paths.run_rel(str(res.get('run_id') or ''))}/langstack.txt")
     return 0
 
 
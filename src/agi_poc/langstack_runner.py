@@ -22,10 +22,11 @@ This runner writes a summary log into runs/{run_id}/langstack.txt.
 import argparse
 import os
 import sys
+import time
 from typing import Any, Dict, Tuple, List
 
 # Local minimal YAML loader
-from yaml_min import load as yaml_load
+from yaml_min import load_cached as yaml_load
 
 # Reuse PoC utilities
 from .util import project_root
@@ -45,6 +46,9 @@ from agi_poc.runner import (
     write_log,
 )
 from agi_poc.approval import needs_approval, ask_approval
+from agi_poc.deadline import Deadline, default_budget
+from agi_poc.run_history import record_attempt
+from agi_poc import run_index, run_paths
 
 
 def _project_root() -> str:
@@ -136,6 +140,7 @@ def _run_create_spec_document(user_request: str, yes: bool) -> Tuple[int, str]:
     # 4) Prepare run and execute
     run_id, run_dir = prepare_run_dir()
     persist_specs(run_dir, intent_spec, agent_spec)
+    run_index.update(run_id, intent=intent_id, agent=agent_spec.get("agent_id"), phase="executing")
 
     # Effective timeout: use intent or default 60
     timeout_s = intent_spec.get("timeout_s")
@@ -154,6 +159,7 @@ def _run_create_spec_document(user_request: str, yes: bool) -> Tuple[int, str]:
         ok_eval = evaluate_success(intent_spec, run_id)
         write_log(run_dir, f"evaluator_success={ok_eval}")
         rc = 0 if ok_eval else 6
+    run_index.update(run_id, phase="executed", ok=rc == 0)
     return rc, run_id
 
 
@@ -201,9 +207,12 @@ def _execute_once(
     run_id: str,
     run_dir: str,
     timeout_s: int,
+    deadline: Deadline | None = None,
 ) -> Tuple[int, bool]:
-    """Persist specs, execute and evaluate. Returns (rc, ok_eval)."""
+    """Persist specs, execute and evaluate within the run deadline. Returns (rc, ok_eval)."""
     persist_specs(run_dir, intent_spec, agent_spec)
+    run_index.update(run_id, agent=agent_spec.get("agent_id"), phase="executing")
+    started = time.monotonic()
     rc = execute_with_retry(
         intent_yaml_path=os.path.join(_project_root(), "intents", f"{intent_spec.get('intent_id')}.yml"),
         user_request=user_request,
@@ -212,15 +221,38 @@ def _execute_once(
         timeout_s=timeout_s,
         retries=1,
         agent_spec=agent_spec,
+        deadline=deadline,
     )
     ok_eval = False
     if rc == 0:
         ok_eval = evaluate_success(intent_spec, run_id)
         write_log(run_dir, f"evaluator_success={ok_eval}")
+    record_attempt(
+        str(intent_spec.get("intent_id") or ""),
+        str(agent_spec.get("agent_id") or ""),
+        rc,
+        time.monotonic() - started,
+        ok_eval,
+        timed_out=rc == 124,
+        run_id=run_id,
+    )
     return rc, ok_eval
 
 
-def run_manifest(manifest_path: str, user_request: str, yes: bool, simulate: bool) -> int:
+def run_manifest(
+    manifest_path: str,
+    user_request: str,
+    yes: bool,
+    simulate: bool,
+    strategy: str = "cascade",
+    parallel: int = 3,
+    hedge_percentile: int = 95,
+    deadline_s: float | None = None,
+) -> int:
+    """Walk the manifest and run the execution phase. `deadline_s` bounds the
+    wall time of all attempts and candidates (default None: room for every
+    candidate's attempts at the intent timeout, see deadline.default_budget;
+    0 = none)."""
     root = _project_root()
     mani = _load_manifest(os.path.join(root, manifest_path))
 
@@ -275,11 +307,14 @@ def run_manifest(manifest_path: str, user_request: str, yes: bool, simulate: boo
             _write(os.path.join(run_dir, "langstack.txt"), f"agent[{a}]: simulated\n")
         # Validation/Review/Deploy simulated
         _write(os.path.join(run_dir, "langstack.txt"), "validation: approved (simulated)\nreview: approved (simulated)\ndeploy_demo: done (simulated)\n")
+        run_index.update(run_id, intent=state.get("intent_id"), phase="simulated", validation="approved")
         print(f"Run ID: {run_id}")
         return 0
 
     # Real run with backtrack-on-fail and candidate cascade
     run_id, run_dir = prepare_run_dir()
+    run_started = time.monotonic()
+    run_index.update(run_id, intent=state["intent_id"], phase="planned")
     timeout_s = state["intent_spec"].get("timeout_s")
     eff_timeout = timeout_s if isinstance(timeout_s, int) and timeout_s > 0 else 60
 
@@ -307,28 +342,66 @@ def run_manifest(manifest_path: str, user_request: str, yes: bool, simulate: boo
         seen.add(aid)
         ordered.append(spec)
 
+    # retries=1 as in every execute call below; the default budget covers all of them
+    budget = default_budget(eff_timeout, 1, len(ordered)) if deadline_s is None else deadline_s
+    deadline = Deadline(budget)
+
     # Attempt cascade with backtrack on fail
     ok = False
     rc_final = 1
-    for idx, spec in enumerate(ordered, start=1):
-        _write(os.path.join(run_dir, "langstack.txt"), (
-            "supreme -> intent -> planning -> execution\n" if idx == 1 else "execution (re-run with alternate agent)\n"
-        ))
-        # Execute once
-        rc, ok_eval = _execute_once(
-            state["intent_spec"], spec, user_request, run_id, run_dir, eff_timeout
-        )
-        rc_final = rc
-        # Log which agent was used
-        _write(os.path.join(run_dir, "langstack.txt"), f"agent[{spec.get('agent_id')}]: rc={rc} eval={'ok' if ok_eval else 'ng'}\n")
-        if rc == 0 and ok_eval:
-            ok = True
-            break
+    if strategy in ("parallel-cascade", "hedged"):
+        from .cascade_runner import run_hedged, run_parallel_cascade
+
+        log_path = os.path.join(run_dir, "langstack.txt")
+        _write(log_path, f"supreme -> intent -> planning -> execution ({strategy}) {deadline.describe()}\n")
+        intent_yaml = os.path.join(root, "intents", f"{state['intent_id']}.yml")
+        common = (state["intent_spec"], intent_yaml, user_request, run_id, run_dir, ordered)
+        if strategy == "hedged":
+            res = run_hedged(
+                *common, timeout_s=eff_timeout, retries=1, percentile=hedge_percentile, deadline=deadline
+            )
         else:
-            _write(os.path.join(run_dir, "langstack.txt"), "validation: changes_requested\n")
-            # backtrack_on_fail: continue to next candidate
+            res = run_parallel_cascade(*common, timeout_s=eff_timeout, retries=1, parallel=parallel, deadline=deadline)
+        for r in res["results"]:
+            _write(log_path, f"agent[{r['agent_id']}]: rc={r['rc']} eval={'ok' if r['ok'] else 'ng'}\n")
+        ok = res["winner"] is not None
+        rc_final = res["rc"]
+        if ok:
+            run_index.update(run_id, agent=res["winner"].get("agent_id"))
+        if not ok:
+            _write(log_path, "validation: changes_requested\n")
+    else:
+        for idx, spec in enumerate(ordered, start=1):
+            if deadline.expired():
+                _write(os.path.join(run_dir, "langstack.txt"), f"deadline exhausted: skipping {len(ordered) - idx + 1} candidate(s)\n")
+                if idx == 1:
+                    rc_final = 124
+                break
+            _write(os.path.join(run_dir, "langstack.txt"), (
+                "supreme -> intent -> planning -> execution" if idx == 1 else "execution (re-run with alternate agent)"
+            ) + f" {deadline.describe()}\n")
+            # Execute once
+            rc, ok_eval = _execute_once(
+                state["intent_spec"], spec, user_request, run_id, run_dir, eff_timeout, deadline
+            )
+            rc_final = rc
+            # Log which agent was used
+            _write(os.path.join(run_dir, "langstack.txt"), f"agent[{spec.get('agent_id')}]: rc={rc} eval={'ok' if ok_eval else 'ng'}\n")
+            if rc == 0 and ok_eval:
+                ok = True
+                break
+            else:
+                _write(os.path.join(run_dir, "langstack.txt"), "validation: changes_requested\n")
+                # backtrack_on_fail: continue to next candidate
 
     if not ok:
+        run_index.update(
+            run_id,
+            phase="validated",
+            validation="changes_requested",
+            ok=False,
+            duration_s=time.monotonic() - run_started,
+        )
         print("Validation failed after cascade", file=sys.stderr)
         return 6 if rc_final == 0 else rc_final
 
@@ -336,6 +409,9 @@ def run_manifest(manifest_path: str, user_request: str, yes: bool, simulate: boo
     _write(os.path.join(run_dir, "langstack.txt"), "validation: approved\n")
     _write(os.path.join(run_dir, "langstack.txt"), "review: approved\n")
     _write(os.path.join(run_dir, "langstack.txt"), "deploy_demo: done\n")
+    run_index.update(
+        run_id, phase="deployed", validation="approved", ok=True, duration_s=time.monotonic() - run_started
+    )
     print(f"Run ID: {run_id}")
     return 0
 
@@ -348,6 +424,26 @@ def main(argv: list[str] | None = None) -> int:
     runp.add_argument("--manifest", default="registry/manifest_langstack.yaml")
     runp.add_argument("--yes", action="store_true", help="Skip approval prompts where applicable")
     runp.add_argument("--simulate", action="store_true", help="Do not invoke agents, only simulate")
+    runp.add_argument(
+        "--strategy",
+        choices=["cascade", "parallel-cascade", "hedged"],
+        default="cascade",
+        help="Candidate execution: one after another, top-N at once, or best first with a latency-triggered backup",
+    )
+    runp.add_argument("--parallel", type=int, default=3, help="parallel-cascade: candidates launched at once")
+    runp.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help="Wall-clock budget for all attempts and candidates in seconds (default: every candidate's attempts at the intent timeout, 0 = none)",
+    )
+    runp.add_argument(
+        "--hedge-percentile",
+        type=int,
+        choices=[50, 90, 95, 99],
+        default=95,
+        help="hedged: past wall-time percentile after which the backup starts",
+    )
     runp.add_argument(
         "--experimental-langgraph",
         action="store_true",
@@ -392,10 +488,19 @@ def main(argv: list[str] | None = None) -> int:
         print(f"Run ID: {result.get('run_id')}")
         print(f"Phase: {result.get('current_phase')}")
         print(f"Validation: {result.get('validation_result')}")
-        print(f"Log: runs/{result.get('run_id')}/langstack.txt")
+        print(f"Log: {run_paths.run_rel(str(result.get('run_id') or ''))}/langstack.txt")
         return 0
 
-    return run_manifest(args.manifest, args.input, yes=args.yes, simulate=args.simulate)
+    return run_manifest(
+        args.manifest,
+        args.input,
+        yes=args.yes,
+        simulate=args.simulate,
+        strategy=args.strategy,
+        parallel=args.parallel,
+        hedge_percentile=args.hedge_percentile,
+        deadline_s=args.deadline,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,332 @@
+"""Streaming capture of agent output into logs.txt.
+
+Instead of buffering a whole attempt's stdout/stderr until the process exits,
+runner / async_runner pump both pipes through an `AttemptLog`, which appends
+them to runs/<run>/logs.txt as they arrive:
+
+    --- attempt=1 ---
+    [stdout] runs/2026/10/17/01J.../SPEC.md
+    [stderr] warning: ...
+    attempt=1 rc=0 timeout=False
+
+Only the last `AGI_POC_LOG_TAIL_KB` (default 64) of each stream is kept in
+memory (for error reporting, the result cache and the (rc, out, err, timed_out)
+return value). `tail()` / `tail_run()` read a log from a byte offset so
+/status and the dashboards can poll new output without re-reading the file.
+`run_streaming` reaps the agent with os.wait4 and leaves its rusage on
+`AttemptLog.usage` for metrics.json.
+"""
+
+from __future__ import annotations
+
+import codecs
+import collections
+import os
+import signal
+import subprocess
+import threading
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from . import metrics, proc_group, run_paths
+
+
+DEFAULT_TAIL_KB = 64
+CHUNK = 1 << 16
+# A "line" without a newline is flushed to the log once it grows this large
+MAX_PENDING = 8 * 1024
+STREAMS = ("stdout", "stderr")
+LOG_NAMES = ("logs.txt", "langstack.txt")
+
+
+def tail_limit() -> int:
+    """In-memory / tail window in bytes (AGI_POC_LOG_TAIL_KB)."""
+    try:
+        kb = float(os.environ.get("AGI_POC_LOG_TAIL_KB") or DEFAULT_TAIL_KB)
+    except ValueError:
+        kb = DEFAULT_TAIL_KB
+    return max(1024, int(kb * 1024))
+
+
+class RingBuffer:
+    """Keeps the last `limit` characters appended to it."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.dropped = 0
+        self._chunks: Deque[str] = collections.deque()
+        self._size = 0
+
+    def append(self, text: str) -> None:
+        if not text:
+            return
+        self._chunks.append(text)
+        self._size += len(text)
+        while self._size > self.limit:
+            over = self._size - self.limit
+            head = self._chunks[0]
+            if len(head) <= over:
+                self._chunks.popleft()
+                cut = len(head)
+            else:
+                self._chunks[0] = head[over:]
+                cut = over
+            self._size -= cut
+            self.dropped += cut
+
+    def getvalue(self) -> str:
+        return "".join(self._chunks)
+
+
+class AttemptLog:
+    """One attempt's section of logs.txt, written line by line as output arrives.
+
+    With run_dir=None nothing is written and only the bounded tails are kept.
+    Use as a context manager and call `end()` with the result; an attempt left
+    without `end()` (exception, cancellation) is closed as aborted.
+    """
+
+    def __init__(self, run_dir: Optional[str], attempt: Any, limit: Optional[int] = None, info: str = "") -> None:
+        self.path = os.path.join(run_dir, "logs.txt") if run_dir else None
+        self.attempt = attempt
+        self.info = info
+        self.streamed = False
+        # rusage record of the attempt's process (metrics.usage), set by the runner
+        self.usage: Optional[Dict[str, Any]] = None
+        limit = limit or tail_limit()
+        self._tails = {s: RingBuffer(limit) for s in STREAMS}
+        self._pending = {s: "" for s in STREAMS}
+        self._decoders = {s: codecs.getincrementaldecoder("utf-8")("replace") for s in STREAMS}
+        self._lock = threading.Lock()
+        self._f = None
+        self._ended = False
+
+    def __enter__(self) -> "AttemptLog":
+        if self.path:
+            self._f = open(self.path, "a", encoding="utf-8")
+            self._f.write(f"--- attempt={self.attempt}{' ' + self.info if self.info else ''} ---\n")
+            self._f.flush()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if not self._ended:
+            reason = exc_type.__name__ if exc_type else "no result"
+            self._finish(f"attempt={self.attempt} aborted={reason}")
+
+    def feed(self, stream: str, data: bytes | str, final: bool = False) -> None:
+        """Append output of `stream`; complete lines go to the log immediately."""
+        text = self._decoders[stream].decode(data, final) if isinstance(data, bytes) else data
+        with self._lock:
+            self.streamed = self.streamed or bool(data)
+            self._tails[stream].append(text)
+            lines = (self._pending[stream] + text).split("\n")
+            rest = lines.pop()
+            if final or len(rest) > MAX_PENDING:
+                if rest:
+                    lines.append(rest)
+                rest = ""
+            self._pending[stream] = rest
+            if lines and self._f is not None:
+                self._f.write("".join(f"[{stream}] {ln}\n" for ln in lines))
+                self._f.flush()
+
+    def output(self) -> Tuple[str, str]:
+        """(stdout tail, stderr tail)."""
+        return self._tails["stdout"].getvalue(), self._tails["stderr"].getvalue()
+
+    def truncated(self) -> bool:
+        """True if a stream outgrew the tail, so output() is not the full output."""
+        return any(t.dropped for t in self._tails.values())
+
+    def end(self, rc: int, timed_out: bool, out: str = "", err: str = "", note: str = "") -> None:
+        """Record the result. Output not streamed through feed() (in-process and
+        pooled agents return it at the end) is logged from `out` / `err` here."""
+        if not self.streamed:
+            self.feed("stdout", out or "")
+            self.feed("stderr", err or "")
+        for s in STREAMS:
+            self.feed(s, b"", final=True)
+        dropped = sum(t.dropped for t in self._tails.values())
+        extra = f" {note}" if note else ""
+        self._finish(f"attempt={self.attempt}{extra} rc={rc} timeout={timed_out}" + (f" tail_dropped={dropped}" if dropped else ""))
+
+    def _finish(self, line: str) -> None:
+        self._ended = True
+        with self._lock:
+            if self._f is not None:
+                self._f.write(line + "\n")
+                self._f.close()
+                self._f = None
+
+
+def pump(pipe: Any, stream: str, log: AttemptLog) -> None:
+    """Copy a raw pipe into `log` until EOF (runs in a reader thread)."""
+    try:
+        fd = pipe.fileno()
+        while True:
+            chunk = os.read(fd, CHUNK)
+            if not chunk:
+                break
+            log.feed(stream, chunk)
+    except (OSError, ValueError):
+        pass
+    finally:
+        try:
+            pipe.close()
+        except OSError:
+            pass
+
+
+def _reap(proc: subprocess.Popen, lock: threading.Lock, box: Dict[str, Any]) -> None:
+    """Wait for `proc` and reap it with os.wait4 (reaper thread)."""
+    try:
+        if hasattr(os, "waitid"):
+            # wait without reaping: the pid cannot be recycled under a concurrent kill
+            os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+        with lock:
+            _pid, status, ru = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            box["rusage"] = ru
+    except ChildProcessError:
+        pass
+
+
+def _signal(proc: subprocess.Popen, lock: threading.Lock, sig: int) -> None:
+    # under the reaper's lock: the leader is either still ours or already reaped
+    with lock:
+        proc_group.signal_group(proc.pid, sig)
+
+
+def _terminate(proc: subprocess.Popen, lock: threading.Lock, reaper: threading.Thread) -> None:
+    """SIGTERM the agent's process group, SIGKILL what is left after the grace period."""
+    _signal(proc, lock, signal.SIGTERM)
+    reaper.join(proc_group.grace_s())
+    _signal(proc, lock, signal.SIGKILL)
+    reaper.join()
+
+
+def _wait(proc: subprocess.Popen, timeout_s: Optional[float]) -> Tuple[bool, Any]:
+    """Wait for `proc`, terminating its group after `timeout_s`; (timed_out, rusage or None)."""
+    if not hasattr(os, "wait4"):  # pragma: no cover - non-POSIX
+        try:
+            proc.wait(timeout=timeout_s)
+            return False, None
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            return True, None
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            raise
+    lock = threading.Lock()
+    box: Dict[str, Any] = {}
+    reaper = threading.Thread(target=_reap, args=(proc, lock, box), daemon=True)
+    reaper.start()
+    try:
+        reaper.join(timeout_s)
+    except BaseException:
+        _terminate(proc, lock, reaper)
+        raise
+    timed_out = reaper.is_alive()
+    if timed_out:
+        _terminate(proc, lock, reaper)
+    if proc.returncode is None:
+        proc.wait()
+    return timed_out, box.get("rusage")
+
+
+def run_streaming(
+    cmd: List[str],
+    cwd: str,
+    timeout_s: Optional[float],
+    log: AttemptLog,
+    env: Optional[Dict[str, str]] = None,
+) -> Tuple[int, str, str, bool]:
+    """subprocess.run(capture_output=True) replacement that streams into `log`.
+
+    The agent runs in its own process group; on timeout the group gets
+    SIGTERM, then SIGKILL after the grace period (proc_group). Returns (rc,
+    stdout tail, stderr tail, timed_out); rc is 124 on timeout. The child's
+    rusage is left on `log.usage`.
+    """
+    proc = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=0,
+        start_new_session=proc_group.NEW_SESSION,
+    )
+    readers = [
+        threading.Thread(target=pump, args=(proc.stdout, "stdout", log), daemon=True),
+        threading.Thread(target=pump, args=(proc.stderr, "stderr", log), daemon=True),
+    ]
+    for t in readers:
+        t.start()
+    timed_out, ru = _wait(proc, timeout_s if timeout_s and timeout_s > 0 else None)
+    if ru is not None:
+        log.usage = metrics.usage(ru, "wait4")
+    for t in readers:
+        # a descendant that left the group may hold the pipes open; do not wait on it after a kill
+        t.join(1.0 if timed_out else None)
+    out, err = log.output()
+    return (124 if timed_out else proc.returncode), out, err, timed_out
+
+
+# ---- tailing ----
+def tail(path: str, offset: Optional[int] = None, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """New content of `path` from byte `offset`.
+
+    Without an offset (or when the file shrank, `reset`) the last `max_bytes`
+    are returned starting at a line boundary. Returns {"offset": next offset
+    to poll with, "size", "data", "reset"}; data never ends mid-line unless
+    it reaches the current end of file.
+    """
+    limit = max_bytes or tail_limit()
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return {"offset": 0, "size": 0, "data": "", "reset": False}
+    reset = offset is not None and offset > size
+    from_end = offset is None or offset < 0 or reset
+    start = max(0, size - limit) if from_end else int(offset)  # type: ignore[arg-type]
+    stop = min(size, start + limit)
+    # from the end: read one byte before the window to tell whether it starts a line
+    lead = 1 if from_end and start > 0 else 0
+    try:
+        with open(path, "rb") as f:
+            f.seek(start - lead)
+            data = f.read(stop - start + lead)
+    except OSError:
+        return {"offset": offset or 0, "size": size, "data": "", "reset": False}
+    if lead:
+        nl = data.find(b"\n")
+        if nl >= 0:
+            data = data[nl + 1:]
+            start += nl
+        else:
+            data = data[1:]
+    if start + len(data) < size:
+        nl = data.rfind(b"\n")
+        if nl >= 0:
+            data = data[: nl + 1]
+    return {"offset": start + len(data), "size": size, "data": data.decode("utf-8", "replace"), "reset": reset}
+
+
+def tail_run(
+    run_id: str,
+    name: Optional[str] = None,
+    offset: Optional[int] = None,
+    root: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """tail() of a run's log: `name` in LOG_NAMES, default logs.txt if present else langstack.txt."""
+    if not run_id or run_id.startswith("/") or ".." in run_id.split("/"):
+        return {"offset": 0, "size": 0, "data": "", "reset": False, "name": name}
+    run_dir = run_paths.run_dir(run_id, root)
+    if name not in LOG_NAMES:
+        name = next((n for n in LOG_NAMES if os.path.exists(os.path.join(run_dir, n))), LOG_NAMES[0])
+    res = tail(os.path.join(run_dir, name), offset, max_bytes)
+    res["name"] = name
+    return res
@@ -0,0 +1,191 @@
+"""Single-pass Markdown section index for the SPEC.md validators.
+
+`MarkdownIndex(text)` walks the document once and builds a section tree:
+every ATX heading opens a `Section` nested under the closest shallower
+heading, and the pipe tables (header cells plus data rows) and `-` bullets
+that follow are attached to it. Fenced code blocks are skipped. The
+validators (runner.evaluate_success, acceptance_evaluator,
+langgraph_runner's quick check) query the tree instead of rescanning the
+text with `in` / `find` / `count` / regexes, so a check costs O(size of the
+section it looks at) and all of them read the document the same way.
+
+    md = markdown_index.parse(text)
+    api = md.section("API 仕様")
+    api is not None and api.has_table("Method", "Path")
+"""
+
+from __future__ import annotations
+
+import collections
+import os
+import re
+import threading
+from typing import Iterator, List, Optional, Tuple
+
+
+# Required top-level sections of a SPEC.md (intents/create_spec_document.yml)
+SPEC_SECTIONS = (
+    "目的",
+    "非目標",
+    "機能一覧",
+    "ユースケース",
+    "画面要件",
+    "API 仕様",
+    "データモデル",
+    "受入条件",
+)
+UC_PREFIX = "UC-"
+# Use cases are `### UC-...` headings; every validator counts this level only
+UC_LEVEL = 3
+
+_HEADING = re.compile(r"^ {0,3}(#{1,6})[ \t]+(.+?)[ \t]*$")
+_SEPARATOR_CELL = re.compile(r"^:?-+:?$")
+_FENCES = ("```", "~~~")
+_CACHE_SIZE = 32
+
+
+def _cells(line: str) -> List[str]:
+    inner = line.strip()
+    if inner.startswith("|"):
+        inner = inner[1:]
+    if inner.endswith("|"):
+        inner = inner[:-1]
+    return [c.strip() for c in inner.split("|")]
+
+
+class Table:
+    """A pipe table: header cells and data rows (the separator row dropped)."""
+
+    def __init__(self, header: List[str], line: int) -> None:
+        self.header = header
+        self.rows: List[List[str]] = []
+        self.line = line
+
+    def has_columns(self, *names: str) -> bool:
+        return all(n in self.header for n in names)
+
+
+class Section:
+    """A heading and everything up to the next heading of the same or a shallower level."""
+
+    def __init__(self, level: int, title: str, line: int, parent: Optional["Section"]) -> None:
+        self.level = level
+        self.title = title
+        self.line = line
+        self.parent = parent
+        self.children: List[Section] = []
+        self.tables: List[Table] = []
+        self.bullets: List[str] = []
+
+    def walk(self) -> Iterator["Section"]:
+        """This section and all its subsections, in document order."""
+        stack = [self]
+        while stack:
+            sec = stack.pop()
+            yield sec
+            stack.extend(reversed(sec.children))
+
+    def all_tables(self) -> List[Table]:
+        return [t for sec in self.walk() for t in sec.tables]
+
+    def all_bullets(self) -> List[str]:
+        return [b for sec in self.walk() for b in sec.bullets]
+
+    def has_table(self, *columns: str) -> bool:
+        """True if a table in this subtree has all `columns` in its header."""
+        return any(t.has_columns(*columns) for t in self.all_tables())
+
+    def subsections(self, level: int) -> List["Section"]:
+        """Descendant sections at exactly `level`."""
+        return [s for s in self.walk() if s.level == level and s is not self]
+
+
+class MarkdownIndex:
+    """Section tree of a Markdown document, built in one pass over its lines."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text or ""
+        self.root = Section(0, "", -1, None)
+        self.sections: List[Section] = []
+        stack = [self.root]
+        table: Optional[Table] = None
+        fence: Optional[str] = None
+        for i, line in enumerate(self.text.splitlines()):
+            stripped = line.strip()
+            if fence is not None:
+                if stripped.startswith(fence):
+                    fence = None
+                continue
+            if stripped.startswith(_FENCES):
+                fence = stripped[:3]
+                table = None
+                continue
+            m = _HEADING.match(line)
+            if m:
+                level = len(m.group(1))
+                while stack[-1].level >= level:
+                    stack.pop()
+                sec = Section(level, m.group(2), i, stack[-1])
+                stack[-1].children.append(sec)
+                stack.append(sec)
+                self.sections.append(sec)
+                table = None
+                continue
+            if stripped.startswith("|"):
+                cells = _cells(stripped)
+                if table is None:
+                    table = Table(cells, i)
+                    stack[-1].tables.append(table)
+                elif not all(_SEPARATOR_CELL.match(c) for c in cells if c):
+                    table.rows.append(cells)
+                continue
+            table = None
+            if stripped.startswith("-") and stripped.strip("-"):
+                stack[-1].bullets.append(stripped[1:].strip())
+
+    def section(self, title: str, min_level: int = 2) -> Optional[Section]:
+        """First section titled `title` (or starting with it) at `min_level` or deeper."""
+        for sec in self.sections:
+            if sec.level >= min_level and sec.title.startswith(title):
+                return sec
+        return None
+
+    def missing_sections(self, titles: Tuple[str, ...] = SPEC_SECTIONS) -> List[str]:
+        found = {t for t in titles for sec in self.sections if sec.level >= 2 and sec.title.startswith(t)}
+        return [t for t in titles if t not in found]
+
+    def uc_blocks(self) -> List[Section]:
+        """Use case sections: `### UC-...` headings (UC_LEVEL), the one rule all validators share."""
+        return [s for s in self.sections if s.level == UC_LEVEL and s.title.startswith(UC_PREFIX)]
+
+    def contains(self, *words: str) -> bool:
+        """True if every word occurs somewhere in the document."""
+        return all(w in self.text for w in words)
+
+
+def parse(text: str) -> MarkdownIndex:
+    return MarkdownIndex(text)
+
+
+_cache: "collections.OrderedDict[str, Tuple[Tuple[int, int], MarkdownIndex]]" = collections.OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def load_cached(path: str) -> MarkdownIndex:
+    """Index of the file at `path`, reused while its mtime and size are unchanged
+    (evaluate_success and the acceptance check read the same SPEC.md)."""
+    st = os.stat(path)
+    sig = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        hit = _cache.get(path)
+        if hit is not None and hit[0] == sig:
+            _cache.move_to_end(path)
+            return hit[1]
+    with open(path, "r", encoding="utf-8") as f:
+        md = MarkdownIndex(f.read())
+    with _cache_lock:
+        _cache[path] = (sig, md)
+        _cache.move_to_end(path)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return md
@@ -0,0 +1,226 @@
+"""Per-attempt resource accounting: runs/<run>/metrics.json.
+
+Every attempt of execute_with_retry(_async) appends one record with its wall
+time and, for subprocess agents, the child's rusage: user / sys CPU, peak
+RSS, block I/O, page faults and context switches.
+
+- runner (log_stream.run_streaming) reaps the child with `os.wait4`, so the
+  numbers are exactly that process tree's (the agent plus every descendant
+  it waited for).
+- async_runner cannot get at the reaping done by the event loop and uses a
+  `resource.getrusage(RUSAGE_CHILDREN)` delta instead; the record is marked
+  `"exact": false` when other async agents finished in the same window.
+- In-process (`entry.type: python`) agents run in their own thread and get
+  a `RUSAGE_THREAD` delta (Linux); their peak RSS is the process's.
+- Worker-pool attempts get the worker's `RUSAGE_SELF` delta over the job
+  (source "worker"); cached attempts only record wall time.
+
+The file is rewritten atomically after each attempt; `totals` sums the
+attempts. `aggregate()` rolls run documents up per agent and per intent for
+the dashboards, so no log scraping is needed.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+try:  # POSIX only
+    import resource
+except ImportError:  # pragma: no cover - non-POSIX
+    resource = None  # type: ignore[assignment]
+
+
+METRICS_NAME = "metrics.json"
+# rusage counters summed across attempts (max_rss_kb is a max instead)
+COUNTERS = ("user_s", "sys_s", "cpu_s", "inblock", "oublock", "minflt", "majflt", "nvcsw", "nivcsw")
+
+_lock = threading.Lock()
+# RUSAGE_CHILDREN meters currently open (async path)
+_open_meters: List["ChildrenMeter"] = []
+
+
+def usage(ru: Any, source: str) -> Dict[str, Any]:
+    """Record fields of a struct_rusage. ru_maxrss is KiB on Linux (bytes on macOS)."""
+    return {
+        "source": source,
+        "exact": True,
+        "user_s": round(ru.ru_utime, 4),
+        "sys_s": round(ru.ru_stime, 4),
+        "cpu_s": round(ru.ru_utime + ru.ru_stime, 4),
+        "max_rss_kb": int(ru.ru_maxrss),
+        "inblock": int(ru.ru_inblock),
+        "oublock": int(ru.ru_oublock),
+        "minflt": int(ru.ru_minflt),
+        "majflt": int(ru.ru_majflt),
+        "nvcsw": int(ru.ru_nvcsw),
+        "nivcsw": int(ru.ru_nivcsw),
+    }
+
+
+class ChildrenMeter:
+    """RUSAGE_CHILDREN delta over one child's lifetime.
+
+    Counts every child of this process reaped in the window, so overlapping
+    meters mark each other as not exact. Peak RSS is only known when this
+    child raised the children-wide maximum.
+    """
+
+    def __init__(self) -> None:
+        self.exact = True
+        self._before = resource.getrusage(resource.RUSAGE_CHILDREN) if resource is not None else None
+        with _lock:
+            if _open_meters:
+                self.exact = False
+                for m in _open_meters:
+                    m.exact = False
+            _open_meters.append(self)
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        with _lock:
+            if self in _open_meters:
+                _open_meters.remove(self)
+        if self._before is None:
+            return None
+        out = delta(self._before, resource.getrusage(resource.RUSAGE_CHILDREN), "children_delta")
+        out["exact"] = self.exact
+        return out
+
+
+def delta(before: Any, after: Any, source: str) -> Dict[str, Any]:
+    """Record of the usage between two getrusage() snapshots.
+
+    ru_maxrss is a high-water mark, so peak RSS is only known when it rose
+    in between.
+    """
+    b, a = usage(before, source), usage(after, source)
+    out = {k: round(a[k] - b[k], 4) for k in COUNTERS}
+    out["source"] = source
+    out["exact"] = True
+    out["max_rss_kb"] = a["max_rss_kb"] if a["max_rss_kb"] > b["max_rss_kb"] else None
+    return out
+
+
+def thread_rusage() -> Any:
+    """getrusage(RUSAGE_THREAD) of the calling thread, None where unsupported."""
+    if resource is None or not hasattr(resource, "RUSAGE_THREAD"):
+        return None
+    return resource.getrusage(resource.RUSAGE_THREAD)
+
+
+def metrics_path(run_dir: str) -> str:
+    return os.path.join(run_dir, METRICS_NAME)
+
+
+def load(run_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(metrics_path(run_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _spec_id(run_dir: str, name: str, key: str) -> Optional[str]:
+    try:
+        with open(os.path.join(run_dir, name), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    val = data.get(key) if isinstance(data, dict) else None
+    return str(val) if val else None
+
+
+def totals(attempts: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"attempts": 0, "wall_s": 0.0, "max_rss_kb": None, "timeouts": 0, "failures": 0}
+    out.update({k: 0 for k in COUNTERS})
+    for a in attempts:
+        out["attempts"] += 1
+        out["wall_s"] += float(a.get("wall_s") or 0.0)
+        out["timeouts"] += 1 if a.get("timed_out") else 0
+        out["failures"] += 1 if a.get("rc") not in (0, None) else 0
+        for k in COUNTERS:
+            out[k] += a.get(k) or 0
+        rss = a.get("max_rss_kb")
+        if rss is not None and (out["max_rss_kb"] is None or rss > out["max_rss_kb"]):
+            out["max_rss_kb"] = rss
+    for k in ("wall_s", "user_s", "sys_s", "cpu_s"):
+        out[k] = round(out[k], 4)
+    return out
+
+
+def record_attempt(
+    run_dir: str,
+    run_id: str,
+    attempt: Any,
+    agent_id: Optional[str],
+    rc: int,
+    timed_out: bool,
+    wall_s: float,
+    usage_rec: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Append one attempt to run_dir/metrics.json (best effort)."""
+    rec: Dict[str, Any] = {
+        "attempt": attempt,
+        "agent": agent_id,
+        "ts": round(time.time(), 3),
+        "rc": rc,
+        "timed_out": bool(timed_out),
+        "wall_s": round(float(wall_s), 4),
+    }
+    rec.update(usage_rec or {"source": "none"})
+    path = metrics_path(run_dir)
+    with _lock:
+        doc = load(run_dir) or {
+            "run_id": run_id,
+            "intent": _spec_id(run_dir, "intent.yml", "intent_id"),
+            "agent": agent_id,
+            "attempts": [],
+        }
+        doc["attempts"].append(rec)
+        doc["totals"] = totals(doc["attempts"])
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(doc, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+def load_run(run_dir: str) -> List[Dict[str, Any]]:
+    """metrics.json of a run and of its cascade candidates (candidates/<agent>)."""
+    docs = [d for d in [load(run_dir)] if d]
+    cand_base = os.path.join(run_dir, "candidates")
+    try:
+        names = sorted(os.listdir(cand_base))
+    except OSError:
+        names = []
+    for name in names:
+        d = load(os.path.join(cand_base, name))
+        if d:
+            docs.append(d)
+    return docs
+
+
+def aggregate(docs: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """{"by_agent": {agent: totals}, "by_intent": {intent: totals}} over run documents."""
+    per_agent: Dict[str, List[Dict[str, Any]]] = {}
+    per_intent: Dict[str, List[Dict[str, Any]]] = {}
+    for doc in docs:
+        intent = str(doc.get("intent") or "-")
+        for a in doc.get("attempts") or []:
+            if not isinstance(a, dict):
+                continue
+            per_agent.setdefault(str(a.get("agent") or doc.get("agent") or "-"), []).append(a)
+            per_intent.setdefault(intent, []).append(a)
+    return {
+        "by_agent": {k: totals(v) for k, v in sorted(per_agent.items())},
+        "by_intent": {k: totals(v) for k, v in sorted(per_intent.items())},
+    }
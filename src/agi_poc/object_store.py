@@ -0,0 +1,128 @@
+"""Content-addressed store for run outputs.
+
+Files written under runs/ through `write_bytes` / `write_text` /
+`write_json` are stored once in runs/.objects/<2 hex>/<sha256> and the run
+dir gets a hardlink to the object, so identical intent.yml / agent.yml /
+SPEC.md / demo files across runs share one inode and one copy on disk.
+Where a hardlink cannot be made (another filesystem, link limit) a plain
+copy is written instead; readers never need to know about the store.
+
+Objects are read-only and must never be modified in place: the helpers
+always replace the directory entry. `gc()` drops objects no run links to
+any more. Paths outside runs/ (and AGI_POC_OBJECT_STORE=0) get a plain
+atomic write.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import stat
+import uuid
+from typing import Any, Dict, Optional
+
+from .util import project_root
+
+
+OBJECTS_REL = os.path.join("runs", ".objects")
+
+
+def _project_root() -> str:
+    return project_root(os.path.dirname(__file__))
+
+
+def objects_dir(root: Optional[str] = None) -> str:
+    return os.path.join(root or _project_root(), OBJECTS_REL)
+
+
+def object_path(digest: str, root: Optional[str] = None) -> str:
+    return os.path.join(objects_dir(root), digest[:2], digest)
+
+
+def enabled() -> bool:
+    return os.environ.get("AGI_POC_OBJECT_STORE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _atomic_write(path: str, data: bytes, mode: Optional[int] = None) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def put(data: bytes, root: Optional[str] = None) -> str:
+    """Store `data` if not present yet; returns its sha256 hex digest."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = object_path(digest, root)
+    if not os.path.exists(path):
+        _atomic_write(path, data, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    return digest
+
+
+def _in_runs(path: str, root: str) -> bool:
+    runs = os.path.realpath(os.path.join(root, "runs"))
+    p = os.path.realpath(os.path.abspath(path))
+    return p.startswith(runs + os.sep) and not p.startswith(os.path.join(runs, ".objects") + os.sep)
+
+
+def write_bytes(path: str, data: bytes, root: Optional[str] = None) -> None:
+    """Write `data` to `path`, as a link into the object store when under runs/."""
+    root = root or _project_root()
+    if not enabled() or not _in_runs(path, root):
+        _atomic_write(path, data)
+        return
+    src = object_path(put(data, root), root)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        _atomic_write(path, data)
+        return
+    os.replace(tmp, path)
+    if os.path.lexists(tmp):
+        # rename() is a no-op when both names already link the same object
+        os.unlink(tmp)
+
+
+def write_text(path: str, content: str, root: Optional[str] = None) -> None:
+    write_bytes(path, (content or "").encode("utf-8"), root)
+
+
+def write_json(path: str, obj: Any, root: Optional[str] = None, indent: Optional[int] = 2) -> None:
+    write_text(path, json.dumps(obj, ensure_ascii=False, indent=indent), root)
+
+
+def gc(root: Optional[str] = None) -> Dict[str, int]:
+    """Remove objects that are no longer linked from any run (link count 1)."""
+    base = objects_dir(root)
+    removed = kept = freed = 0
+    try:
+        shards = os.listdir(base)
+    except OSError:
+        return {"removed": 0, "kept": 0, "bytes": 0}
+    for shard in shards:
+        sdir = os.path.join(base, shard)
+        if not os.path.isdir(sdir):
+            continue
+        for name in os.listdir(sdir):
+            p = os.path.join(sdir, name)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            if st.st_nlink <= 1:
+                os.unlink(p)
+                removed += 1
+                freed += st.st_size
+            else:
+                kept += 1
+    return {"removed": removed, "kept": kept, "bytes": freed}
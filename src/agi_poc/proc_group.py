@@ -0,0 +1,45 @@
+"""Process-group termination for agent subprocesses.
+
+Agents are started in their own session (`start_new_session=True`), so an
+agent and everything it spawns (builders, shells, test runners) share one
+process group. On timeout or cancellation the whole group gets SIGTERM,
+then `AGI_POC_KILL_GRACE_S` (default 2s) to exit cleanly, then SIGKILL for
+whatever is left, grandchildren that outlived the agent included.
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+from typing import Optional
+
+
+DEFAULT_GRACE_S = 2.0
+# Start agents in a new session (their own process group) where supported
+NEW_SESSION = os.name == "posix"
+
+
+def grace_s() -> float:
+    """Seconds between SIGTERM and SIGKILL (AGI_POC_KILL_GRACE_S)."""
+    try:
+        return max(0.0, float(os.environ.get("AGI_POC_KILL_GRACE_S") or DEFAULT_GRACE_S))
+    except ValueError:
+        return DEFAULT_GRACE_S
+
+
+def signal_group(pid: int, sig: Optional[int] = None) -> bool:
+    """Send `sig` (default SIGKILL) to the process group led by `pid`.
+
+    The group id stays reserved while any member is alive, so this also
+    reaches grandchildren after the leader was reaped. False if nothing was
+    left to signal.
+    """
+    sig = signal.SIGKILL if sig is None else sig
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(pid, sig)
+        else:  # pragma: no cover - non-POSIX
+            os.kill(pid, sig)
+    except (ProcessLookupError, PermissionError, OSError):
+        return False
+    return True
@@ -0,0 +1,177 @@
+"""Unified agent index shared by agent_builder_cli and routing.
+
+Layout (under registry/):
+- agents.json       compacted state: {"agents": [{agent_id, path, capabilities}, ...]}
+- agents.log.jsonl  append-only updates since the last compaction
+- agents.lock       flock target serializing writers (and compaction vs readers);
+                    created by the first writer, readers never create it
+
+`register()` appends one line under an exclusive lock (O(1) per write).
+Once the log grows past COMPACT_BYTES it is folded into agents.json via a
+temp file + atomic rename, then truncated. Readers take a shared lock and
+replay the log over the base, so they never observe a half-compacted state.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore
+
+from ..util import project_root
+
+
+INDEX_REL = os.path.join("registry", "agents.json")
+LOG_REL = os.path.join("registry", "agents.log.jsonl")
+LOCK_REL = os.path.join("registry", "agents.lock")
+COMPACT_BYTES = 64 * 1024
+
+# In-process memo of the replayed index: root -> (signature, entries)
+_memo: Dict[str, Tuple[Tuple[Tuple[int, int], ...], Dict[str, Dict[str, Any]]]] = {}
+
+
+def _project_root() -> str:
+    return project_root(os.path.dirname(__file__))
+
+
+@contextlib.contextmanager
+def _locked(root: str, exclusive: bool) -> Iterator[None]:
+    path = os.path.join(root, LOCK_REL)
+    if not exclusive:
+        # Readers never create files: without a lock file no writer has run
+        try:
+            fh = open(path, "r")
+        except OSError:
+            yield
+            return
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fh = open(path, "a")
+    with fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def _entry(agent_id: str, path_rel: str, capabilities: Iterable[Any]) -> Dict[str, Any]:
+    return {"agent_id": agent_id, "path": path_rel, "capabilities": list(capabilities or [])}
+
+
+def _read_unlocked(root: str) -> Dict[str, Dict[str, Any]]:
+    out: Dict[str, Dict[str, Any]] = {}
+    try:
+        with open(os.path.join(root, INDEX_REL), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for a in (data or {}).get("agents") or []:
+            if isinstance(a, dict) and a.get("agent_id"):
+                out[a["agent_id"]] = _entry(a["agent_id"], a.get("path") or "", a.get("capabilities") or [])
+    except (OSError, ValueError):
+        pass
+    try:
+        with open(os.path.join(root, LOG_REL), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn trailing line from a crashed writer
+                aid = rec.get("agent_id") if isinstance(rec, dict) else None
+                if not aid:
+                    continue
+                if rec.get("op") == "delete":
+                    out.pop(aid, None)
+                else:
+                    out[aid] = _entry(aid, rec.get("path") or "", rec.get("capabilities") or [])
+    except OSError:
+        pass
+    return out
+
+
+def read_index(root: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Current agents as {agent_id: {agent_id, path, capabilities}} in insertion order.
+
+    Replayed once per on-disk change; entries are shared, treat as read-only.
+    """
+    root = root or _project_root()
+    sig = index_signature(root)
+    hit = _memo.get(root)
+    if hit is not None and hit[0] == sig:
+        return dict(hit[1])
+    with _locked(root, exclusive=False):
+        entries = _read_unlocked(root)
+    _memo[root] = (sig, entries)
+    return dict(entries)
+
+
+def index_signature(root: Optional[str] = None) -> Tuple[Tuple[int, int], ...]:
+    """(mtime_ns, size) of the base file and the log; changes whenever the index does."""
+    root = root or _project_root()
+    sig = []
+    for rel in (INDEX_REL, LOG_REL):
+        try:
+            st = os.stat(os.path.join(root, rel))
+            sig.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append((0, -1))
+    return tuple(sig)
+
+
+def _compact_unlocked(root: str) -> None:
+    state = _read_unlocked(root)
+    path = os.path.join(root, INDEX_REL)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"agents": list(state.values())}, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    # Base now contains everything; replaying the old log again would be idempotent
+    with open(os.path.join(root, LOG_REL), "w", encoding="utf-8"):
+        pass
+
+
+def _append(root: str, records: List[Dict[str, Any]]) -> None:
+    if not records:
+        return
+    os.makedirs(os.path.join(root, "registry"), exist_ok=True)
+    with _locked(root, exclusive=True):
+        log_path = os.path.join(root, LOG_REL)
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.getsize(log_path) > COMPACT_BYTES:
+            _compact_unlocked(root)
+
+
+def register(agent_id: str, path_rel: str, capabilities: Iterable[Any], root: Optional[str] = None) -> None:
+    """Insert or update one agent (last write wins)."""
+    register_many([(agent_id, path_rel, capabilities)], root)
+
+
+def register_many(entries: Iterable[Tuple[str, str, Iterable[Any]]], root: Optional[str] = None) -> None:
+    """Insert or update several agents with a single locked append."""
+    root = root or _project_root()
+    _append(root, [{"op": "put", **_entry(aid, path_rel, caps)} for aid, path_rel, caps in entries])
+
+
+def unregister(agent_id: str, root: Optional[str] = None) -> None:
+    root = root or _project_root()
+    _append(root, [{"op": "delete", "agent_id": agent_id}])
+
+
+def compact(root: Optional[str] = None) -> None:
+    """Fold the log into agents.json now (atomic rename)."""
+    root = root or _project_root()
+    with _locked(root, exclusive=True):
+        _compact_unlocked(root)
@@ -5,12 +5,16 @@ from typing import Dict, Any, List, Tuple
 
 # Reuse existing minimal YAML loader if available
 try:
-    from yaml_min import load as yaml_load
+    from yaml_min import load_cached as yaml_load, clone as clone_spec
 except Exception:  # pragma: no cover
     yaml_load = None
+    clone_spec = None
 
 from ..yaml_simple import dump as yaml_dump_simple
 from ..util import project_root
+from .. import run_history
+from . import selftest
+from .live_registry import default_registry
 
 
 def _project_root() -> str:
@@ -34,52 +38,103 @@ def _dump_yaml(d: Dict[str, Any], path: str) -> None:
 
 def _walk_agents(root: str) -> List[str]:
     out = []
-    for name in os.listdir(root):
+    for name in sorted(os.listdir(root)):
         p = os.path.join(root, name, "agent.yml")
         if os.path.exists(p):
             out.append(p)
     return out
 
 
-def list_candidates(required_caps: List[str]) -> List[Tuple[str, Dict[str, Any], float]]:
+def _split_sentinel(required_caps: List[str]) -> Tuple[List[str], str | None]:
+    # extract optional intent_id sentinel
+    intent_id = None
+    eff_reqs: List[str] = []
+    for r in required_caps or []:
+        if isinstance(r, str) and r.startswith("__intent_id__:"):
+            intent_id = r.split(":", 1)[1]
+        else:
+            eff_reqs.append(r)
+    return eff_reqs, intent_id
+
+
+def _broken(reg, index, root: str) -> set:
+    # Positions whose cached self-test failed for the current spec hash
+    key = ("selftest_broken", selftest.cache_signature(root))
+    return reg.cached(key, lambda: selftest.broken_positions(index.agents, root))
+
+
+def list_candidates(
+    required_caps: List[str],
+    limit: int | None = None,
+    scoring: str = "capability",
+) -> List[Tuple[str, Dict[str, Any], float]]:
     """List existing agents with a simple score for routing.
 
     Heuristic score:
     - +1 per matching capability in required_caps
     - +2 if a special sentinel "__intent_id__:<id>" is present in required_caps and appears in agent_id
+
+    Ordered by score desc, ties in registry walk order. `limit` keeps only
+    the top-k (heap selection instead of a full sort).
+
+    With scoring="history", ties on score are broken by expected
+    time-to-success from runs/history.jsonl (per intent_id when known, else
+    pooled per agent), so cascades try fast, reliable agents first.
+
+    Agents whose cached self-test (`agents selftest`) failed for their
+    current spec are left out.
     """
     root = _project_root()
     agents_root = os.path.join(root, "agents")
-    results: List[Tuple[str, Dict[str, Any], float]] = []
     if not os.path.exists(agents_root):
-        return results
+        return []
+
+    eff_reqs, intent_id = _split_sentinel(required_caps)
+    reg = default_registry(root)
+    index = reg.index()
+    broken = _broken(reg, index, root)
+    by_history = scoring == "history"
+    rank_limit = None if (by_history or broken) else limit
+    key = ("candidates", tuple(r if isinstance(r, str) else repr(r) for r in eff_reqs), intent_id, rank_limit)
+    ranked = reg.cached(key, lambda: index.ranked(eff_reqs, intent_id, rank_limit))
+    if broken:
+        ranked = [(pos, score) for pos, score in ranked if pos not in broken]
+    if by_history:
+        stats = run_history.load_stats(root)
+        ets = [
+            run_history.expected_time_to_success(run_history.agent_stats(stats, intent_id, index.agent_ids[pos]))
+            for pos, _score in ranked
+        ]
+        order = sorted(range(len(ranked)), key=lambda i: (-ranked[i][1], ets[i], i))
+        ranked = [ranked[i] for i in order]
+    if limit is not None and rank_limit is None:
+        ranked = ranked[: max(0, int(limit))]
+    results: List[Tuple[str, Dict[str, Any], float]] = []
+    for pos, score in ranked:
+        p, spec = index.agents[pos]
+        results.append((p, clone_spec(spec), score))
+    return results
 
-    # extract optional intent_id sentinel
-    intent_id = None
-    eff_reqs: List[str] = []
-    for r in required_caps or []:
-        if isinstance(r, str) and r.startswith("__intent_id__:"):
-            intent_id = r.split(":", 1)[1]
-        else:
-            eff_reqs.append(r)
 
-    for p in _walk_agents(agents_root):
-        try:
-            spec = _load_yaml(p)
-        except Exception:
-            continue
-        caps = spec.get("capabilities") or []
-        score = 0.0
-        for req in (eff_reqs or []):
-            if req in caps:
-                score += 1.0
-        if intent_id:
-            aid = spec.get("agent_id") or ""
-            if intent_id in aid:
-                score += 2.0
-        results.append((p, spec, score))
-    results.sort(key=lambda t: t[2], reverse=True)
-    return results
+def select_existing(required_caps: List[str], intent_id: str) -> Tuple[str, Dict[str, Any]] | None:
+    """Pick an existing agent that satisfies required capabilities, or None.
+
+    Returns (path, spec) with a shared spec: treat as read-only.
+    """
+    root = _project_root()
+    if not os.path.exists(os.path.join(root, "agents")):
+        return None
+    reg = default_registry(root)
+    index = reg.index()
+    broken = _broken(reg, index, root)
+    matches = [m for m in index.supersets(list(required_caps or [])) if m not in broken]
+    if not matches:
+        return None
+    # All matches tie on capability score; prefer the intent_id bonus,
+    # then registry walk order (same as the best-first scan).
+    preferred = set(index.intent_positions(intent_id)) if intent_id else set()
+    pos = next((m for m in matches if m in preferred), matches[0])
+    return index.agents[pos]
 
 
 def select_or_generate(required_caps: List[str], intent_id: str) -> Tuple[str, Dict[str, Any]]:
@@ -89,12 +144,9 @@ def select_or_generate(required_caps: List[str], intent_id: str) -> Tuple[str, D
     """
     root = _project_root()
     agents_root = os.path.join(root, "agents")
-    if os.path.exists(agents_root):
-        # prefer best candidates first
-        for p, spec, _sc in list_candidates([*(required_caps or []), f"__intent_id__:{intent_id}"]):
-            caps = spec.get("capabilities") or []
-            if all(req in caps for req in (required_caps or [])):
-                return p, spec
+    hit = select_existing(required_caps, intent_id)
+    if hit is not None:
+        return hit[0], clone_spec(hit[1])
 
     # Generate from basic template
     tpl_path = os.path.join(root, "templates", "agents", "basic.yml")
@@ -117,4 +169,7 @@ def select_or_generate(required_caps: List[str], intent_id: str) -> Tuple[str, D
     _ensure_dir(out_dir)
     out_path = os.path.join(out_dir, "agent.yml")
     _dump_yaml(template, out_path)
+    reg = default_registry(root)
+    reg.notify(out_path)
+    reg.sync_index()
     return out_path, template
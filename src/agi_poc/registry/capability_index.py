@@ -0,0 +1,112 @@
+"""Inverted capability index for agent routing.
+
+Each distinct capability gets a bit; every agent's capability set becomes an
+int mask, so "agent has all required caps" is `mask & req == req`. A
+capability -> agent-positions map lets scoring touch only agents that match
+at least one requirement, and top-k selection uses a heap instead of a full
+sort. Positions follow registry walk order, which doubles as the tie-breaker.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def _caps_of(spec: Dict[str, Any]) -> List[str]:
+    caps = spec.get("capabilities") or []
+    if isinstance(caps, str):
+        caps = [caps]
+    if not isinstance(caps, (list, tuple)):
+        return []
+    return [c for c in caps if isinstance(c, str)]
+
+
+class CapabilityIndex:
+    def __init__(self, agents: List[Tuple[str, Dict[str, Any]]]):
+        self.agents = agents
+        self.bits: Dict[str, int] = {}
+        self.masks: List[int] = []
+        self.by_cap: Dict[str, List[int]] = {}
+        self.agent_ids: List[str] = []
+        self._intent_hits: Dict[str, List[int]] = {}
+        for pos, (_path, spec) in enumerate(agents):
+            mask = 0
+            for cap in _caps_of(spec):
+                bit = self.bits.get(cap)
+                if bit is None:
+                    bit = 1 << len(self.bits)
+                    self.bits[cap] = bit
+                if not mask & bit:
+                    self.by_cap.setdefault(cap, []).append(pos)
+                mask |= bit
+            self.masks.append(mask)
+            self.agent_ids.append(str(spec.get("agent_id") or ""))
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+    def intent_positions(self, intent_id: str) -> List[int]:
+        # agent_id substring match, memoized per intent
+        hits = self._intent_hits.get(intent_id)
+        if hits is None:
+            hits = [i for i, aid in enumerate(self.agent_ids) if intent_id in aid]
+            self._intent_hits[intent_id] = hits
+        return hits
+
+    def scores(self, required_caps: Iterable[str], intent_id: Optional[str] = None) -> Dict[int, float]:
+        """Non-zero scores by position: +1 per matching requirement, +2 for intent_id."""
+        out: Dict[int, float] = {}
+        for req, n in Counter(r for r in required_caps if isinstance(r, str)).items():
+            for pos in self.by_cap.get(req, ()):
+                out[pos] = out.get(pos, 0.0) + n
+        if intent_id:
+            for pos in self.intent_positions(intent_id):
+                out[pos] = out.get(pos, 0.0) + 2.0
+        return out
+
+    def ranked(
+        self,
+        required_caps: Iterable[str],
+        intent_id: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """(position, score) ordered by score desc, then walk order.
+
+        Zero-score agents trail in walk order, exactly as a stable sort would
+        leave them. With `limit`, only the top-k are selected (heap).
+        """
+        scored = self.scores(required_caps, intent_id)
+        order_key = lambda t: (-t[1], t[0])  # noqa: E731
+        if limit is None:
+            top = sorted(scored.items(), key=order_key)
+            want = len(self.agents)
+        else:
+            want = max(0, int(limit))
+            top = heapq.nsmallest(want, scored.items(), key=order_key)
+        if len(top) < want:
+            for pos in range(len(self.agents)):
+                if pos not in scored:
+                    top.append((pos, 0.0))
+                    if len(top) >= want:
+                        break
+        return top
+
+    def supersets(self, required_caps: Iterable[str]) -> List[int]:
+        """Positions of agents whose capabilities include every required cap."""
+        reqs = list(required_caps)
+        if any(not isinstance(r, str) for r in reqs):
+            return []
+        reqs = set(reqs)
+        if not reqs:
+            return list(range(len(self.agents)))
+        req_mask = 0
+        for req in reqs:
+            bit = self.bits.get(req)
+            if bit is None:
+                return []
+            req_mask |= bit
+        # Walk the rarest capability's posting list and AND-check the rest
+        rarest = min(reqs, key=lambda r: len(self.by_cap.get(r, ())))
+        return [pos for pos in self.by_cap[rarest] if self.masks[pos] & req_mask == req_mask]
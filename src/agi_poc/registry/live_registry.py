@@ -0,0 +1,266 @@
+"""In-memory agent/intent registry for long-running processes.
+
+`LiveRegistry` keeps parsed specs and the capability index in memory and
+applies incremental updates: `refresh()` stats every source and reparses only
+files whose (mtime_ns, size) changed, `notify(path)` picks up a single file a
+caller just wrote, and `start()` runs a polling watcher thread so request
+handlers never rescan. Every applied change bumps `version`; `cached()` lets
+callers memoize derived data (e.g. ranked candidates) per version.
+
+Loading and refreshing only read. `sync_index()` records directory-only
+agents in the agent index; writers call it after creating an agent.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+try:
+    from yaml_min import load as yaml_load
+except Exception:  # pragma: no cover
+    yaml_load = None
+
+from ..util import project_root
+from . import agent_index, snapshot
+from .capability_index import CapabilityIndex, _caps_of
+
+
+def _project_root() -> str:
+    return project_root(os.path.dirname(__file__))
+
+
+_is_agent = snapshot.is_agent_source
+
+
+def _walk_key(rel: str) -> Tuple[int, Tuple[str, str]]:
+    # Same order as snapshot.scan_sources(): agents by dir name, then intents
+    if _is_agent(rel):
+        return (0, snapshot.agent_sort_key(rel))
+    return (1, (os.path.basename(rel), rel))
+
+
+class LiveRegistry:
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or _project_root()
+        self.version = 0
+        self._lock = threading.RLock()
+        self._sources: Dict[str, List[int]] = {}
+        self._specs: Dict[str, Dict[str, Any]] = {}  # rel -> parsed spec (read-only)
+        self._index: Optional[CapabilityIndex] = None
+        self._derived: Dict[Hashable, Any] = {}
+        self._loaded = False
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ---- loading / updates ----
+    def _parse(self, rel: str) -> Optional[Dict[str, Any]]:
+        if not yaml_load:
+            raise RuntimeError("yaml_min loader not available")
+        try:
+            return yaml_load(os.path.join(self.root, rel))
+        except Exception:
+            return None
+
+    def sync_index(self) -> int:
+        """Append agents that exist only as directories (hand-written,
+        yaml_autogen, select_or_generate) to the agent index, so the builder
+        and routing share one catalog. Returns the number of entries written.
+
+        This writes registry/agents.log.jsonl, so only writers and
+        `registry compile` call it; loading and refreshing never do.
+        """
+        self.ensure_fresh()
+        with self._lock:
+            entries = agent_index.read_index(self.root)
+            updates = []
+            for rel, spec in self._specs.items():
+                aid = spec.get("agent_id") if _is_agent(rel) else None
+                if not isinstance(aid, str) or not aid:
+                    continue
+                dir_rel = os.path.dirname(rel)
+                caps = _caps_of(spec)
+                cur = entries.get(aid)
+                if cur is None or (os.path.normpath(cur["path"]) == dir_rel and cur["capabilities"] != caps):
+                    updates.append((aid, dir_rel, caps))
+        if updates:
+            agent_index.register_many(updates, self.root)
+        return len(updates)
+
+    def _bump(self) -> None:
+        self.version += 1
+        self._index = None
+        self._derived.clear()
+
+    def _initial_load(self) -> None:
+        sources = snapshot.scan_sources(self.root)
+        data = snapshot.load_fresh(self.root, sources)
+        specs: Dict[str, Dict[str, Any]] = {}
+        if data is not None:
+            for a in data.get("agents") or []:
+                specs[a["path"]] = a["spec"]
+            for it in (data.get("intents") or {}).values():
+                specs[it["path"]] = it["spec"]
+        else:
+            for rel in sources:
+                spec = self._parse(rel)
+                if spec is not None:
+                    specs[rel] = spec
+        self._sources = sources
+        self._specs = specs
+        self._loaded = True
+        self._bump()
+
+    def refresh(self) -> bool:
+        """Stat all sources and apply changes. Returns True if anything changed."""
+        with self._lock:
+            if not self._loaded:
+                self._initial_load()
+                return True
+            current = snapshot.scan_sources(self.root)
+            if current == self._sources:
+                return False
+            for rel in list(self._sources):
+                if rel not in current:
+                    self._specs.pop(rel, None)
+            for rel, sig in current.items():
+                if self._sources.get(rel) == sig:
+                    continue
+                spec = self._parse(rel)
+                if spec is None:
+                    self._specs.pop(rel, None)
+                else:
+                    self._specs[rel] = spec
+            # keep walk order stable (sorted like scan_sources)
+            self._specs = {rel: self._specs[rel] for rel in current if rel in self._specs}
+            self._sources = current
+            self._bump()
+            return True
+
+    def notify(self, path: str) -> None:
+        """Apply an update for one agent/intent file (absolute or root-relative)."""
+        rel = os.path.relpath(os.path.abspath(os.path.join(self.root, path)), self.root)
+        with self._lock:
+            if not self._loaded:
+                self._initial_load()
+                return
+            try:
+                st = os.stat(os.path.join(self.root, rel))
+                sig = [st.st_mtime_ns, st.st_size]
+            except OSError:
+                sig = None
+            if sig is None:
+                if rel in self._sources:
+                    self._sources.pop(rel, None)
+                    self._specs.pop(rel, None)
+                    self._bump()
+                return
+            if self._sources.get(rel) == sig:
+                return
+            spec = self._parse(rel)
+            self._sources[rel] = sig
+            if spec is None:
+                self._specs.pop(rel, None)
+            else:
+                self._specs[rel] = spec
+            order = sorted(self._sources, key=_walk_key)
+            self._sources = {r: self._sources[r] for r in order}
+            self._specs = {r: self._specs[r] for r in order if r in self._specs}
+            self._bump()
+
+    def ensure_fresh(self) -> None:
+        """Make sure state reflects disk: no-op while the watcher runs."""
+        if self._watcher is not None and self._watcher.is_alive() and self._loaded:
+            return
+        self.refresh()
+
+    # ---- watcher ----
+    def start(self, interval: float = 2.0) -> None:
+        """Start a daemon thread that polls sources every `interval` seconds."""
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            self.refresh()
+            self._stop.clear()
+
+            def loop() -> None:
+                while not self._stop.wait(interval):
+                    try:
+                        self.refresh()
+                    except Exception:
+                        pass
+
+            self._watcher = threading.Thread(target=loop, name="live-registry", daemon=True)
+            self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        w = self._watcher
+        if w is not None:
+            w.join(timeout=5)
+        self._watcher = None
+
+    # ---- queries ----
+    def agents(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """[(abs_path, spec)] in walk order. Specs are shared: treat as read-only."""
+        self.ensure_fresh()
+        with self._lock:
+            return [(os.path.join(self.root, rel), spec) for rel, spec in self._specs.items() if _is_agent(rel)]
+
+    def intent(self, intent_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(abs_path, spec) for intents/<id>.yml (preferred) or .yaml. Spec is shared."""
+        self.ensure_fresh()
+        with self._lock:
+            for ext in (".yml", ".yaml"):
+                rel = os.path.join("intents", f"{intent_id}{ext}")
+                spec = self._specs.get(rel)
+                if spec is not None:
+                    return os.path.join(self.root, rel), spec
+        return None
+
+    def intents(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """[(abs_path, spec)] for all intents. Specs are shared: treat as read-only."""
+        self.ensure_fresh()
+        with self._lock:
+            return [(os.path.join(self.root, rel), spec) for rel, spec in self._specs.items() if not _is_agent(rel)]
+
+    def index(self, refresh: bool = True) -> CapabilityIndex:
+        if refresh:
+            self.ensure_fresh()
+        with self._lock:
+            if self._index is None:
+                self._index = CapabilityIndex(
+                    [(os.path.join(self.root, rel), spec) for rel, spec in self._specs.items() if _is_agent(rel)]
+                )
+            return self._index
+
+    def cached(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Memoize `compute()` under `key` until the registry version changes.
+
+        Does not refresh by itself; call after ensure_fresh() (or index()).
+        """
+        with self._lock:
+            version = self.version
+            if key in self._derived:
+                return self._derived[key]
+        value = compute()
+        with self._lock:
+            if self.version == version:
+                self._derived[key] = value
+        return value
+
+
+_registries: Dict[str, LiveRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def default_registry(root: Optional[str] = None) -> LiveRegistry:
+    """Process-wide LiveRegistry for `root` (project root by default)."""
+    root = os.path.abspath(root or _project_root())
+    with _registries_lock:
+        reg = _registries.get(root)
+        if reg is None:
+            reg = LiveRegistry(root)
+            _registries[root] = reg
+        return reg
@@ -0,0 +1,177 @@
+"""Agent self-tests (`self_test.smoke`) with results cached per spec hash.
+
+`run_selftests()` runs every agent's smoke commands concurrently: a bounded
+thread pool where each worker drives its agent's commands as subprocesses,
+each with its own timeout. Results go to `registry/selftest_cache.json`
+keyed by agent_id and tagged with the sha256 of the agent spec, so a result
+only applies while the spec is unchanged. Routing calls `broken_positions()`
+to skip agents whose cached self-test failed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..util import project_root
+
+
+CACHE_REL = os.path.join("registry", "selftest_cache.json")
+DEFAULT_TIMEOUT_S = 60
+
+# In-process memo of the decoded cache: root -> ((mtime_ns, size), data)
+_memo: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+
+def _project_root() -> str:
+    return project_root(os.path.dirname(__file__))
+
+
+def spec_hash(spec: Dict[str, Any]) -> str:
+    """sha256 of the spec in canonical JSON form."""
+    blob = json.dumps(spec, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def smoke_commands(spec: Dict[str, Any]) -> List[str]:
+    st = spec.get("self_test") if isinstance(spec, dict) else None
+    smoke = st.get("smoke") if isinstance(st, dict) else None
+    if isinstance(smoke, str):
+        smoke = [smoke]
+    if not isinstance(smoke, list):
+        return []
+    return [c for c in smoke if isinstance(c, str) and c.strip()]
+
+
+def cache_signature(root: Optional[str] = None) -> Tuple[int, int]:
+    try:
+        st = os.stat(os.path.join(root or _project_root(), CACHE_REL))
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return (0, -1)
+
+
+def load_cache(root: Optional[str] = None) -> Dict[str, Any]:
+    """{agent_id: {hash, ok, ts, results}}; shared, treat as read-only."""
+    root = root or _project_root()
+    sig = cache_signature(root)
+    hit = _memo.get(root)
+    if hit is not None and hit[0] == sig:
+        return hit[1]
+    data: Dict[str, Any] = {}
+    try:
+        with open(os.path.join(root, CACHE_REL), "r", encoding="utf-8") as f:
+            loaded = json.load(f)
+        if isinstance(loaded, dict):
+            data = loaded
+    except (OSError, ValueError):
+        pass
+    _memo[root] = (sig, data)
+    return data
+
+
+def _save_cache(root: str, data: Dict[str, Any]) -> None:
+    path = os.path.join(root, CACHE_REL)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def is_broken(spec: Dict[str, Any], cache: Dict[str, Any]) -> bool:
+    """True if the cached self-test for this exact spec failed."""
+    entry = cache.get(str(spec.get("agent_id") or ""))
+    if not isinstance(entry, dict) or entry.get("ok", True):
+        return False
+    return entry.get("hash") == spec_hash(spec)
+
+
+def broken_positions(agents: List[Tuple[str, Dict[str, Any]]], root: Optional[str] = None) -> Set[int]:
+    cache = load_cache(root)
+    if not cache:
+        return set()
+    return {pos for pos, (_p, spec) in enumerate(agents) if is_broken(spec, cache)}
+
+
+def _build_cmd(command: str, root: str) -> List[str]:
+    # "agent_cli --yaml ..." -> [python, bin/agent_cli, --yaml, ...]
+    argv = shlex.split(command)
+    if argv and os.path.exists(os.path.join(root, "bin", argv[0])):
+        py = os.environ.get("PYTHON", "python3")
+        return [py, os.path.join(root, "bin", argv[0]), *argv[1:]]
+    return argv
+
+
+def _run_one(command: str, root: str, timeout_s: int) -> Dict[str, Any]:
+    started = time.monotonic()
+    res: Dict[str, Any] = {"command": command}
+    try:
+        r = subprocess.run(
+            _build_cmd(command, root),
+            cwd=root,
+            capture_output=True,
+            text=True,
+            timeout=timeout_s if timeout_s and timeout_s > 0 else None,
+        )
+        res.update(rc=r.returncode, timeout=False, stderr=(r.stderr or "")[-2000:])
+    except subprocess.TimeoutExpired:
+        res.update(rc=124, timeout=True, stderr="")
+    except OSError as e:
+        res.update(rc=127, timeout=False, stderr=str(e))
+    res["wall_s"] = round(time.monotonic() - started, 3)
+    return res
+
+
+def _test_agent(spec: Dict[str, Any], root: str, timeout_s: int) -> Dict[str, Any]:
+    results = []
+    ok = True
+    for command in smoke_commands(spec):
+        res = _run_one(command, root, timeout_s)
+        results.append(res)
+        if res["rc"] != 0:
+            ok = False
+            break  # later smoke steps usually depend on earlier ones
+    return {"hash": spec_hash(spec), "ok": ok, "ts": round(time.time(), 3), "results": results}
+
+
+def run_selftests(
+    agents: Iterable[Tuple[str, Dict[str, Any]]],
+    jobs: Optional[int] = None,
+    timeout_s: int = DEFAULT_TIMEOUT_S,
+    force: bool = False,
+    root: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Run smoke tests for agents that declare them; returns {agent_id: entry}.
+
+    Agents whose spec hash already has a cached result are skipped unless
+    `force`. The cache file is updated once at the end.
+    """
+    root = root or _project_root()
+    cache = dict(load_cache(root))
+    todo: List[Tuple[str, Dict[str, Any]]] = []
+    out: Dict[str, Dict[str, Any]] = {}
+    for _path, spec in agents:
+        aid = str(spec.get("agent_id") or "")
+        if not aid or not smoke_commands(spec):
+            continue
+        cached = cache.get(aid)
+        if not force and isinstance(cached, dict) and cached.get("hash") == spec_hash(spec):
+            out[aid] = dict(cached, cached=True)
+            continue
+        todo.append((aid, spec))
+
+    if todo:
+        workers = max(1, min(jobs or (os.cpu_count() or 2), len(todo)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {aid: pool.submit(_test_agent, spec, root, timeout_s) for aid, spec in todo}
+            for aid, fut in futures.items():
+                out[aid] = cache[aid] = fut.result()
+        _save_cache(root, cache)
+    return out
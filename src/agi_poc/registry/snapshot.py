@@ -0,0 +1,160 @@
+"""Precompiled registry snapshot.
+
+`compile_snapshot()` parses every `agents/*/agent.yml` and `intents/*.yml`
+once and writes them, together with a manifest of source (mtime_ns, size)
+pairs, to `registry/snapshot.json`. The live registry calls `load_fresh()` on
+startup; when the manifest still matches the files on disk (one stat per
+source) the parsed specs are taken from the snapshot, otherwise it parses.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from yaml_min import load as yaml_load
+except Exception:  # pragma: no cover
+    yaml_load = None
+
+from ..util import project_root
+from . import agent_index
+
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_REL = os.path.join("registry", "snapshot.json")
+
+# In-process memo of the decoded snapshot: (path, mtime_ns, size) -> data
+_memo: Dict[str, Any] = {"key": None, "data": None}
+
+
+def _project_root() -> str:
+    return project_root(os.path.dirname(__file__))
+
+
+def snapshot_path(root: Optional[str] = None) -> str:
+    return os.path.join(root or _project_root(), SNAPSHOT_REL)
+
+
+def is_agent_source(rel: str) -> bool:
+    return os.path.basename(rel) == "agent.yml" and not rel.startswith("intents" + os.sep)
+
+
+def agent_sort_key(rel: str) -> Tuple[str, str]:
+    # agents/<name>/agent.yml -> by <name>; full path breaks ties
+    return (os.path.basename(os.path.dirname(rel)), rel)
+
+
+def scan_sources(root: Optional[str] = None) -> Dict[str, List[int]]:
+    """Return {relpath: [mtime_ns, size]} for all agent and intent specs.
+
+    Agents are the union of the agent index entries and the `agents/*`
+    directories, listed in sorted directory-name order so routing ties are
+    stable.
+    """
+    root = root or _project_root()
+    out: Dict[str, List[int]] = {}
+    agent_rels = set()
+    for entry in agent_index.read_index(root).values():
+        if entry.get("path"):
+            agent_rels.add(os.path.normpath(os.path.join(entry["path"], "agent.yml")))
+    agents_root = os.path.join(root, "agents")
+    if os.path.isdir(agents_root):
+        for name in os.listdir(agents_root):
+            agent_rels.add(os.path.join("agents", name, "agent.yml"))
+    for rel in sorted(agent_rels, key=agent_sort_key):
+        try:
+            st = os.stat(os.path.join(root, rel))
+        except OSError:
+            continue
+        out[rel] = [st.st_mtime_ns, st.st_size]
+    intents_dir = os.path.join(root, "intents")
+    if os.path.isdir(intents_dir):
+        for name in sorted(os.listdir(intents_dir)):
+            if not (name.endswith(".yml") or name.endswith(".yaml")):
+                continue
+            rel = os.path.join("intents", name)
+            try:
+                st = os.stat(os.path.join(root, rel))
+            except OSError:
+                continue
+            out[rel] = [st.st_mtime_ns, st.st_size]
+    return out
+
+
+def compile_snapshot(root: Optional[str] = None) -> Tuple[str, Dict[str, int]]:
+    """Parse all agent/intent specs and write the snapshot atomically.
+
+    Returns (snapshot_path, counts). Files that fail to parse are recorded in
+    the manifest (so the snapshot stays fresh) but omitted from the specs,
+    matching how the registries skip them.
+    """
+    if not yaml_load:
+        raise RuntimeError("yaml_min loader not available")
+    root = root or _project_root()
+    sources = scan_sources(root)
+    agents: List[Dict[str, Any]] = []
+    intents: Dict[str, Dict[str, Any]] = {}
+    for rel in sources:
+        try:
+            spec = yaml_load(os.path.join(root, rel))
+        except Exception:
+            continue
+        if is_agent_source(rel):
+            agents.append({"path": rel, "spec": spec})
+        else:
+            stem = os.path.splitext(os.path.basename(rel))[0]
+            # .yml wins over .yaml, mirroring yaml_registry.find_or_generate
+            if stem in intents and intents[stem]["path"].endswith(".yml"):
+                continue
+            intents[stem] = {"path": rel, "spec": spec}
+
+    data = {
+        "format": SNAPSHOT_FORMAT,
+        "sources": sources,
+        "agents": agents,
+        "intents": intents,
+    }
+    path = snapshot_path(root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return path, {"agents": len(agents), "intents": len(intents), "sources": len(sources)}
+
+
+def _read_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (path, st.st_mtime_ns, st.st_size)
+    if _memo["key"] == key:
+        return _memo["data"]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return None
+    if not isinstance(data, dict) or data.get("format") != SNAPSHOT_FORMAT:
+        return None
+    _memo["key"] = key
+    _memo["data"] = data
+    return data
+
+
+def load_fresh(root: Optional[str] = None, sources: Optional[Dict[str, List[int]]] = None) -> Optional[Dict[str, Any]]:
+    """Return the decoded snapshot if it matches the sources on disk, else None.
+
+    Pass `sources` when the caller already ran scan_sources() to skip a rescan.
+    """
+    root = root or _project_root()
+    data = _read_snapshot(snapshot_path(root))
+    if data is None:
+        return None
+    if data.get("sources") != (sources if sources is not None else scan_sources(root)):
+        return None
+    return data
+
@@ -5,12 +5,14 @@ from typing import Dict, Any, Tuple
 
 # Reuse existing minimal YAML loader if available
 try:
-    from yaml_min import load as yaml_load
+    from yaml_min import load_cached as yaml_load, clone as clone_spec
 except Exception:  # pragma: no cover
     yaml_load = None
+    clone_spec = None
 
 from ..yaml_simple import dump as yaml_dump_simple
 from ..util import project_root
+from .live_registry import default_registry
 
 
 def _project_root() -> str:
@@ -39,13 +41,13 @@ def find_or_generate(intent_id: str) -> Tuple[str, Dict[str, Any]]:
     """
     root = _project_root()
     intents_dir = os.path.join(root, "intents")
-    # Try .yml then .yaml
-    candidates = [
-        os.path.join(intents_dir, f"{intent_id}.yml"),
-        os.path.join(intents_dir, f"{intent_id}.yaml"),
-    ]
-    for p in candidates:
+    # Try .yml then .yaml (served from the in-memory registry)
+    hit = default_registry(root).intent(intent_id)
+    if hit is not None:
+        return hit[0], clone_spec(hit[1])
+    for p in (os.path.join(intents_dir, f"{intent_id}.yml"), os.path.join(intents_dir, f"{intent_id}.yaml")):
         if os.path.exists(p):
+            # present but unparsable: surface the loader error, never overwrite
             return p, _load_yaml(p)
 
     # Generate from basic template
@@ -71,4 +73,5 @@ def find_or_generate(intent_id: str) -> Tuple[str, Dict[str, Any]]:
     out_path = os.path.join(intents_dir, f"{intent_id}.yml")
     _ensure_dir(intents_dir)
     _dump_yaml(template, out_path)
+    default_registry(root).notify(out_path)
     return out_path, template
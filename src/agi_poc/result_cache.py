@@ -0,0 +1,291 @@
+"""Opt-in memoization of agent run results.
+
+Agents such as agent_cli are deterministic given (intent spec, agent spec,
+user request, agent code). `cache_key()` hashes the normalized specs, the
+request, the content of the agent's entry script and the shared code it
+builds on (src/yaml_min.py, src/agi_poc/ and templates/); `store()` keeps the
+files a successful run produced under runs/.cache/results/<key>/ and
+`materialize()` links them into a new run dir (hardlink, copy when linking is
+not possible) together with the recorded stdout/stderr.
+
+Only run-independent results are cached: outputs that mention the run_id are
+skipped, and so are runs whose stdout/stderr outgrew the in-memory tail
+(log_stream), since the cache replays them in full. Entries expire after a TTL and the cache is trimmed to a byte budget
+by least-recent use. Enable with AGI_POC_RESULT_CACHE=1 or `run --cache`;
+`--no-cache` overrides. Cached files are shared between runs, so writers must
+replace files rather than modify them in place.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from .schemas import normalize_agent_yaml, normalize_task_yaml
+from .util import project_root
+
+
+CACHE_REL = os.path.join("runs", ".cache", "results")
+CACHE_VERSION = 2
+DEFAULT_TTL_S = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Run bookkeeping that is never part of a cached result
+_RUN_META = {"logs.txt", "intent.yml", "agent.yml", "metrics.json", "partial.json", "budget.txt", "langstack.txt", "candidates"}
+
+# Code shared by the agents, relative to the project root: files, then trees
+SHARED_CODE = (os.path.join("src", "yaml_min.py"),)
+SHARED_TREES = ((os.path.join("src", "agi_poc"), (".py",)), ("templates", None))
+
+# path -> ((mtime_ns, size), sha256)
+_code_memo: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+
+def _project_root() -> str:
+    return project_root(os.path.dirname(__file__))
+
+
+def cache_dir(root: Optional[str] = None) -> str:
+    return os.path.join(root or _project_root(), CACHE_REL)
+
+
+def enabled(flag: Optional[bool] = None) -> bool:
+    """Explicit flag wins; otherwise AGI_POC_RESULT_CACHE=1 turns caching on."""
+    if flag is not None:
+        return bool(flag)
+    return os.environ.get("AGI_POC_RESULT_CACHE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name) or default)
+    except ValueError:
+        return default
+
+
+def _file_sha256(path: str) -> str:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ""
+    sig = (st.st_mtime_ns, st.st_size)
+    hit = _code_memo.get(path)
+    if hit is not None and hit[0] == sig:
+        return hit[1]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    _code_memo[path] = (sig, h.hexdigest())
+    return _code_memo[path][1]
+
+
+def agent_code_path(agent_spec: Dict[str, Any] | None, root: str) -> Optional[str]:
+    """File that implements the agent's entry point (bin/<command> or the python target)."""
+    entry = (agent_spec or {}).get("entry") if isinstance(agent_spec, dict) else None
+    if isinstance(entry, dict) and entry.get("type") == "python":
+        mod_name = str(entry.get("target") or "").rpartition(":")[0]
+        if "/" in mod_name or os.sep in mod_name or mod_name.endswith(".py"):
+            return mod_name if os.path.isabs(mod_name) else os.path.join(root, mod_name)
+        try:
+            spec = importlib.util.find_spec(mod_name) if mod_name else None
+        except (ImportError, ValueError):
+            spec = None
+        return spec.origin if spec is not None else None
+    if isinstance(entry, dict) and entry.get("type") == "cli":
+        return os.path.join(root, "bin", entry.get("command") or "agent_cli")
+    return os.path.join(root, "bin", "agent_cli")
+
+
+def _shared_code_files(root: str) -> List[str]:
+    files = [os.path.join(root, rel) for rel in SHARED_CODE]
+    for rel, exts in SHARED_TREES:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(root, rel)):
+            dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+            files.extend(
+                os.path.join(dirpath, name)
+                for name in sorted(filenames)
+                if exts is None or name.endswith(exts)
+            )
+    return files
+
+
+def code_fingerprint(root: Optional[str] = None) -> str:
+    """sha256 over the shared agent code (SHARED_CODE / SHARED_TREES).
+
+    One stat per file; contents are only rehashed when a file changed.
+    """
+    root = root or _project_root()
+    h = hashlib.sha256()
+    for path in _shared_code_files(root):
+        h.update(os.path.relpath(path, root).encode("utf-8"))
+        h.update(b"\0")
+        h.update(_file_sha256(path).encode("ascii"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def cache_key(
+    intent_spec: Dict[str, Any],
+    agent_spec: Dict[str, Any] | None,
+    user_request: str,
+    root: Optional[str] = None,
+) -> str:
+    root = root or _project_root()
+    code = agent_code_path(agent_spec, root)
+    payload = {
+        "v": CACHE_VERSION,
+        "intent": normalize_task_yaml(dict(intent_spec or {})),
+        "agent": normalize_agent_yaml(dict(agent_spec or {})),
+        "input": user_request,
+        "code": _file_sha256(code) if code else "",
+        "shared": code_fingerprint(root),
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def snapshot_outputs(run_dir: str) -> Dict[str, Tuple[int, int]]:
+    """{relpath: (mtime_ns, size)} of the files in run_dir outside run bookkeeping."""
+    out: Dict[str, Tuple[int, int]] = {}
+    for dirpath, dirnames, filenames in os.walk(run_dir):
+        if dirpath == run_dir:
+            dirnames[:] = [d for d in dirnames if d not in _RUN_META]
+            filenames = [f for f in filenames if f not in _RUN_META]
+        for name in filenames:
+            p = os.path.join(dirpath, name)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            out[os.path.relpath(p, run_dir)] = (st.st_mtime_ns, st.st_size)
+    return out
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    if os.path.lexists(dst):
+        os.unlink(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _mentions(path: str, needle: bytes) -> bool:
+    with open(path, "rb") as f:
+        return needle in f.read()
+
+
+def store(
+    key: str,
+    run_dir: str,
+    run_id: str,
+    before: Dict[str, Tuple[int, int]],
+    out: str,
+    err: str,
+    root: Optional[str] = None,
+) -> bool:
+    """Cache the files the run created or changed since `before`. False if not cacheable."""
+    after = snapshot_outputs(run_dir)
+    files = sorted(rel for rel, sig in after.items() if before.get(rel) != sig)
+    needle = run_id.encode("utf-8")
+    if not files or any(_mentions(os.path.join(run_dir, rel), needle) for rel in files):
+        return False
+    base = cache_dir(root)
+    final = os.path.join(base, key)
+    if os.path.isdir(final):
+        return True
+    tmp = os.path.join(base, f".tmp-{key[:16]}-{uuid.uuid4().hex[:8]}")
+    try:
+        for rel in files:
+            _link_or_copy(os.path.join(run_dir, rel), os.path.join(tmp, "files", rel))
+        meta = {
+            "created": time.time(),
+            "files": files,
+            "bytes": sum(after[rel][1] for rel in files),
+            "stdout": out.replace(run_id, "{run_id}"),
+            "stderr": err.replace(run_id, "{run_id}"),
+        }
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        try:
+            os.rename(tmp, final)
+        except OSError:
+            pass  # another run stored the same key first
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    evict(root=root)
+    return True
+
+
+def materialize(key: str, run_dir: str, run_id: str, root: Optional[str] = None) -> Optional[Tuple[str, str]]:
+    """Link a cached result into run_dir. Returns (stdout, stderr) on a hit, else None."""
+    entry = os.path.join(cache_dir(root), key)
+    meta_path = os.path.join(entry, "meta.json")
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    ttl = _env_number("AGI_POC_CACHE_TTL_S", DEFAULT_TTL_S)
+    if time.time() - float(meta.get("created") or 0) > ttl:
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+    try:
+        for rel in meta.get("files") or []:
+            _link_or_copy(os.path.join(entry, "files", rel), os.path.join(run_dir, rel))
+    except OSError:
+        return None  # evicted underneath us: treat as a miss
+    # meta.json mtime is the LRU stamp
+    try:
+        os.utime(meta_path)
+    except OSError:
+        pass
+    return (
+        str(meta.get("stdout") or "").replace("{run_id}", run_id),
+        str(meta.get("stderr") or "").replace("{run_id}", run_id),
+    )
+
+
+def evict(root: Optional[str] = None) -> int:
+    """Drop expired entries, then least recently used ones over the byte budget."""
+    base = cache_dir(root)
+    ttl = _env_number("AGI_POC_CACHE_TTL_S", DEFAULT_TTL_S)
+    max_bytes = _env_number("AGI_POC_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024)) * 1024 * 1024
+    now = time.time()
+    live = []
+    removed = 0
+    try:
+        names = os.listdir(base)
+    except OSError:
+        return 0
+    for name in names:
+        if name.startswith("."):
+            continue
+        meta_path = os.path.join(base, name, "meta.json")
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            used = os.stat(meta_path).st_mtime
+        except (OSError, ValueError):
+            continue
+        if now - float(meta.get("created") or 0) > ttl:
+            shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+            removed += 1
+            continue
+        live.append((used, int(meta.get("bytes") or 0), name))
+    total = sum(b for _u, b, _n in live)
+    for _used, size, name in sorted(live):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,163 @@
+"""Batch routing: intent detection, spec resolution and agent choice for many
+requests at once, without executing anything.
+
+`route_many()` loads the registry and builds the intent matcher / n-gram
+index once, detects all intents in one batch, then resolves each distinct
+intent and its agent(s) once and fans the result out to every request that
+shares it. `route_file()` backs `agi-poc route --batch requests.jsonl`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .intent import detect_intents
+from .registry import agent_registry, yaml_registry
+from .registry.live_registry import default_registry
+from .schemas import normalize_agent_yaml, normalize_task_yaml, validate_agent_yaml, validate_task_yaml
+from .util import project_root
+
+
+def _project_root() -> str:
+    return project_root(os.path.dirname(__file__))
+
+
+def _rel(path: Optional[str], root: str) -> Optional[str]:
+    return os.path.relpath(path, root) if path else None
+
+
+def _resolve_intent(intent_id: str, generate: bool, root: str) -> Dict[str, Any]:
+    reg = default_registry(root)
+    hit = reg.intent(intent_id)
+    if hit is None and generate:
+        hit = yaml_registry.find_or_generate(intent_id)
+    if hit is None:
+        return {"status": "no_intent", "generate_intent_path": os.path.join("intents", f"{intent_id}.yml")}
+    path, spec = hit
+    spec = normalize_task_yaml(dict(spec))
+    ok, msg = validate_task_yaml(spec)
+    if not ok:
+        return {"status": "invalid_intent", "error": msg, "intent_path": _rel(path, root)}
+    return {"status": "ok", "intent_path": _rel(path, root), "spec": spec}
+
+
+def _resolve_agents(
+    intent_id: str,
+    spec: Dict[str, Any],
+    strategy: str,
+    scoring: str,
+    generate: bool,
+    root: str,
+) -> Dict[str, Any]:
+    reqs = spec.get("agent_requirements") or []
+    candidates = []
+    if strategy != "simple":
+        candidates = agent_registry.list_candidates([*reqs, f"__intent_id__:{intent_id}"], scoring=scoring)
+    if strategy == "simple":
+        hit = agent_registry.select_existing(reqs, intent_id)
+        if hit is None and generate:
+            hit = agent_registry.select_or_generate(reqs, intent_id)
+    else:
+        hit = (candidates[0][0], candidates[0][1]) if candidates else None
+        if hit is None:
+            hit = agent_registry.select_existing(reqs, intent_id)
+        if hit is None and generate:
+            hit = agent_registry.select_or_generate(reqs, intent_id)
+    if hit is None:
+        # what select_or_generate would create at run time
+        return {"status": "no_agent", "generate_agent_id": f"auto_{intent_id}"}
+    path, agent_spec = hit
+    agent_spec = normalize_agent_yaml(dict(agent_spec))
+    ok, msg = validate_agent_yaml(agent_spec)
+    if not ok:
+        return {"status": "invalid_agent", "error": msg, "agent_path": _rel(path, root)}
+    out: Dict[str, Any] = {
+        "status": "ok",
+        "agent_id": agent_spec.get("agent_id"),
+        "agent_path": _rel(path, root),
+    }
+    if strategy in ("cascade", "parallel-cascade", "hedged"):
+        out["cascade"] = [c[1].get("agent_id") for c in candidates] or [agent_spec.get("agent_id")]
+    return out
+
+
+def route_many(
+    texts: Sequence[str],
+    strategy: str = "simple",
+    scoring: str = "capability",
+    generate: bool = False,
+) -> List[Dict[str, Any]]:
+    """Routing plan for each text (same order): intent, intent spec path, agent.
+
+    Nothing is executed. Missing intents/agents are reported with a status
+    instead of being generated unless `generate` is set.
+    """
+    root = _project_root()
+    default_registry(root).ensure_fresh()
+    intent_ids = detect_intents(list(texts))
+
+    intents: Dict[str, Dict[str, Any]] = {}
+    agents: Dict[str, Dict[str, Any]] = {}
+    plans: List[Dict[str, Any]] = []
+    for text, intent_id in zip(texts, intent_ids):
+        res = intents.get(intent_id)
+        if res is None:
+            res = intents[intent_id] = _resolve_intent(intent_id, generate, root)
+        plan: Dict[str, Any] = {"request": text, "intent_id": intent_id, "strategy": strategy}
+        if res["status"] != "ok":
+            plan.update({k: v for k, v in res.items() if k != "spec"})
+            plans.append(plan)
+            continue
+        plan["intent_path"] = res["intent_path"]
+        plan["timeout_s"] = res["spec"].get("timeout_s")
+        ares = agents.get(intent_id)
+        if ares is None:
+            ares = agents[intent_id] = _resolve_agents(intent_id, res["spec"], strategy, scoring, generate, root)
+        plan.update(ares)
+        plans.append(plan)
+    return plans
+
+
+def read_requests(lines: Iterable[str]) -> Iterator[Tuple[Optional[Any], str]]:
+    """Yield (id, text) from JSONL: a JSON string, an object with
+    request/text/input (and optional id), or a raw text line."""
+    for n, line in enumerate(lines, start=1):
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            yield n, line
+            continue
+        if isinstance(obj, str):
+            yield n, obj
+        elif isinstance(obj, dict):
+            text = obj.get("request") or obj.get("text") or obj.get("input") or ""
+            yield obj.get("id", n), str(text)
+        else:
+            yield n, line
+
+
+def route_file(
+    src: str,
+    out,
+    strategy: str = "simple",
+    scoring: str = "capability",
+    generate: bool = False,
+) -> Dict[str, int]:
+    """Route every request in `src` ('-' for stdin) and write JSONL plans to `out`."""
+    if src == "-":
+        items = list(read_requests(sys.stdin))
+    else:
+        with open(src, "r", encoding="utf-8") as f:
+            items = list(read_requests(f))
+    plans = route_many([t for _id, t in items], strategy=strategy, scoring=scoring, generate=generate)
+    counts: Dict[str, int] = {}
+    for (rid, _t), plan in zip(items, plans):
+        out.write(json.dumps({"id": rid, **plan}, ensure_ascii=False) + "\n")
+        counts[plan["status"]] = counts.get(plan["status"], 0) + 1
+    return counts
@@ -0,0 +1,153 @@
+"""Per-agent run history and the statistics used for history-aware ranking.
+
+Every agent trial (one execute_with_retry + evaluate_success) appends a line
+to `runs/history.jsonl`. `load_stats()` aggregates it per (intent_id,
+agent_id) into success rate, p50/p90/p95/p99 wall time and timeout rate, and
+`expected_time_to_success()` turns those into a sort key for cascades.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .util import project_root
+
+
+HISTORY_REL = os.path.join("runs", "history.jsonl")
+
+# Beta(1, 1) prior on success and a prior wall time for agents with little
+# or no history, so a single lucky/unlucky run does not dominate the order.
+PRIOR_RUNS = 2
+PRIOR_SUCCESSES = 1
+PRIOR_WALL_S = 30.0
+
+# In-process memo: root -> ((mtime_ns, size), stats)
+_memo: Dict[str, Tuple[Tuple[int, int], Dict[Tuple[str, str], Dict[str, Any]]]] = {}
+
+
+def _project_root() -> str:
+    return project_root(os.path.dirname(__file__))
+
+
+def history_path(root: Optional[str] = None) -> str:
+    return os.path.join(root or _project_root(), HISTORY_REL)
+
+
+def record_attempt(
+    intent_id: str,
+    agent_id: str,
+    rc: int,
+    wall_s: float,
+    success: bool,
+    timed_out: bool = False,
+    run_id: Optional[str] = None,
+    root: Optional[str] = None,
+) -> None:
+    """Append one agent trial to the history (best effort)."""
+    rec = {
+        "ts": round(time.time(), 3),
+        "run_id": run_id,
+        "intent_id": intent_id,
+        "agent_id": agent_id,
+        "rc": rc,
+        "timeout": bool(timed_out),
+        "wall_s": round(float(wall_s), 3),
+        "success": bool(success),
+    }
+    path = history_path(root)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # One short O_APPEND write per record keeps concurrent runs line-atomic
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    except OSError:
+        pass
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+def _summarize(walls: List[float], successes: int, timeouts: int) -> Dict[str, Any]:
+    walls = sorted(walls)
+    n = len(walls)
+    return {
+        "runs": n,
+        "successes": successes,
+        "success_rate": successes / n if n else 0.0,
+        "timeout_rate": timeouts / n if n else 0.0,
+        "mean_s": sum(walls) / n if n else 0.0,
+        "p50_s": _percentile(walls, 0.50),
+        "p90_s": _percentile(walls, 0.90),
+        "p95_s": _percentile(walls, 0.95),
+        "p99_s": _percentile(walls, 0.99),
+    }
+
+
+def load_stats(root: Optional[str] = None) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Aggregate history into {(intent_id, agent_id): stats}.
+
+    An ("*", agent_id) entry pools every intent for the agent. Recomputed only
+    when the history file changes; the returned mapping is shared (read-only).
+    """
+    root = root or _project_root()
+    path = history_path(root)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {}
+    sig = (st.st_mtime_ns, st.st_size)
+    hit = _memo.get(root)
+    if hit is not None and hit[0] == sig:
+        return hit[1]
+
+    raw: Dict[Tuple[str, str], Tuple[List[float], List[int]]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            aid = rec.get("agent_id") if isinstance(rec, dict) else None
+            if not aid:
+                continue
+            for key in ((str(rec.get("intent_id") or ""), aid), ("*", aid)):
+                walls, counts = raw.setdefault(key, ([], [0, 0]))
+                walls.append(float(rec.get("wall_s") or 0.0))
+                counts[0] += 1 if rec.get("success") else 0
+                counts[1] += 1 if rec.get("timeout") else 0
+
+    stats = {key: _summarize(walls, counts[0], counts[1]) for key, (walls, counts) in raw.items()}
+    _memo[root] = (sig, stats)
+    return stats
+
+
+def agent_stats(
+    stats: Dict[Tuple[str, str], Dict[str, Any]], intent_id: Optional[str], agent_id: str
+) -> Optional[Dict[str, Any]]:
+    """Stats for (intent_id, agent_id), falling back to the agent's pooled stats."""
+    if intent_id:
+        s = stats.get((intent_id, agent_id))
+        if s is not None:
+            return s
+    return stats.get(("*", agent_id))
+
+
+def expected_time_to_success(s: Optional[Dict[str, Any]]) -> float:
+    """Expected seconds spent on this agent per success: E[wall] / P(success).
+
+    Both terms are smoothed towards the priors; an agent that has never
+    succeeded still gets a finite (large) value so it keeps a cascade slot.
+    """
+    runs = s["runs"] if s else 0
+    successes = s["successes"] if s else 0
+    mean_s = s["mean_s"] if s else 0.0
+    p = (successes + PRIOR_SUCCESSES) / (runs + PRIOR_RUNS)
+    wall = (mean_s * runs + PRIOR_WALL_S * PRIOR_RUNS) / (runs + PRIOR_RUNS)
+    return wall / p
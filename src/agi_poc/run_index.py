@@ -0,0 +1,290 @@
+"""SQLite index of runs (runs/.index.sqlite, WAL mode).
+
+`prepare_run_dir`, bin/agi and the orchestrator CLIs insert a row per run
+and the CLI / LangStack / LangGraph flows update it on phase transitions,
+so dashboards and /status can find the latest runs with an indexed
+`ORDER BY created_at DESC LIMIT n` instead of listing and stat-ing every
+entry under runs/. `recent_run_ids()` merges those rows with a walk of the
+newest date shards, so a run dir created by a writer that skipped the index
+is still listed. `reindex()` (`agi-poc runs reindex`) backfills rows for
+runs created before the index existed.
+
+All writes are best effort: a locked or unwritable index never fails a run.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from . import run_paths
+from .util import project_root
+
+
+INDEX_REL = os.path.join("runs", ".index.sqlite")
+COLUMNS = ("intent", "agent", "phase", "validation", "ok", "cost_usd", "duration_s")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    intent TEXT,
+    agent TEXT,
+    phase TEXT,
+    validation TEXT,
+    ok INTEGER,
+    cost_usd REAL,
+    duration_s REAL
+);
+CREATE INDEX IF NOT EXISTS runs_created_at ON runs (created_at DESC);
+CREATE INDEX IF NOT EXISTS runs_phase ON runs (phase, created_at DESC);
+"""
+
+_ready: set = set()
+_ready_lock = threading.Lock()
+
+
+def _project_root() -> str:
+    return project_root(os.path.dirname(__file__))
+
+
+def index_path(root: Optional[str] = None) -> str:
+    return os.path.join(root or _project_root(), INDEX_REL)
+
+
+def _connect(root: Optional[str] = None) -> sqlite3.Connection:
+    path = index_path(root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fresh = not os.path.exists(path)
+    conn = sqlite3.connect(path, timeout=5.0)
+    conn.row_factory = sqlite3.Row
+    with _ready_lock:
+        if fresh or path not in _ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _ready.add(path)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def available(root: Optional[str] = None) -> bool:
+    return os.path.exists(index_path(root))
+
+
+def _to_row(row: sqlite3.Row) -> Dict[str, Any]:
+    out = dict(row)
+    if out.get("ok") is not None:
+        out["ok"] = bool(out["ok"])
+    return out
+
+
+def record(run_id: str, created_at: Optional[float] = None, root: Optional[str] = None, **fields: Any) -> None:
+    """Insert or update a run. Only the given fields are changed on update."""
+    vals = {k: v for k, v in fields.items() if k in COLUMNS}
+    if "ok" in vals and vals["ok"] is not None:
+        vals["ok"] = 1 if vals["ok"] else 0
+    now = time.time()
+    cols = ["run_id", "created_at", "updated_at", *vals]
+    first_seen = created_at if created_at is not None else (run_paths.created_at(run_id) or now)
+    params = [run_id, first_seen, now, *vals.values()]
+    updates = ", ".join(["updated_at = excluded.updated_at", *(f"{k} = excluded.{k}" for k in vals)])
+    if created_at is not None:
+        updates += ", created_at = excluded.created_at"
+    sql = (
+        f"INSERT INTO runs ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)}) "
+        f"ON CONFLICT(run_id) DO UPDATE SET {updates}"
+    )
+    try:
+        conn = _connect(root)
+        try:
+            with conn:
+                conn.execute(sql, params)
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def update(run_id: str, root: Optional[str] = None, **fields: Any) -> None:
+    """Phase transition / result update for an existing (or new) run."""
+    if run_id:
+        record(run_id, root=root, **fields)
+
+
+def recent(limit: int = 20, phase: Optional[str] = None, root: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Latest runs, newest first."""
+    if not available(root):
+        return []
+    sql = "SELECT * FROM runs"
+    params: List[Any] = []
+    if phase:
+        sql += " WHERE phase = ?"
+        params.append(phase)
+    sql += " ORDER BY created_at DESC LIMIT ?"
+    params.append(int(limit))
+    try:
+        conn = _connect(root)
+        try:
+            return [_to_row(r) for r in conn.execute(sql, params)]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return []
+
+
+def recent_run_ids(limit: int = 20, root: Optional[str] = None) -> List[str]:
+    """Newest run ids: index rows merged with a walk of the newest date shards.
+
+    Rows whose run dir is gone are dropped; run dirs missing from the index
+    are ordered by the time in their id (or their mtime for legacy ids).
+    """
+    root = root or _project_root()
+    created: Dict[str, float] = {}
+    for row in recent(limit, root=root):
+        if os.path.isdir(run_paths.run_dir(row["run_id"], root)):
+            created[row["run_id"]] = float(row["created_at"] or 0.0)
+    for rid in run_paths.recent_run_ids(limit, root):
+        if rid in created:
+            continue
+        ts = run_paths.created_at(rid)
+        if ts is None:
+            try:
+                ts = os.stat(run_paths.run_dir(rid, root)).st_mtime
+            except OSError:
+                continue
+        created[rid] = ts
+    return sorted(created, key=lambda rid: created[rid], reverse=True)[:limit]
+
+
+def get(run_id: str, root: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    if not run_id or not available(root):
+        return None
+    try:
+        conn = _connect(root)
+        try:
+            row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return _to_row(row) if row is not None else None
+
+
+# ---- backfill ----
+_PHASE_MARKERS = (
+    ("[deploy]", "deployed"),
+    ("deploy_demo: done", "deployed"),
+    ("[review]", "reviewed"),
+    ("review: approved", "reviewed"),
+    ("[validation]", "validated"),
+    ("validation: ", "validated"),
+    ("[execution]", "executed"),
+    ("agent[", "executed"),
+    ("[planning]", "planned"),
+    ("[intent]", "intent_detected"),
+)
+
+
+def _read(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def _spec_id(path: str, key: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    val = data.get(key) if isinstance(data, dict) else None
+    return str(val) if val else None
+
+
+def derive(run_id: str, run_dir: str) -> Dict[str, Any]:
+    """Index fields reconstructed from the files of an existing run dir."""
+    fields: Dict[str, Any] = {
+        "intent": _spec_id(os.path.join(run_dir, "intent.yml"), "intent_id"),
+        "agent": _spec_id(os.path.join(run_dir, "agent.yml"), "agent_id"),
+        "phase": "created",
+        "validation": None,
+        "ok": None,
+    }
+    logs = _read(os.path.join(run_dir, "logs.txt"))
+    stack = _read(os.path.join(run_dir, "langstack.txt"))
+    if logs:
+        fields["phase"] = "executed"
+        m = re.findall(r"evaluator_success=(True|False)", logs)
+        if m:
+            fields["ok"] = m[-1] == "True"
+    phase = None
+    for ln in reversed(stack.splitlines()):
+        low = ln.lower()
+        if fields["validation"] is None:
+            if "changes_requested" in low or "changes requested" in low:
+                fields["validation"] = "changes_requested"
+            elif "validation" in low and "approved" in low:
+                fields["validation"] = "approved"
+        if phase is None:
+            phase = next((ph for marker, ph in _PHASE_MARKERS if marker in low), None)
+        if phase and fields["validation"]:
+            break
+    if phase:
+        fields["phase"] = phase
+    try:
+        with open(os.path.join(run_dir, "validation.json"), "r", encoding="utf-8") as f:
+            v = json.load(f)
+        if isinstance(v, dict) and isinstance(v.get("ok"), bool):
+            fields["ok"] = v["ok"]
+    except (OSError, ValueError):
+        pass
+    m = re.search(r"cost_usd\s*[:=]\s*([0-9]+(?:\.[0-9]+)?)", stack, re.IGNORECASE)
+    if m:
+        fields["cost_usd"] = float(m.group(1))
+    return fields
+
+
+def reindex(root: Optional[str] = None) -> int:
+    """Backfill rows for run dirs missing from the index and drop rows whose
+    run dir is gone. Rows written live are kept as they are. Returns the
+    number of rows added."""
+    root = root or _project_root()
+    dirs = dict(run_paths.iter_run_dirs(root))
+    names = set(dirs)
+    sql = (
+        "INSERT INTO runs (run_id, created_at, updated_at, intent, agent, phase, validation, ok, cost_usd)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(run_id) DO NOTHING"
+    )
+    try:
+        conn = _connect(root)
+        try:
+            indexed = {rid for (rid,) in conn.execute("SELECT run_id FROM runs")}
+            params = []
+            for name in sorted(names - indexed):
+                run_dir = dirs[name]
+                try:
+                    mtime = os.stat(run_dir).st_mtime
+                except OSError:
+                    continue
+                f = derive(name, run_dir)
+                ok = None if f["ok"] is None else int(bool(f["ok"]))
+                created = run_paths.created_at(name) or mtime
+                params.append(
+                    (name, created, mtime, f["intent"], f["agent"], f["phase"], f["validation"], ok, f.get("cost_usd"))
+                )
+            with conn:
+                conn.executemany(sql, params)
+                conn.executemany("DELETE FROM runs WHERE run_id = ?", [(rid,) for rid in indexed - names])
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return 0
+    return len(params)
@@ -0,0 +1,169 @@
+"""Run ids and the runs/ directory layout.
+
+New runs get ULIDs (26 chars of Crockford base32: a 48-bit millisecond
+timestamp followed by 80 random bits). They sort by creation time, are
+monotonic within a process (ids minted in the same millisecond increment the
+random part) and do not collide across concurrent processes.
+
+Run dirs are sharded by the UTC date of the id, runs/YYYY/MM/DD/<ulid>, so
+no directory grows without bound. The shard is derived from the id itself:
+`run_dir()` / `run_rel()` map any run_id to its path without a lookup.
+Legacy ids (`20250101T120000_abcd1234`, LangGraph `20250101_120000`) keep
+resolving to the flat runs/<id>. A run_id may carry a sub path
+(`<ulid>/candidates/<agent>`); only its first segment selects the shard.
+
+Output templates such as `runs/{run_id}/SPEC.md` must be expanded with
+`render_path()` rather than a plain `{run_id}` replacement.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import secrets
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from .util import project_root
+
+
+RUNS_REL = "runs"
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_ULID_RE = re.compile(r"^[0-7][0-9A-HJKMNP-TV-Z]{25}$")
+_YEAR_RE = re.compile(r"^\d{4}$")
+_TWO_DIGITS = re.compile(r"^\d{2}$")
+_LEGACY_TIME = (("%Y%m%dT%H%M%S", 15), ("%Y%m%d_%H%M%S", 15))
+_RAND_MAX = (1 << 80) - 1
+
+_lock = threading.Lock()
+_last: List[int] = [0, 0]  # [ms, random] of the last id minted here
+
+
+def _project_root() -> str:
+    return project_root(os.path.dirname(__file__))
+
+
+def runs_base(root: Optional[str] = None) -> str:
+    return os.path.join(root or _project_root(), RUNS_REL)
+
+
+def _encode(value: int, length: int) -> str:
+    out = []
+    for _ in range(length):
+        value, r = divmod(value, 32)
+        out.append(_ALPHABET[r])
+    return "".join(reversed(out))
+
+
+def new_run_id() -> str:
+    """Sortable, monotonic, collision-free run id (ULID)."""
+    ms = int(time.time() * 1000)
+    with _lock:
+        if ms <= _last[0]:
+            ms, rand = _last[0], _last[1] + 1
+            if rand > _RAND_MAX:
+                ms, rand = ms + 1, secrets.randbits(80)
+        else:
+            rand = secrets.randbits(80)
+        _last[0], _last[1] = ms, rand
+    return _encode(ms, 10) + _encode(rand, 16)
+
+
+def is_ulid(run_id: str) -> bool:
+    return bool(_ULID_RE.match(run_id or ""))
+
+
+def _ulid_ms(ulid: str) -> int:
+    ms = 0
+    for ch in ulid[:10]:
+        ms = ms * 32 + _ALPHABET.index(ch)
+    return ms
+
+
+def created_at(run_id: str) -> Optional[float]:
+    """Creation time encoded in the run id (ULID or legacy timestamp), if any."""
+    head = (run_id or "").split("/", 1)[0]
+    if is_ulid(head):
+        return _ulid_ms(head) / 1000.0
+    for fmt, n in _LEGACY_TIME:
+        try:
+            return time.mktime(time.strptime(head[:n], fmt))
+        except ValueError:
+            continue
+    return None
+
+
+def shard(run_id: str) -> str:
+    """Relative dir of a run under runs/: YYYY/MM/DD/<ulid>, or the legacy flat id."""
+    head, sep, rest = (run_id or "").partition("/")
+    if not is_ulid(head):
+        return run_id
+    day = time.strftime("%Y/%m/%d", time.gmtime(_ulid_ms(head) / 1000.0))
+    return f"{day}/{head}{sep}{rest}"
+
+
+def run_rel(run_id: str) -> str:
+    """Project-relative run dir, e.g. runs/2026/10/17/01J...; always '/'-separated."""
+    return f"{RUNS_REL}/{shard(run_id)}"
+
+
+def run_dir(run_id: str, root: Optional[str] = None) -> str:
+    return os.path.join(root or _project_root(), *run_rel(run_id).split("/"))
+
+
+def render_path(template: str, run_id: str) -> str:
+    """Expand `{run_id}` in an intent output path, placing runs/{run_id} in its shard."""
+    return template.replace(f"{RUNS_REL}/{{run_id}}", run_rel(run_id)).replace("{run_id}", run_id)
+
+
+def _subdirs(path: str, pattern: Optional[re.Pattern] = None) -> List[str]:
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return []
+    return sorted(
+        n for n in names
+        if not n.startswith(".") and (pattern is None or pattern.match(n)) and os.path.isdir(os.path.join(path, n))
+    )
+
+
+def _iter_sharded(base: str, newest_first: bool) -> Iterator[Tuple[str, str]]:
+    order = reversed if newest_first else iter
+    for year in order(_subdirs(base, _YEAR_RE)):
+        for month in order(_subdirs(os.path.join(base, year), _TWO_DIGITS)):
+            for day in order(_subdirs(os.path.join(base, year, month), _TWO_DIGITS)):
+                ddir = os.path.join(base, year, month, day)
+                for name in order(_subdirs(ddir)):
+                    yield name, os.path.join(ddir, name)
+
+
+def iter_run_dirs(root: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+    """(run_id, path) for every run dir, sharded and legacy flat ones."""
+    base = runs_base(root)
+    for name in _subdirs(base):
+        if not _YEAR_RE.match(name):
+            yield name, os.path.join(base, name)
+    yield from _iter_sharded(base, newest_first=False)
+
+
+def recent_run_ids(limit: int = 20, root: Optional[str] = None) -> List[str]:
+    """Newest run ids by creation time, walking only the newest shards."""
+    base = runs_base(root)
+    entries: List[Tuple[float, str]] = []
+    for name, _path in _iter_sharded(base, newest_first=True):
+        if len(entries) >= limit:
+            break
+        entries.append((created_at(name) or 0.0, name))
+    for name in _subdirs(base):
+        if _YEAR_RE.match(name):
+            continue
+        ts = created_at(name)
+        if ts is None:
+            try:
+                ts = os.stat(os.path.join(base, name)).st_mtime
+            except OSError:
+                continue
+        entries.append((ts, name))
+    entries.sort(reverse=True)
+    return [name for _, name in entries[:limit]]
@@ -1,14 +1,15 @@
 from __future__ import annotations
 
-import json
 import os
-import subprocess
 import time
-import uuid
 from typing import Dict, Any, Tuple, Optional
 
 
+from . import log_stream, markdown_index, metrics, object_store, result_cache, run_index, run_paths, salvage
+from .deadline import Deadline, backoff_s
+from .inproc import run_python_entry
 from .util import project_root
+from .worker_pool import default_pool
 
 
 def _project_root() -> str:
@@ -20,20 +21,33 @@ def _ensure_dir(p: str) -> None:
 
 
 def prepare_run_dir() -> Tuple[str, str]:
-    root = _project_root()
-    runs_root = os.path.join(root, "runs")
-    _ensure_dir(runs_root)
-    run_id = time.strftime("%Y%m%dT%H%M%S") + "_" + str(uuid.uuid4())[:8]
-    run_dir = os.path.join(runs_root, run_id)
+    # ULID run id; the dir lands in its date shard runs/YYYY/MM/DD/<run_id>
+    run_id = run_paths.new_run_id()
+    run_dir = run_paths.run_dir(run_id, _project_root())
     _ensure_dir(run_dir)
+    run_index.record(run_id, created_at=time.time(), phase="created")
     return run_id, run_dir
 
 
 def persist_specs(run_dir: str, intent_spec: Dict[str, Any], agent_spec: Dict[str, Any]) -> None:
-    with open(os.path.join(run_dir, "intent.yml"), "w", encoding="utf-8") as f:
-        json.dump(intent_spec, f, ensure_ascii=False, indent=2)
-    with open(os.path.join(run_dir, "agent.yml"), "w", encoding="utf-8") as f:
-        json.dump(agent_spec, f, ensure_ascii=False, indent=2)
+    # Deduplicated across runs via runs/.objects
+    object_store.write_json(os.path.join(run_dir, "intent.yml"), intent_spec)
+    object_store.write_json(os.path.join(run_dir, "agent.yml"), agent_spec)
+
+
+def _agent_id(agent_spec: Dict[str, Any] | None) -> Optional[str]:
+    aid = agent_spec.get("agent_id") if isinstance(agent_spec, dict) else None
+    return str(aid) if aid else None
+
+
+def _render_args(args: Any, intent_yaml_path: str, user_request: str, run_id: str) -> list[str]:
+    rendered = []
+    for a in args or []:
+        if not isinstance(a, str):
+            continue
+        a = a.replace("{yaml}", intent_yaml_path).replace("{input}", user_request).replace("{run_id}", run_id)
+        rendered.append(a)
+    return rendered
 
 
 def _build_cmd_from_agent(agent_spec: Dict[str, Any] | None, intent_yaml_path: str, user_request: str, run_id: str) -> list[str]:
@@ -45,13 +59,7 @@ def _build_cmd_from_agent(agent_spec: Dict[str, Any] | None, intent_yaml_path: s
             cmd_name = entry.get("command") or "agent_cli"
             # resolve to bin/<cmd_name>
             cmd_path = os.path.join(root, "bin", cmd_name)
-            args = entry.get("args") or []
-            rendered = []
-            for a in args:
-                if not isinstance(a, str):
-                    continue
-                a = a.replace("{yaml}", intent_yaml_path).replace("{input}", user_request).replace("{run_id}", run_id)
-                rendered.append(a)
+            rendered = _render_args(entry.get("args"), intent_yaml_path, user_request, run_id)
             return [py, cmd_path, *rendered]
     # fallback to default agent_cli
     agent_cli = os.path.join(root, "bin", "agent_cli")
@@ -67,20 +75,35 @@ def _build_cmd_from_agent(agent_spec: Dict[str, Any] | None, intent_yaml_path: s
     ]
 
 
-def run_agent(intent_yaml_path: str, user_request: str, run_id: str, timeout_s: Optional[int] = None, agent_spec: Dict[str, Any] | None = None) -> Tuple[int, str, str, bool]:
+def run_agent(
+    intent_yaml_path: str,
+    user_request: str,
+    run_id: str,
+    timeout_s: Optional[float] = None,
+    agent_spec: Dict[str, Any] | None = None,
+    log: Optional[log_stream.AttemptLog] = None,
+) -> Tuple[int, str, str, bool]:
+    """Run one attempt. CLI agents stream their output into `log` (logs.txt) as it
+    arrives; the returned stdout/stderr are bounded tails."""
     root = _project_root()
+    # Partial outputs of a timed-out attempt are offered to the retry (AGI_POC_PARTIAL)
+    extra_env = salvage.agent_vars(run_paths.run_dir(run_id, root))
+    entry = (agent_spec or {}).get("entry") if isinstance(agent_spec, dict) else None
+    if isinstance(entry, dict) and entry.get("type") == "python":
+        # In-process call of module:function (no process creation)
+        rendered = _render_args(entry.get("args"), intent_yaml_path, user_request, run_id)
+        usage: Dict[str, Any] = {}
+        res = run_python_entry(str(entry.get("target") or ""), rendered, root, timeout_s, usage, extra_env)
+        if log is not None and usage:
+            log.usage = usage
+        return res
     cmd = _build_cmd_from_agent(agent_spec, intent_yaml_path, user_request, run_id)
-    try:
-        r = subprocess.run(
-            cmd,
-            cwd=root,
-            capture_output=True,
-            text=True,
-            timeout=timeout_s if timeout_s and timeout_s > 0 else None,
-        )
-        return r.returncode, r.stdout or "", r.stderr or "", False
-    except subprocess.TimeoutExpired as e:
-        return 124, e.stdout or "", e.stderr or "", True
+    # Opt-in warm workers (AGI_POC_WORKERS=n) for bin/ scripts: no interpreter startup per attempt
+    pool = default_pool()
+    if pool is not None and len(cmd) >= 2 and os.path.dirname(os.path.abspath(cmd[1])) == os.path.join(root, "bin"):
+        return pool.run(cmd[1], cmd[2:], root, timeout_s, log, extra_env)
+    env = dict(os.environ, **extra_env) if extra_env else None
+    return log_stream.run_streaming(cmd, root, timeout_s, log or log_stream.AttemptLog(None, 0), env)
 
 
 def summarize_plan(intent_spec: Dict[str, Any], agent_spec: Dict[str, Any]) -> str:
@@ -107,8 +130,9 @@ def write_log(run_dir: str, content: str) -> None:
 def evaluate_success(intent_spec: Dict[str, Any], run_id: str) -> bool:
     """Simple success evaluator based on outputs and optional token hints.
 
-    - Check outputs[0].path existence (with {run_id} substitution)
-    - If success_criteria mentions tokens like 目的/非目標/データモデル/フロー, ensure those tokens appear in content
+    - Check outputs[0].path existence (with {run_id} expanded by run_paths.render_path)
+    - For SPEC documents, check the required sections, API / data model tables,
+      use cases and acceptance bullets on its section tree (markdown_index)
     """
     root = _project_root()
     outputs = intent_spec.get("outputs") or []
@@ -116,7 +140,7 @@ def evaluate_success(intent_spec: Dict[str, Any], run_id: str) -> bool:
     if outputs:
         first = outputs[0]
         if isinstance(first, dict) and "path" in first:
-            out_path = first["path"].replace("{run_id}", run_id)
+            out_path = run_paths.render_path(first["path"], run_id)
     if not out_path:
         return False
     out_abs = os.path.join(root, out_path)
@@ -138,63 +162,97 @@ def evaluate_success(intent_spec: Dict[str, Any], run_id: str) -> bool:
         return False
     # SPEC quality checks: presence of key sections and minimal structure
     try:
-        with open(out_abs, "r", encoding="utf-8") as f:
-            content = f.read()
+        md = markdown_index.load_cached(out_abs)
     except Exception:
         return False
-
-    def has_section(name: str) -> bool:
-        return (f"## {name}" in content) or (f"### {name}" in content)
-
-    required_sections = [
-        "目的",
-        "非目標",
-        "機能一覧",
-        "ユースケース",
-        "画面要件",
-        "API 仕様",
-        "データモデル",
-        "受入条件",
-    ]
-    if not all(has_section(s) for s in required_sections):
+    if md.missing_sections():
         return False
 
     # API table must include Method and Path columns
-    if "## API 仕様" in content:
-        api_header_ok = ("| Method |" in content) and ("| Path |" in content)
-        if not api_header_ok:
-            return False
+    api = md.section("API 仕様")
+    if api is not None and not api.has_table("Method", "Path"):
+        return False
 
-    # Data model requires at least 3 entities and attributes table present
-    dm_idx = content.find("## データモデル")
-    if dm_idx != -1:
-        dm_section = content[dm_idx:]
-        entity_rows = [ln for ln in dm_section.splitlines() if ln.strip().startswith("| ") and "エンティティ" not in ln and "--------------" not in ln]
-        if len(entity_rows) < 3:
-            return False
-        # attribute tables: count lines under "属性" headers
-        attr_tables = [ln for ln in dm_section.splitlines() if "| 属性 |" in ln]
-        if not attr_tables:
+    # Data model requires at least 3 entity rows and an attributes table
+    dm = md.section("データモデル")
+    if dm is not None:
+        if sum(len(t.rows) for t in dm.all_tables()) < 3 or not dm.has_table("属性"):
             return False
 
     # Use cases >= 3 with flow keywords
-    uc_count = content.count("### UC-")
-    if uc_count < 3:
-        return False
-    if ("基本フロー" not in content) or ("代替フロー" not in content) or ("例外" not in content):
+    if len(md.uc_blocks()) < 3 or not md.contains("基本フロー", "代替フロー", "例外"):
         return False
 
     # Acceptance criteria >= 3 bullets
-    ac_idx = content.find("## 受入条件")
-    if ac_idx != -1:
-        ac_section = content[ac_idx:]
-        bullets = [ln for ln in ac_section.splitlines() if ln.strip().startswith("-")]
-        if len(bullets) < 3:
-            return False
+    ac = md.section("受入条件")
+    if ac is not None and len(ac.all_bullets()) < 3:
+        return False
 
     return True
 
 
+def _declared_outputs(intent_yaml_path: str, run_id: str, run_dir: str) -> list[str]:
+    """The intent's output paths relative to run_dir (those inside it)."""
+    import yaml_min
+
+    root = _project_root()
+    path = intent_yaml_path if os.path.isabs(intent_yaml_path) else os.path.join(root, intent_yaml_path)
+    try:
+        spec = yaml_min.load_cached(path)
+    except Exception:
+        return []
+    rels = []
+    for o in (spec.get("outputs") or []) if isinstance(spec, dict) else []:
+        p = o.get("path") if isinstance(o, dict) else None
+        if isinstance(p, str):
+            rel = os.path.relpath(os.path.join(root, run_paths.render_path(p, run_id)), run_dir)
+            if not rel.startswith(".."):
+                rels.append(rel)
+    return rels
+
+
+def keep_partial(
+    intent_yaml_path: str, run_id: str, run_dir: str, attempt: Any, before: Dict[str, Tuple[int, int]]
+) -> None:
+    """After a timeout: record what the terminated attempt left behind (salvage)."""
+    part = salvage.record(run_dir, run_id, attempt, before, _declared_outputs(intent_yaml_path, run_id, run_dir))
+    if part:
+        missing = ",".join(part["outputs_missing"]) or "-"
+        write_log(
+            run_dir,
+            f"partial outputs kept: files={len(part['files'])} missing={missing} "
+            f"discarded={len(part['discarded'])} ({salvage.PARTIAL_NAME})",
+        )
+
+
+def _cache_lookup(
+    intent_yaml_path: str,
+    user_request: str,
+    run_id: str,
+    run_dir: str,
+    agent_spec: Dict[str, Any] | None,
+    use_cache: Optional[bool],
+) -> Tuple[Optional[str], bool]:
+    """(cache key or None when caching is off, hit). A hit is already materialized and logged."""
+    if not result_cache.enabled(use_cache):
+        return None, False
+    import yaml_min
+
+    root = _project_root()
+    path = intent_yaml_path if os.path.isabs(intent_yaml_path) else os.path.join(root, intent_yaml_path)
+    try:
+        key = result_cache.cache_key(yaml_min.load_cached(path), agent_spec, user_request, root)
+    except Exception:
+        return None, False
+    hit = result_cache.materialize(key, run_dir, run_id, root)
+    if hit is None:
+        return key, False
+    with log_stream.AttemptLog(run_dir, "cache") as alog:
+        alog.end(0, False, hit[0], hit[1], note=f"key={key[:16]}")
+    metrics.record_attempt(run_dir, run_id, "cache", _agent_id(agent_spec), 0, False, 0.0, {"source": "cache"})
+    return key, True
+
+
 def execute_with_retry(
     intent_yaml_path: str,
     user_request: str,
@@ -203,23 +261,57 @@ def execute_with_retry(
     timeout_s: Optional[int] = None,
     retries: int = 1,
     agent_spec: Dict[str, Any] | None = None,
+    use_cache: Optional[bool] = None,
+    deadline: Optional[Deadline] = None,
 ) -> int:
-    """Execute agent with one retry on failure or timeout.
-
-    Returns final return code.
+    """Execute agent with up to `retries` retries on failure or timeout.
+
+    Each attempt runs for min(timeout_s, time left on the run `deadline`);
+    retries wait a jittered backoff and are skipped once the deadline is
+    spent (rc 124 if no attempt could run at all). Each attempt's output is
+    streamed into logs.txt as it arrives (log_stream). Files left behind by
+    a timed-out attempt are recorded in partial.json and offered to the
+    retry (salvage).
+    With the result cache enabled (`use_cache`, default from
+    AGI_POC_RESULT_CACHE) a cached result is materialized instead of running
+    the agent, and a successful run is stored. Returns final return code.
     """
+    key, hit = _cache_lookup(intent_yaml_path, user_request, run_id, run_dir, agent_spec, use_cache)
+    if hit:
+        return 0
+    before = result_cache.snapshot_outputs(run_dir)
+    deadline = deadline or Deadline()
     attempt = 0
-    last_rc = 1
+    last_rc = 124
     while attempt <= max(0, retries):
+        if deadline.expired():
+            write_log(run_dir, f"deadline exhausted before attempt={attempt + 1} {deadline.describe()}")
+            break
         attempt += 1
-        rc, out, err, to = run_agent(intent_yaml_path, user_request, run_id, timeout_s, agent_spec)
-        write_log(
-            run_dir,
-            f"attempt={attempt} rc={rc} timeout={to}\nSTDOUT:\n{out}\nSTDERR:\n{err}\n",
-        )
+        budget = deadline.attempt_timeout(timeout_s)
+        info = f"timeout_s={budget:.2f} {deadline.describe()}" if budget is not None else deadline.describe()
+        started = time.monotonic()
+        with log_stream.AttemptLog(run_dir, attempt, info=info) as alog:
+            rc, out, err, to = run_agent(intent_yaml_path, user_request, run_id, budget, agent_spec, alog)
+            alog.end(rc, to, out, err)
+        metrics.record_attempt(run_dir, run_id, attempt, _agent_id(agent_spec), rc, to, time.monotonic() - started, alog.usage)
         last_rc = rc
+        if to:
+            keep_partial(intent_yaml_path, run_id, run_dir, attempt, before)
         if rc == 0:
+            if salvage.clear(run_dir):
+                write_log(run_dir, f"partial outputs completed by attempt={attempt}")
+            if key and alog.truncated():
+                write_log(run_dir, "result not cached: output exceeded the in-memory log tail")
+            elif key:
+                result_cache.store(key, run_dir, run_id, before, out, err, _project_root())
+            break
+        if attempt > retries:
             break
-        if attempt > retries + 1:
+        delay = backoff_s(attempt)
+        if not deadline.allows(delay):
+            write_log(run_dir, f"no retry: backoff {delay:.2f}s would exceed the deadline {deadline.describe()}")
             break
+        write_log(run_dir, f"retry in {delay:.2f}s {deadline.describe()}")
+        time.sleep(delay)
     return last_rc
@@ -0,0 +1,129 @@
+"""Partial outputs of timed-out attempts: runs/<run>/partial.json.
+
+When an attempt is terminated on timeout, the files it (or an earlier
+attempt of the same run) already wrote are kept and listed in partial.json
+instead of being silently overwritten:
+
+    {"attempt": 1, "files": {"demo/index.html": {"size": .., "mtime_ns": ..}},
+     "outputs_present": [...], "outputs_missing": [...], "discarded": [...]}
+
+Outputs are written atomically (object_store), so a listed file is
+complete; half-written temp files (`*.tmp-*`) are removed and listed under
+`discarded`. The next attempt gets `AGI_POC_PARTIAL=<path to partial.json>`
+(`agent_vars()`) and may keep those files instead of regenerating them:
+subprocess agents in their environment, pooled workers for the job's
+duration and `entry.type: python` agents through inproc.getenv().
+partial.json is removed once an attempt succeeds.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .inproc import getenv
+from .result_cache import snapshot_outputs
+
+
+PARTIAL_NAME = "partial.json"
+ENV_PARTIAL = "AGI_POC_PARTIAL"
+_TMP_MARK = ".tmp-"
+
+
+def partial_path(run_dir: str) -> str:
+    return os.path.join(run_dir, PARTIAL_NAME)
+
+
+def load(run_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(partial_path(run_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def record(
+    run_dir: str,
+    run_id: str,
+    attempt: Any,
+    before: Dict[str, Tuple[int, int]],
+    outputs: List[str],
+) -> Optional[Dict[str, Any]]:
+    """List the files written since `before` (snapshot_outputs at the start of
+    the run) as partial. `outputs` are the intent's declared outputs relative
+    to run_dir. Returns the record, or None when nothing was written."""
+    files: Dict[str, Dict[str, int]] = {}
+    discarded: List[str] = []
+    for rel, (mtime_ns, size) in sorted(snapshot_outputs(run_dir).items()):
+        if before.get(rel) == (mtime_ns, size):
+            continue
+        if _TMP_MARK in os.path.basename(rel):
+            try:
+                os.remove(os.path.join(run_dir, rel))
+            except OSError:
+                continue
+            discarded.append(rel)
+            continue
+        files[rel] = {"size": size, "mtime_ns": mtime_ns}
+    if not files and not discarded:
+        return None
+    doc = {
+        "run_id": run_id,
+        "attempt": attempt,
+        "ts": round(time.time(), 3),
+        "files": files,
+        "outputs_present": [o for o in outputs if o in files],
+        "outputs_missing": [o for o in outputs if o not in files],
+        "discarded": discarded,
+    }
+    path = partial_path(run_dir)
+    tmp = f"{path}.{os.getpid()}"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except OSError:
+        return doc
+    return doc
+
+
+def clear(run_dir: str) -> bool:
+    """Drop partial.json (the outputs are complete now); True if there was one."""
+    try:
+        os.remove(partial_path(run_dir))
+    except OSError:
+        return False
+    return True
+
+
+def agent_vars(run_dir: str) -> Dict[str, str]:
+    """Extra variables for the next attempt: AGI_POC_PARTIAL when partial outputs exist."""
+    path = partial_path(run_dir)
+    return {ENV_PARTIAL: path} if os.path.exists(path) else {}
+
+
+def resumable(path: Optional[str] = None) -> Dict[str, str]:
+    """Agent side: {absolute path: relpath} of the complete files listed in the
+    partial.json named by AGI_POC_PARTIAL (or `path`)."""
+    path = path or getenv(ENV_PARTIAL)
+    if not path:
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    run_dir = os.path.dirname(os.path.abspath(path))
+    out: Dict[str, str] = {}
+    for rel, meta in (doc.get("files") or {}).items() if isinstance(doc, dict) else []:
+        p = os.path.join(run_dir, rel)
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        if isinstance(meta, dict) and st.st_size == meta.get("size"):
+            out[os.path.normpath(p)] = rel
+    return out
@@ -0,0 +1,341 @@
+"""Warm worker pool for bin/<command> CLI agents.
+
+Launching `python3 bin/agent_cli ...` per attempt pays interpreter startup and
+module imports every time. `WorkerPool` keeps long-lived worker processes
+(`python -m agi_poc.worker_pool`, started ahead of time with yaml_min
+preloaded). Each worker receives (script, argv, cwd, env) jobs as
+length-prefixed pickles over a pipe, loads the script once as a module and
+calls its `main()` in-process with sys.argv, cwd, the extra `env` variables
+and stdout/stderr swapped for the job. Output goes back line by line as
+("stdout" | "stderr", text) frames, fed into the attempt's
+log_stream.AttemptLog as it arrives, and the job ends with an
+("exit", rc, usage) frame carrying the worker's RUSAGE_SELF delta
+(metrics.json). A job that exceeds its timeout gets its worker's process
+group terminated (SIGTERM, SIGKILL after the grace period) and the worker
+replaced, so timeouts behave like the subprocess path.
+
+Workers are reused: module-level state in a CLI survives between jobs, and
+output written directly to fd 1/2 (e.g. by grandchild processes) goes to
+the worker's stderr instead of being captured. POSIX only. Enable for
+runner.run_agent with AGI_POC_WORKERS=<n>.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+import pickle
+import queue
+import select
+import signal
+import struct
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import log_stream, metrics, proc_group
+from .inproc import load_script
+
+try:  # POSIX only
+    import resource
+except ImportError:  # pragma: no cover - non-POSIX
+    resource = None  # type: ignore[assignment]
+
+
+_HEADER = struct.Struct("!I")
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ---- framing ----
+def _send_frame(fd: int, obj: Any) -> None:
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    view = memoryview(_HEADER.pack(len(data)) + data)
+    while view:
+        n = os.write(fd, view)
+        view = view[n:]
+
+
+def _read_exact(fd: int, n: int, deadline: Optional[float]) -> Optional[bytes]:
+    # None on timeout; raises EOFError if the peer closed the pipe
+    buf = bytearray()
+    while len(buf) < n:
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                return None
+        chunk = os.read(fd, n - len(buf))
+        if not chunk:
+            raise EOFError("worker pipe closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _recv_frame(fd: int, deadline: Optional[float] = None) -> Tuple[bool, Any]:
+    """(True, obj) on success, (False, None) on timeout."""
+    head = _read_exact(fd, _HEADER.size, deadline)
+    if head is None:
+        return False, None
+    body = _read_exact(fd, _HEADER.unpack(head)[0], deadline)
+    if body is None:
+        return False, None
+    return True, pickle.loads(body)
+
+
+# ---- worker side ----
+def _exit_code(code: Any, err: io.StringIO) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    err.write(f"{code}\n")
+    return 1
+
+
+class _FrameStream(io.TextIOBase):
+    # Job stdout/stderr: complete lines are sent to the parent as they are written
+    def __init__(self, fd: int, stream: str) -> None:
+        self._fd = fd
+        self._stream = stream
+        self._buf = ""
+
+    def write(self, s: str) -> int:
+        self._buf += s
+        if "\n" in s or len(self._buf) >= log_stream.CHUNK:
+            self.flush()
+        return len(s)
+
+    def flush(self) -> None:
+        if self._buf:
+            data, self._buf = self._buf, ""
+            _send_frame(self._fd, (self._stream, data))
+
+    def writable(self) -> bool:
+        return True
+
+
+@contextlib.contextmanager
+def _job_env(env: Optional[Dict[str, str]]):
+    # The worker runs one job at a time, so os.environ can carry the job's variables
+    prev = {k: os.environ.get(k) for k in env or {}}
+    os.environ.update(env or {})
+    try:
+        yield
+    finally:
+        for k, v in prev.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def run_job(
+    script: str,
+    argv: List[str],
+    cwd: str,
+    cache: Dict[str, Tuple[int, Any]],
+    out: Optional[io.TextIOBase] = None,
+    err: Optional[io.TextIOBase] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> Tuple[int, str, str]:
+    """Run `script`'s main() in this process with argv/cwd/env/stdio swapped.
+
+    Output goes to `out` / `err` (StringIO by default); the returned
+    stdout/stderr are only filled in for the default buffers.
+    """
+    own = out is None
+    out = io.StringIO() if out is None else out
+    err = io.StringIO() if err is None else err
+    prev_cwd = os.getcwd()
+    prev_argv = sys.argv
+    try:
+        os.chdir(cwd)
+        sys.argv = [script, *argv]
+        with _job_env(env), contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                mod = load_script(script, cache)
+                main = getattr(mod, "main", None)
+                if main is None:
+                    import runpy
+
+                    runpy.run_path(script, run_name="__main__")
+                    rc = 0
+                else:
+                    rc = _exit_code(main(), err)
+            except SystemExit as e:
+                rc = _exit_code(e.code, err)
+            except BaseException:
+                traceback.print_exc(file=err)
+                rc = 1
+    finally:
+        sys.argv = prev_argv
+        os.chdir(prev_cwd)
+        out.flush()
+        err.flush()
+    if not own:
+        return rc, "", ""
+    return rc, out.getvalue(), err.getvalue()  # type: ignore[attr-defined]
+
+
+def _worker_loop() -> int:
+    # Keep the protocol on private fds; stray fd-1 writes land on stderr
+    proto_in = os.dup(0)
+    proto_out = os.dup(1)
+    os.dup2(2, 1)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    cache: Dict[str, Tuple[int, Any]] = {}
+    while True:
+        try:
+            _ok, job = _recv_frame(proto_in)
+        except (EOFError, OSError):
+            return 0
+        if job is None:
+            return 0
+        script, argv, cwd, env = job
+        before = resource.getrusage(resource.RUSAGE_SELF) if resource is not None else None
+        rc, _out, _err = run_job(
+            script, argv, cwd, cache, _FrameStream(proto_out, "stdout"), _FrameStream(proto_out, "stderr"), env
+        )
+        usage = None
+        if before is not None:
+            usage = metrics.delta(before, resource.getrusage(resource.RUSAGE_SELF), "worker")
+        _send_frame(proto_out, ("exit", rc, usage))
+
+
+# ---- parent side ----
+class _Worker:
+    def __init__(self) -> None:
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(p for p in (_SRC_DIR, env.get("PYTHONPATH")) if p)
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "agi_poc.worker_pool"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=env,
+            cwd=os.path.dirname(_SRC_DIR),
+            start_new_session=proc_group.NEW_SESSION,
+        )
+
+    def call(
+        self, job: Tuple[str, List[str], str, Dict[str, str]], timeout_s: Optional[float], log: log_stream.AttemptLog
+    ) -> Tuple[bool, Any]:
+        """Send a job and feed its output frames into `log`.
+
+        (True, (rc, usage)) when it exits, (False, None) on timeout.
+        """
+        _send_frame(self.proc.stdin.fileno(), job)
+        deadline = time.monotonic() + timeout_s if timeout_s and timeout_s > 0 else None
+        while True:
+            ok, frame = _recv_frame(self.proc.stdout.fileno(), deadline)
+            if not ok:
+                return False, None
+            if frame[0] == "exit":
+                return True, frame[1:]
+            log.feed(frame[0], frame[1])
+
+    def kill(self, grace_s: float = 0.0) -> None:
+        """Stop the worker and anything its jobs spawned (its process group)."""
+        if grace_s > 0 and self.proc.poll() is None:
+            proc_group.signal_group(self.proc.pid, signal.SIGTERM)
+            with contextlib.suppress(subprocess.TimeoutExpired):
+                self.proc.wait(timeout=grace_s)
+        proc_group.signal_group(self.proc.pid, signal.SIGKILL)
+        with contextlib.suppress(Exception):
+            self.proc.wait(timeout=5)
+        for f in (self.proc.stdin, self.proc.stdout):
+            with contextlib.suppress(Exception):
+                f.close()
+
+    def close(self) -> None:
+        with contextlib.suppress(Exception):
+            _send_frame(self.proc.stdin.fileno(), None)
+            self.proc.wait(timeout=2)
+        self.kill()
+
+
+class WorkerPool:
+    def __init__(self, size: int = 2):
+        self.size = max(1, int(size))
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(self.size):
+            self._idle.put(_Worker())
+
+    def run(
+        self,
+        script: str,
+        argv: List[str],
+        cwd: str,
+        timeout_s: Optional[float] = None,
+        log: Optional[log_stream.AttemptLog] = None,
+        env: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, str, str, bool]:
+        """Run `script`'s main() with argv and the extra `env` in a warm worker.
+
+        Output is streamed into `log` and its usage left on `log.usage`.
+        Returns (rc, stdout tail, stderr tail, timed_out) like runner.run_agent.
+        """
+        if self._closed:
+            raise RuntimeError("worker pool is closed")
+        log = log or log_stream.AttemptLog(None, 0)
+        worker = self._idle.get()
+        try:
+            ok, res = worker.call((script, list(argv), cwd, dict(env or {})), timeout_s, log)
+            if ok:
+                rc, log.usage = res
+                out, err = log.output()
+                return rc, out, err, False
+            worker.kill(proc_group.grace_s())
+            worker = _Worker()
+            out, err = log.output()
+            return 124, out, err, True
+        except (EOFError, OSError):
+            # worker died mid-job (e.g. os._exit or a crash): replace it
+            worker.kill()
+            worker = _Worker()
+            log.feed("stderr", "worker process exited unexpectedly\n")
+            out, err = log.output()
+            return 1, out, err, False
+        finally:
+            self._idle.put(worker)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for _ in range(self.size):
+            self._idle.get().close()
+
+
+_pool: Optional[WorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def default_pool() -> Optional[WorkerPool]:
+    """Process-wide pool when AGI_POC_WORKERS is a positive int (POSIX), else None."""
+    global _pool
+    try:
+        size = int(os.environ.get("AGI_POC_WORKERS") or 0)
+    except ValueError:
+        size = 0
+    if size <= 0 or os.name != "posix":
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool(size)
+        return _pool
+
+
+if __name__ == "__main__":
+    import yaml_min  # noqa: F401  - warm the import every agent CLI needs
+
+    raise SystemExit(_worker_loop())
@@ -6,8 +6,20 @@
 # - key: [list of scalars] (inline not needed; we use block)
 # - key: (newline) then indented list items '- value' or '- key: value' blocks
 # - Nested dicts under list items with consistent indentation (2 spaces)
+#
+# Parsing is a single linear pass: _tokenize() turns lines into
+# (indent, kind, key, value, line) tokens with blanks/comments dropped, and
+# _parse_tokens() builds the tree using the next token as its only lookahead.
+# loads(text) parses in-memory content; load(path) / load_many(paths) read files.
+#
+# load_cached() puts a process-wide LRU cache in front of load(), keyed on
+# (realpath, st_mtime_ns, st_size), so repeated routing decisions cost one
+# stat per file instead of a full parse.
 
+import os
 import re
+import threading
+from collections import OrderedDict
 
 def _parse_scalar(val):
     val = val.strip()
@@ -26,103 +38,103 @@ def _parse_scalar(val):
         return val.lower() == "true"
     return val
 
-def load(path):
-    with open(path, 'r', encoding='utf-8') as f:
-        lines = f.read().splitlines()
+# Token kinds produced by _tokenize()
+_MAP = "map"              # key: value  /  key:
+_ITEM = "item"            # - scalar
+_ITEM_EMPTY = "item_empty"  # bare '-'
+_ITEM_MAP = "item_map"    # - key: value  /  - key:
+_OTHER = "other"          # anything else (rejected by the parser)
 
-    root = {}
-    stack = [(0, root)]  # (indent, container)
-    idx = 0
-
-    def current_container():
-        return stack[-1][1]
-
-    def _peek_next_nonempty(start_idx):
-        j = start_idx
-        while j < len(lines):
-            l = lines[j]
-            if not l.strip() or l.lstrip().startswith('#'):
-                j += 1
-                continue
-            n_indent = len(l) - len(l.lstrip(' '))
-            n_stripped = l.strip()
-            return j, n_indent, n_stripped
-        return None, None, None
-
-    while idx < len(lines):
-        line = lines[idx]
-        idx += 1
-        # remove comments and skip blanks
-        if not line.strip() or line.lstrip().startswith('#'):
+
+def _tokenize(lines):
+    """Single linear pass over lines -> list of (indent, kind, key, value, line).
+
+    Blank and comment lines are dropped here, so the parser's lookahead is
+    simply the next token. `value` is the raw text after ':' (or after '-'
+    for scalar items); `line` is kept for error messages and the rare
+    '-key:' (no space) lookahead rule.
+    """
+    tokens = []
+    append = tokens.append
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
             continue
         indent = len(line) - len(line.lstrip(' '))
+        if stripped.startswith('-'):
+            rest = stripped[1:]
+            if rest.startswith(' '):
+                rest = rest[1:]
+            if rest == '':
+                append((indent, _ITEM_EMPTY, None, None, line))
+            elif ':' in rest:
+                key, _, val = rest.partition(':')
+                append((indent, _ITEM_MAP, key.strip(), val, line))
+            else:
+                append((indent, _ITEM, None, rest, line))
+        elif ':' in stripped:
+            key, _, val = stripped.partition(':')
+            append((indent, _MAP, key.strip(), val, line))
+        else:
+            append((indent, _OTHER, None, None, line))
+    return tokens
+
+
+def _parse_tokens(tokens):
+    root = {}
+    stack = [(0, root)]  # (indent, container)
+    n = len(tokens)
+
+    for i in range(n):
+        indent, kind, key, val, line = tokens[i]
+        nxt = tokens[i + 1] if i + 1 < n else None
         # normalize indent to multiples of 2
         if indent % 2 != 0:
             raise ValueError(f"Invalid indentation (not multiple of 2): {line}")
         while stack and indent < stack[-1][0]:
             stack.pop()
-        container = current_container()
-        stripped = line.strip()
+        container = stack[-1][1]
 
-        # list item: support both '- ' and bare '-'
-        if stripped.startswith('-'):
-            # list item
+        if kind in (_ITEM, _ITEM_EMPTY, _ITEM_MAP):
             if not isinstance(container, list):
-                # Start a new list in the parent; find parent mapping awaiting a list
                 raise ValueError(f"List item at unexpected position: {line}")
-            # accept '- ' or bare '-'
-            rest = stripped[1:]
-            if rest.startswith(' '):
-                rest = rest[1:]
-            if rest == '':
+            if kind == _ITEM_EMPTY:
                 # empty placeholder, push empty dict
                 item = {}
                 container.append(item)
                 stack.append((indent + 2, item))
-                continue
-            if ':' in rest:
-                # dict inline start: key: value or key:
-                key, _, val = rest.partition(':')
-                key = key.strip()
+            elif kind == _ITEM_MAP:
                 if val.strip() == '':
                     item = {key: {}}
                     container.append(item)
                     stack.append((indent + 2, item[key]))
                 else:
-                    # Start a dict item; even with an inline key: value, we may have more keys following
+                    # Start a dict item; a further-indented mapping line that
+                    # follows continues this same item.
                     item = {key: _parse_scalar(val)}
                     container.append(item)
-                    # Lookahead: if next non-empty line is further-indented mapping, treat it as continuation of this dict item
-                    next_i, n_indent, n_stripped = _peek_next_nonempty(idx)
-                    if next_i is not None and n_indent is not None:
-                        if n_indent >= indent + 2 and (':' in n_stripped) and (not n_stripped.startswith('- ')):
-                            # push the dict container so subsequent key: value lines attach to this item
-                            stack.append((indent + 2, item))
-                continue
+                    if nxt is not None and nxt[0] >= indent + 2 and (
+                        nxt[1] == _MAP
+                        or (nxt[1] == _ITEM_MAP and not nxt[4].lstrip().startswith('- '))
+                    ):
+                        stack.append((indent + 2, item))
             else:
-                container.append(_parse_scalar(rest))
-                continue
+                container.append(_parse_scalar(val))
+            continue
 
-        # mapping line: key: value or key:
-        if ':' in stripped:
-            key, _, val = stripped.partition(':')
-            key = key.strip()
-            val = val  # keep spaces
+        if kind == _MAP:
             if val.strip() == '':
-                # start nested structure; decide if next is list or dict based on lookahead
-                # default to dict but upgrade to list if next non-empty is a list item
-                next_i, n_indent, n_stripped = _peek_next_nonempty(idx)
-                if next_i is not None and n_indent is not None and n_indent >= indent + 2 and n_stripped.startswith('-'):
+                # start nested structure: a list if the next token is a
+                # further-indented list item, otherwise a dict
+                if nxt is not None and nxt[0] >= indent + 2 and nxt[1] in (_ITEM, _ITEM_EMPTY, _ITEM_MAP):
                     new_container = []
                 else:
                     new_container = {}
                 container[key] = new_container
                 stack.append((indent + 2, new_container))
             else:
-                # value
                 sval = _parse_scalar(val)
-                # Special case: if current container is a list and last item is a dict, and we're at list-item indentation,
-                # assign into that dict instead of treating list as mapping (which would error).
+                # A key: value at list-item indentation belongs to the last dict item
                 if isinstance(container, list) and container and isinstance(container[-1], dict):
                     container[-1][key] = sval
                 else:
@@ -132,6 +144,90 @@ def load(path):
         # if we reach here, it's invalid in our subset
         raise ValueError(f"Unsupported YAML line: {line}")
 
-    # Post-process: convert patterns where lists are represented as list of one-key dicts into list of dicts
-    # Our representation already handles that adequately.
     return root
+
+
+def loads(text):
+    """Parse YAML (repo subset) from a string."""
+    return _parse_tokens(_tokenize(text.splitlines()))
+
+
+def load(path):
+    """Parse YAML (repo subset) from a file path."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return loads(f.read())
+
+
+def load_many(paths):
+    """Parse several files; returns a list of specs in the order of `paths`."""
+    return [load(p) for p in paths]
+
+
+# ---- Parsed-spec cache ----
+_CACHE_MAXSIZE = 1024
+_cache = OrderedDict()  # realpath -> ((st_mtime_ns, st_size), parsed)
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def clone(obj):
+    """Cheap structural copy for the dict/list/scalar trees produced by load()."""
+    if isinstance(obj, dict):
+        return {k: clone(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [clone(v) for v in obj]
+    return obj
+
+
+def load_cached(path):
+    """Like load(), but served from a process-wide cache while the file is unchanged.
+
+    Each call returns a private copy, so callers may mutate the result freely.
+    """
+    # Resolved on every call: a symlink (or a symlinked parent dir) may be
+    # retargeted at any time, and realpath is cheap next to parsing
+    real = os.path.realpath(path)
+    st = os.stat(real)
+    sig = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        hit = _cache.get(real)
+        if hit is not None and hit[0] == sig:
+            _cache.move_to_end(real)
+            _cache_stats["hits"] += 1
+            return clone(hit[1])
+        _cache_stats["misses"] += 1
+    parsed = load(real)
+    with _cache_lock:
+        _cache[real] = (sig, parsed)
+        _cache.move_to_end(real)
+        while len(_cache) > _CACHE_MAXSIZE:
+            _cache.popitem(last=False)
+    return clone(parsed)
+
+
+def cache_info():
+    """Return hit/miss counters and current occupancy of the load_cached() cache."""
+    with _cache_lock:
+        return {
+            "hits": _cache_stats["hits"],
+            "misses": _cache_stats["misses"],
+            "maxsize": _CACHE_MAXSIZE,
+            "currsize": len(_cache),
+        }
+
+
+def cache_clear():
+    """Drop all cached specs and reset the counters."""
+    with _cache_lock:
+        _cache.clear()
+        _cache_stats["hits"] = 0
+        _cache_stats["misses"] = 0
+
+
+def set_cache_size(maxsize):
+    """Change the LRU capacity (entries); shrinking evicts least recently used specs."""
+    global _CACHE_MAXSIZE
+    with _cache_lock:
+        _CACHE_MAXSIZE = max(1, int(maxsize))
+        while len(_cache) > _CACHE_MAXSIZE:
+            _cache.popitem(last=False)
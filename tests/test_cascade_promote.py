@@ -0,0 +1,84 @@
+"""Cascade promotion must never modify runs/.objects in place.
+
+Run outputs are read-only hardlinks into the content-addressed store, so
+rewriting a promoted artifact has to replace the link. After a promotion
+every object still hashes to its name, and another run linking the same
+object still sees the original content.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from agi_poc import object_store, run_paths  # noqa: E402
+from agi_poc.cascade_runner import candidate_run_id, promote  # noqa: E402
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        h.update(f.read())
+    return h.hexdigest()
+
+
+class CascadePromoteTest(unittest.TestCase):
+    def setUp(self):
+        self.run_id = run_paths.new_run_id()
+        self.other_id = run_paths.new_run_id()
+        self.cand_id = candidate_run_id(self.run_id, "agent_a")
+        self.dirs = [run_paths.run_dir(self.run_id, ROOT), run_paths.run_dir(self.other_id, ROOT)]
+        self.before = self._objects()
+
+    def tearDown(self):
+        for d in self.dirs:
+            shutil.rmtree(d, ignore_errors=True)
+        for path in self._objects() - self.before:
+            try:
+                if os.stat(path).st_nlink <= 1:
+                    os.unlink(path)
+            except OSError:
+                pass
+
+    def _objects(self):
+        base = object_store.objects_dir(ROOT)
+        if not os.path.isdir(base):
+            return set()
+        return {os.path.join(base, shard, name) for shard in os.listdir(base) for name in os.listdir(os.path.join(base, shard))}
+
+    def _deploy_info(self, run_id):
+        rel = run_paths.run_rel(run_id)
+        return {
+            "url": f"/static?path={rel}/demo/index.html",
+            "kind": "static",
+            "files": [f"{rel}/demo/index.html", "demo/index.html"],
+        }
+
+    def test_promote_keeps_objects_intact(self):
+        cand_dir = run_paths.run_dir(self.cand_id, ROOT)
+        cand_info = self._deploy_info(self.cand_id)
+        object_store.write_json(os.path.join(cand_dir, "artifacts", "deploy_info.json"), cand_info, ROOT)
+        object_store.write_text(os.path.join(cand_dir, "demo", "index.html"), "<html></html>", ROOT)
+        # another run sharing the candidate's deploy_info object
+        other = os.path.join(run_paths.run_dir(self.other_id, ROOT), "artifacts", "deploy_info.json")
+        object_store.write_json(other, cand_info, ROOT)
+
+        moved = promote(self.run_id, self.cand_id)
+
+        self.assertEqual(moved, ["artifacts", "demo"])
+        promoted = os.path.join(run_paths.run_dir(self.run_id, ROOT), "artifacts", "deploy_info.json")
+        with open(promoted, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), self._deploy_info(self.run_id))
+        with open(other, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), cand_info)
+        for path in self._objects():
+            self.assertEqual(_sha256(path), os.path.basename(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""yaml_min.load_cached must follow a symlink that is retargeted between calls."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import yaml_min  # noqa: E402
+
+
+class LoadCachedSymlinkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        yaml_min.cache_clear()
+
+    def tearDown(self):
+        yaml_min.cache_clear()
+        self.tmp.cleanup()
+
+    def _write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_retargeted_symlink(self):
+        a = self._write("a.yml", "agent_id: a\n")
+        b = self._write("b.yml", "agent_id: b\n")
+        link = os.path.join(self.tmp.name, "current.yml")
+        os.symlink(a, link)
+        self.assertEqual(yaml_min.load_cached(link), {"agent_id": "a"})
+        self.assertEqual(yaml_min.load_cached(link), {"agent_id": "a"})
+        tmp_link = link + ".new"
+        os.symlink(b, tmp_link)
+        os.replace(tmp_link, link)
+        self.assertEqual(yaml_min.load_cached(link), {"agent_id": "b"})
+
+    def test_retargeted_parent_dir(self):
+        for name in ("v1", "v2"):
+            os.mkdir(os.path.join(self.tmp.name, name))
+            self._write(os.path.join(name, "spec.yml"), f"version: {name}\n")
+        cur = os.path.join(self.tmp.name, "cur")
+        os.symlink(os.path.join(self.tmp.name, "v1"), cur)
+        path = os.path.join(cur, "spec.yml")
+        self.assertEqual(yaml_min.load_cached(path), {"version": "v1"})
+        os.unlink(cur)
+        os.symlink(os.path.join(self.tmp.name, "v2"), cur)
+        self.assertEqual(yaml_min.load_cached(path), {"version": "v2"})
+
+
+if __name__ == "__main__":
+    unittest.main()
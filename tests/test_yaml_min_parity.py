@@ -0,0 +1,76 @@
+"""Parity of the single-pass yaml_min parser with the original line scanner.
+
+tests/yaml_min_corpus.json maps every YAML file under intents/, agents/,
+registry/, templates/ and blueprints/ (plus a few `edge/...` cases with
+comments, blank lines and invalid lines) to its text and to what the
+pre-rewrite parser returned for it: either `expected` (the parsed tree) or
+`error` (the ValueError message). The texts are stored in the corpus, so the
+golden outputs stay valid when the files in the tree change.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import yaml_min  # noqa: E402
+
+CORPUS_PATH = os.path.join(ROOT, "tests", "yaml_min_corpus.json")
+
+
+def _corpus():
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class YamlMinParityTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = _corpus()
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.paths = {}
+        for i, (name, case) in enumerate(sorted(cls.corpus.items())):
+            path = os.path.join(cls.tmp.name, f"{i:03d}.yml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(case["text"])
+            cls.paths[name] = path
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_corpus_covers_repo_dirs(self):
+        for prefix in ("intents/", "agents/", "registry/", "templates/"):
+            self.assertTrue(any(n.startswith(prefix) for n in self.corpus), prefix)
+
+    def test_loads(self):
+        for name, case in sorted(self.corpus.items()):
+            with self.subTest(name=name):
+                if "error" in case:
+                    with self.assertRaises(ValueError) as cm:
+                        yaml_min.loads(case["text"])
+                    self.assertEqual(str(cm.exception), case["error"])
+                else:
+                    self.assertEqual(yaml_min.loads(case["text"]), case["expected"])
+
+    def test_load(self):
+        for name, case in sorted(self.corpus.items()):
+            with self.subTest(name=name):
+                if "error" in case:
+                    with self.assertRaises(ValueError):
+                        yaml_min.load(self.paths[name])
+                else:
+                    self.assertEqual(yaml_min.load(self.paths[name]), case["expected"])
+
+    def test_load_many(self):
+        names = sorted(n for n, c in self.corpus.items() if "error" not in c)
+        got = yaml_min.load_many([self.paths[n] for n in names])
+        self.assertEqual(got, [self.corpus[n]["expected"] for n in names])
+
+
+if __name__ == "__main__":
+    unittest.main()